@@ -9,6 +9,7 @@ a = Analysis(
     datas=[
         ('modulo1/*.py', 'modulo1'),
         ('modulo2/*.py', 'modulo2'),
+        ('comun/*.py', 'comun'),
     ],
     hiddenimports=[
         'tkinter',
@@ -20,6 +21,13 @@ a = Analysis(
         'PIL._tkinter_finder',
         'openpyxl',
         'openpyxl.styles',
+        'openpyxl.utils',
+        'modulo1.model',
+        'modulo2.model_transegen',
+        'comun.cli',
+        'comun.text_archive',
+        'sqlite3',
+        'zlib',
         'pathlib',
         're',
         'os',
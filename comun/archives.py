@@ -0,0 +1,155 @@
+import re
+import tarfile
+import threading
+import zipfile
+from pathlib import Path
+
+
+# Separa el archivo comprimido del miembro: 'lote.zip!carpeta/doc.pdf'
+SEPARATOR = '!'
+
+# Páginas de un documento dentro de un PDF con varios: 'lote.pdf#p3-4'
+# (primera y última página, desde 1; ver comun.split)
+PAGES_SEPARATOR = '#p'
+_PAGES_RE = re.compile(r'^(.*)#p(\d+)-(\d+)$', re.DOTALL)
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+# Archivos comprimidos abiertos en este proceso (se reutilizan entre miembros)
+_open_archives = {}
+_lock = threading.Lock()
+
+
+def is_archive(path):
+    """Verifica si una ruta es un ZIP o TAR (por la extensión)"""
+    return str(path).lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def split_member(path):
+    """Retorna (archivo comprimido, miembro) de una ruta 'lote.zip!doc.pdf' o None"""
+    path = str(path)
+    start = 0
+    while True:
+        index = path.find(SEPARATOR, start)
+        if index < 0:
+            return None
+        if is_archive(path[:index]):
+            return path[:index], path[index + 1:]
+        start = index + 1
+
+
+def is_member(path):
+    return split_member(path) is not None
+
+
+def split_pages(path):
+    """Retorna (ruta del PDF, primera página, fin) con páginas desde 0 y fin exclusivo
+    
+    Para una ruta sin rango de páginas el fin es None (todo el documento).
+    """
+    match = _PAGES_RE.match(str(path))
+    if match is None:
+        return str(path), 0, None
+    return match.group(1), int(match.group(2)) - 1, int(match.group(3))
+
+
+def with_pages(path, start, stop):
+    """Ruta de las páginas [start, stop) de un PDF ('lote.pdf#p3-4')"""
+    return f"{path}{PAGES_SEPARATOR}{start + 1}-{stop}"
+
+
+def display_name(path):
+    """Nombre para mostrar: 'doc.pdf' o 'lote.zip!carpeta/doc.pdf' para un miembro"""
+    parts = split_member(path)
+    if parts is None:
+        return Path(path).name
+    archive, member = parts
+    return f"{Path(archive).name}{SEPARATOR}{member}"
+
+
+def _open(archive):
+    """Abre (una sola vez por proceso) un ZIP o TAR para leer sus miembros"""
+    with _lock:
+        handle = _open_archives.get(archive)
+        if handle is None:
+            if archive.lower().endswith('.zip'):
+                handle = zipfile.ZipFile(archive)
+            else:
+                handle = tarfile.open(archive, 'r:*')
+            _open_archives[archive] = handle
+        return handle
+
+
+def list_members(archive):
+    """Retorna las rutas 'lote.zip!miembro.pdf' de los PDFs de un archivo comprimido"""
+    archive = str(archive)
+    handle = _open(archive)
+    with _lock:
+        if isinstance(handle, zipfile.ZipFile):
+            names = [info.filename for info in handle.infolist() if not info.is_dir()]
+        else:
+            names = [info.name for info in handle.getmembers() if info.isfile()]
+    return [
+        f"{archive}{SEPARATOR}{name}" for name in names if name.lower().endswith('.pdf')
+    ]
+
+
+def read_member(path):
+    """Lee un miembro completo a memoria (sin archivos temporales)
+    
+    En un TAR comprimido conviene leer los miembros en el orden del archivo:
+    retroceder obliga a descomprimir desde el principio.
+    """
+    archive, member = split_member(split_pages(path)[0])
+    handle = _open(archive)
+    if isinstance(handle, zipfile.ZipFile):
+        # ZipFile permite leer miembros desde varios hilos
+        return handle.read(member)
+    with _lock:
+        f = handle.extractfile(member)
+        if f is None:
+            raise OSError(f"{member} no es un archivo dentro de {Path(archive).name}")
+        return f.read()
+
+
+def member_size(path):
+    """Tamaño sin comprimir de un miembro (en bytes)"""
+    archive, member = split_member(split_pages(path)[0])
+    handle = _open(archive)
+    with _lock:
+        if isinstance(handle, zipfile.ZipFile):
+            return handle.getinfo(member).file_size
+        return handle.getmember(member).size
+
+
+def file_size(path):
+    """Tamaño de un PDF suelto o de un miembro de un archivo comprimido"""
+    if is_member(path):
+        return member_size(path)
+    return Path(split_pages(path)[0]).stat().st_size
+
+
+def open_pdf(path):
+    """Abre un PDF con PyMuPDF, desde memoria si es un miembro de un ZIP/TAR"""
+    import fitz
+    
+    if is_member(path):
+        return fitz.open(stream=read_member(path), filetype="pdf")
+    return fitz.open(split_pages(path)[0])
+
+
+def expand(paths):
+    """Reemplaza cada ZIP/TAR por sus PDFs; las demás rutas pasan sin cambios"""
+    for path in paths:
+        if is_archive(path) and Path(path).is_file():
+            yield from list_members(path)
+        else:
+            yield str(path)
+
+
+def close_all():
+    """Cierra los archivos comprimidos abiertos en este proceso"""
+    with _lock:
+        for handle in _open_archives.values():
+            handle.close()
+        _open_archives.clear()
@@ -0,0 +1,193 @@
+import json
+import os
+import socket
+import threading
+import time
+
+from comun.config import app_dir
+
+
+# Duración mínima de cada medición y pausa tras un cambio (los trabajadores
+# nuevos cargan los modelos antes de atender documentos)
+WINDOW_SECONDS = 8.0
+SETTLE_SECONDS = 2.0
+
+# Tiempo máximo de búsqueda: después se fija la mejor cantidad medida
+CONVERGE_SECONDS = 60.0
+
+# Mejora mínima para considerar mejor una cantidad de trabajadores (ruido)
+MIN_GAIN = 0.03
+
+# Con la CPU sobre este uso no se prueban más trabajadores
+MAX_CPU_UTILIZATION = 0.95
+
+# Módulos que usan tesseract (se ajustan también sus hilos de OpenMP)
+OCR_MODULOS = ('transegen',)
+
+
+def _settings_path():
+    return app_dir() / 'autoajuste.json'
+
+
+def _load_all():
+    try:
+        with open(_settings_path(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_settings(modulo_nombre):
+    """Ajuste guardado para este equipo y módulo ({'workers', 'hilos_ocr', ...}) o None"""
+    return _load_all().get(socket.gethostname(), {}).get(modulo_nombre)
+
+
+def save_settings(modulo_nombre, settings):
+    """Guarda el mejor ajuste medido para este equipo y módulo"""
+    data = _load_all()
+    data.setdefault(socket.gethostname(), {})[modulo_nombre] = settings
+    try:
+        with open(_settings_path(), 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+    except OSError:
+        pass
+
+
+def ocr_threads(modulo_nombre, workers):
+    """Hilos de tesseract para no sobrecargar la CPU con `workers` procesos (None si no aplica)"""
+    if modulo_nombre not in OCR_MODULOS:
+        return None
+    return max(1, (os.cpu_count() or 1) // max(1, workers))
+
+
+def initial_workers(modulo_nombre):
+    """Cantidad de trabajadores para empezar: la guardada o la mitad de los núcleos"""
+    settings = load_settings(modulo_nombre)
+    if settings:
+        return settings['workers']
+    return max(1, (os.cpu_count() or 1) // 2)
+
+
+class Autotuner:
+    """Ajusta la cantidad de trabajadores de un pool durante un lote
+    
+    Mide documentos por segundo y uso de CPU en ventanas de unos segundos
+    y prueba cantidades vecinas (subiendo mientras la CPU tenga margen)
+    hasta que ninguna mejore o pase `deadline`; entonces deja la mejor y
+    la guarda para este equipo y módulo. Las ventanas en las que el pool se
+    quedó sin documentos en cola no cuentan: ahí el límite es la entrada,
+    no la cantidad de trabajadores.
+    """
+    
+    def __init__(self, pool, modulo_nombre, min_workers=1, max_workers=None,
+                 window=WINDOW_SECONDS, deadline=CONVERGE_SECONDS):
+        self.pool = pool
+        self.modulo = modulo_nombre
+        self.min_workers = min_workers
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.window = window
+        self.deadline = deadline
+        self.step = max(1, self.max_workers // 8)
+        # Documentos por segundo medidos para cada cantidad de trabajadores
+        self.rates = {}
+        self._best = None
+        self.best = None
+        self.converged = False
+        self._stop = threading.Event()
+        # _finish puede llamarse desde _run y desde stop() si el hilo no terminó a tiempo
+        self._finish_lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def start(self):
+        self._apply(min(max(self.pool.size, self.min_workers), self.max_workers))
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """Termina la búsqueda y guarda el mejor ajuste medido (si hubo mediciones)"""
+        self._stop.set()
+        self._thread.join(timeout=5)
+        if self.rates:
+            self._finish()
+        return self.best
+    
+    def _apply(self, workers):
+        self.workers = workers
+        threads = ocr_threads(self.modulo, workers)
+        if threads is not None:
+            self.pool.task_options[self.modulo] = {'hilos_ocr': threads}
+        self.pool.resize(workers)
+    
+    def _measure(self):
+        """Mide una ventana: retorna (documentos/s, uso de CPU) o None si no es válida"""
+        if self._stop.wait(SETTLE_SECONDS):
+            return None
+        completed, cpu = self.pool.counters()
+        start = time.monotonic()
+        starved = False
+        while not self._stop.wait(0.5):
+            if self.pool.pending_count() == 0:
+                starved = True
+            elapsed = time.monotonic() - start
+            done = self.pool.counters()[0] - completed
+            # Al menos una ventana y un documento por trabajador (OCR lento)
+            if elapsed >= self.window and (done >= self.workers or elapsed >= 3 * self.window):
+                break
+        else:
+            return None
+        if starved:
+            return None
+        elapsed = time.monotonic() - start
+        completed2, cpu2 = self.pool.counters()
+        utilization = (cpu2 - cpu) / (elapsed * (os.cpu_count() or 1))
+        return (completed2 - completed) / elapsed, utilization
+    
+    def _next(self, utilization):
+        """Próxima cantidad a probar (None si ya no hay vecinos sin medir)"""
+        up, down = self._best + self.step, self._best - self.step
+        can_grow = up <= self.max_workers and up not in self.rates
+        if self.workers == self._best:
+            if can_grow and utilization < MAX_CPU_UTILIZATION:
+                return up
+        elif self.workers < self._best and can_grow:
+            return up
+        if down >= self.min_workers and down not in self.rates:
+            return down
+        return None
+    
+    def _run(self):
+        start = time.monotonic()
+        while not self._stop.is_set() and time.monotonic() - start < self.deadline:
+            measurement = self._measure()
+            if measurement is None:
+                if self.pool.pending_count() == 0:
+                    # Cola vacía (fin del lote o entrada lenta): no hay más que medir
+                    break
+                continue
+            rate, utilization = measurement
+            if not self.rates or rate > self.rates[self._best] * (1 + MIN_GAIN):
+                self._best = self.workers
+            self.rates[self.workers] = rate
+            nxt = self._next(utilization)
+            if nxt is None:
+                break
+            self._apply(nxt)
+        if self.rates:
+            self._finish()
+    
+    def _finish(self):
+        """Deja la mejor cantidad medida y la guarda para las próximas ejecuciones (una vez)"""
+        with self._finish_lock:
+            if self.converged:
+                return
+            workers = self._best
+            if workers != self.workers:
+                self._apply(workers)
+            self.best = {
+                'workers': workers,
+                'hilos_ocr': ocr_threads(self.modulo, workers),
+                'archivos_por_s': round(self.rates[workers], 3),
+                'medido': time.strftime('%Y-%m-%d %H:%M'),
+            }
+            save_settings(self.modulo, self.best)
+            self.converged = True
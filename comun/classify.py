@@ -0,0 +1,148 @@
+import itertools
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from comun.archives import open_pdf
+from comun.modulos import MODULOS
+from comun.preflight import PREFLIGHT_CHUNK, PREFLIGHT_MIN_PARALLEL
+
+
+# Caracteres de la primera página que se revisan (el encabezado basta)
+SAMPLE_CHARS = 3000
+
+# Mínimo de caracteres para confiar en la capa de texto (si no, OCR del encabezado)
+MIN_TEXT_CHARS = 50
+
+# Resolución y fracción superior de la página 1 para el OCR del encabezado
+HEADER_DPI = 100
+HEADER_FRACTION = 0.35
+
+# Segundos máximos del OCR del encabezado
+HEADER_OCR_TIMEOUT = 15
+
+# Patrones compilados por módulo (ver ModuloInfo.huellas)
+_PATTERNS = {
+    nombre: [re.compile(p, re.IGNORECASE) for p in modulo.huellas]
+    for nombre, modulo in MODULOS.items()
+}
+
+
+def classify_text(text):
+    """Retorna el módulo cuyas huellas aparecen más veces en el texto (o None)"""
+    sample = text[:SAMPLE_CHARS]
+    best, best_score = None, 0
+    for nombre, patterns in _PATTERNS.items():
+        score = sum(1 for pattern in patterns if pattern.search(sample))
+        if score > best_score:
+            best, best_score = nombre, score
+    return best
+
+
+def header_clip(page):
+    """Rectángulo de la parte superior de una página (donde va el encabezado)"""
+    import fitz
+    
+    rect = page.rect
+    return fitz.Rect(rect.x0, rect.y0, rect.x1, rect.y0 + rect.height * HEADER_FRACTION)
+
+
+def header_ocr(page, profile=None):
+    """OCR rápido (baja resolución, escala de grises) de la parte superior de una página
+    
+    Con `profile` (comun.ocr_profiles) usa su idioma, datos entrenados y
+    preprocesamiento; la resolución sigue siendo la baja del encabezado.
+    """
+    import fitz
+    import pytesseract
+    from PIL import Image
+    
+    clip = header_clip(page)
+    pix = page.get_pixmap(
+        matrix=fitz.Matrix(HEADER_DPI / 72, HEADER_DPI / 72), clip=clip, colorspace=fitz.csGRAY
+    )
+    img = Image.frombytes('L', (pix.width, pix.height), pix.samples)
+    if profile is None:
+        return pytesseract.image_to_string(img, lang='spa', timeout=HEADER_OCR_TIMEOUT)
+    return pytesseract.image_to_string(
+        profile.preprocess(img),
+        lang=profile.lang,
+        config=profile.config(),
+        timeout=HEADER_OCR_TIMEOUT
+    )
+
+
+def classify_pdf(pdf_path, data=None, ocr=True):
+    """Detecta el tipo de documento mirando solo la página 1
+    
+    Usa la capa de texto si tiene suficiente contenido; si no (documento
+    escaneado) y `ocr` es True, hace un OCR de baja resolución del
+    encabezado. Retorna (nombre del módulo o None, método) con método
+    'texto', 'ocr' o el motivo por el que no se pudo clasificar.
+    """
+    import fitz
+    
+    try:
+        doc = fitz.open(stream=data, filetype="pdf") if data is not None else open_pdf(pdf_path)
+    except Exception as e:
+        return None, f"No se puede abrir: {e}"
+    try:
+        if doc.needs_pass or len(doc) == 0:
+            return None, "Protegido o sin páginas"
+        page = doc[0]
+        text = page.get_text()
+        if len(text.strip()) >= MIN_TEXT_CHARS:
+            return classify_text(text), 'texto'
+        if not ocr:
+            return None, "Sin texto (OCR desactivado)"
+        try:
+            return classify_text(header_ocr(page)), 'ocr'
+        except Exception as e:
+            return None, f"OCR del encabezado falló: {e}"
+    except Exception as e:
+        return None, f"PDF dañado: {e}"
+    finally:
+        doc.close()
+
+
+def _classify_chunk(chunk, ocr):
+    """Clasifica un grupo de archivos (se ejecuta en un proceso del pool)"""
+    return [classify_pdf(pdf_path, ocr=ocr) for pdf_path in chunk]
+
+
+def route_files(pdf_files, workers=None, ocr=True, progress=None):
+    """Reparte un lote mezclado por tipo de documento
+    
+    Retorna ({módulo: [rutas]}, [(ruta, motivo)] de los no clasificados),
+    manteniendo el orden original dentro de cada módulo. Con muchos archivos
+    la clasificación se reparte en procesos, igual que el análisis previo.
+    """
+    pdf_files = [str(p) for p in pdf_files]
+    workers = workers or os.cpu_count() or 1
+    
+    if workers <= 1 or len(pdf_files) < PREFLIGHT_MIN_PARALLEL:
+        results = []
+        for pdf_path in pdf_files:
+            results.append(classify_pdf(pdf_path, ocr=ocr))
+            if progress:
+                progress(len(results))
+    else:
+        chunks = [pdf_files[i:i + PREFLIGHT_CHUNK] for i in range(0, len(pdf_files), PREFLIGHT_CHUNK)]
+        results = []
+        ctx = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+            for chunk_results in executor.map(_classify_chunk, chunks, itertools.repeat(ocr)):
+                results.extend(chunk_results)
+                if progress:
+                    progress(len(results))
+    
+    routed = {}
+    unclassified = []
+    for pdf_path, (nombre, metodo) in zip(pdf_files, results):
+        if nombre is None:
+            motivo = metodo if metodo not in ('texto', 'ocr') else "Tipo de documento no reconocido"
+            unclassified.append((pdf_path, motivo))
+        else:
+            routed.setdefault(nombre, []).append(pdf_path)
+    return routed, unclassified
@@ -0,0 +1,726 @@
+import argparse
+import csv
+import sys
+import time
+from pathlib import Path
+
+from comun.export import write_records
+from comun.inputs import iter_pdf_paths
+from comun import metrics
+from comun.dedup import DedupIndex
+from comun.journal import BatchJournal
+from comun.memory import ENV_MAX_RSS
+from comun.modulos import MODULOS, get_modulo
+from comun.ocr_profiles import PROFILES
+from comun.records import RecordStore
+
+
+def _log(message):
+    """Muestra un mensaje de progreso en la consola"""
+    print(message, file=sys.stderr, flush=True)
+
+
+def cmd_procesar(args):
+    """Procesa un lote de PDFs sin interfaz gráfica"""
+    modulo = get_modulo(args.modulo)
+    model = modulo.create_model()
+    if args.dedup_contenido:
+        model.dedup_index = DedupIndex(by_content=True)
+    model.add_pdf_files(iter_pdf_paths(args.entradas))
+    if model.skipped_duplicates:
+        _log(f"Omitidos {model.skipped_duplicates} archivos duplicados")
+    
+    if not args.salida and not args.delta:
+        _log("Indique el archivo de salida (-o) y/o el archivo de cambios (--delta)")
+        return 2
+    if args.dividir:
+        if not hasattr(model, 'split_documents'):
+            _log("--dividir solo se aplica al módulo transegen")
+            return 2
+        if (args.timeout_doc is not None or args.autoajuste or args.pipeline
+                or args.prefetch_mb or args.archivar_texto):
+            _log(
+                "--dividir usa sus propios procesos (--workers) y no se puede combinar con "
+                "--timeout-doc, --autoajuste, --pipeline, --prefetch-mb ni --archivar-texto"
+            )
+            return 2
+        model.split_documents = True
+        model.split_workers = args.workers
+    use_pool = not args.dividir and (
+        args.timeout_doc is not None or args.workers is not None or args.autoajuste
+    )
+    if args.archivar_texto and use_pool:
+        _log("--archivar-texto no se puede combinar con --timeout-doc, --workers ni --autoajuste")
+        return 2
+    if args.pipeline:
+        if use_pool or not hasattr(model, 'pipelined'):
+            _log("--pipeline solo se aplica al OCR en este proceso (módulo transegen, sin --workers)")
+            return 2
+        model.pipelined = True
+    prefetch = int(args.prefetch_mb * 1024 * 1024) if args.prefetch_mb else None
+    if prefetch and args.pipeline:
+        _log("--prefetch-mb no se puede combinar con --pipeline")
+        return 2
+    model.prefetch_budget = prefetch
+    if args.perfil_ocr:
+        if not hasattr(model, 'set_ocr_profile'):
+            _log(f"El módulo {modulo.nombre} no usa OCR: --perfil-ocr no se aplica")
+            return 2
+        model.set_ocr_profile(args.perfil_ocr)
+    
+    if args.archivar_texto:
+        from comun.text_archive import TextArchive
+        model.text_archive = TextArchive(args.archivar_texto)
+    
+    if args.diario:
+        journal = BatchJournal(args.diario)
+    else:
+        # Al dividir, el diario guarda una entrada por resolución: otro diario
+        nombre = f"{modulo.nombre}-dividido" if args.dividir else modulo.nombre
+        journal = BatchJournal.for_batch(nombre, model.get_pdf_files())
+    if journal.exists():
+        if args.desde_cero:
+            journal.remove()
+        elif not args.reanudar:
+            _log(
+                f"Existe un lote interrumpido ({journal.path}). "
+                "Use --reanudar para continuarlo o --desde-cero para descartarlo."
+            )
+            return 2
+        else:
+            _log(f"Reanudando lote: {len(journal.load())} archivos ya completados")
+    
+    collector = metrics.enable() if args.metricas else None
+    tracer = metrics.start_tracing() if args.traza else None
+    if tracer is not None:
+        tracer.name_process(f"procesar {modulo.nombre}")
+    inicio = time.perf_counter()
+    try:
+        if use_pool:
+            records, prefetch_stats = _process_in_pool(
+                modulo, model.get_pdf_files(), journal, args, collector, tracer, prefetch
+            )
+        else:
+            records = model.process_all_pdfs(journal=journal)
+            prefetch_stats = model.prefetch_stats
+        if args.salida:
+            write_records(records, args.salida, modulo)
+        if args.delta:
+            _export_delta(modulo, records, args)
+    finally:
+        metrics.disable()
+        metrics.stop_tracing()
+        if model.text_archive is not None:
+            model.text_archive.close()
+    
+    journal.remove()
+    errores = sum(1 for d in records if 'error' in d)
+    _log(
+        f"Procesados {len(records)} archivos ({errores} con errores) "
+        f"en {time.perf_counter() - inicio:.1f} s -> {args.salida or args.delta}"
+    )
+    if prefetch_stats is not None:
+        from comun.prefetch import format_stats
+        _log(format_stats(prefetch_stats))
+    if collector is not None:
+        collector.save(args.metricas)
+        _log(f"Métricas por etapa ({args.metricas}):")
+        _log(metrics.format_summary(collector.summary()))
+    if tracer is not None:
+        _log(f"Traza guardada en {tracer.save(args.traza)} (abrir en chrome://tracing o Perfetto)")
+    return 0
+
+
+def _export_delta(modulo, records, args):
+    """Escribe solo las filas nuevas o modificadas desde la ejecución anterior"""
+    from comun.delta import DeltaState, write_delta
+    
+    if args.delta_estado:
+        state = DeltaState(args.delta_estado)
+    else:
+        state = DeltaState.for_inputs(modulo.nombre, args.entradas)
+    primera = not state.entries
+    changed, removed, moved, entries = state.compare(records, modulo.campos)
+    write_delta(changed, removed, args.delta, modulo)
+    state.save(entries)
+    
+    nuevos = sum(1 for cambio, _ in changed if cambio == 'nuevo')
+    _log(
+        f"Delta{' (primera ejecución)' if primera else ''}: {nuevos} nuevos, "
+        f"{len(changed) - nuevos} modificados, {len(removed)} eliminados, "
+        f"{len(moved)} movidos, {len(records) - len(changed) - len(moved)} sin cambios "
+        f"-> {args.delta}"
+    )
+    for anterior, actual in moved:
+        _log(f"  Movido: {anterior} -> {actual}")
+
+
+def _process_in_pool(modulo, pdf_files, journal, args, collector, tracer, prefetch=None):
+    """Procesa el lote en procesos trabajadores vigilados (tiempo máximo por documento)
+    
+    Retorna (registros, estadísticas del prefetch o None).
+    """
+    from comun.autotune import initial_workers
+    from comun.scheduler import DEFAULT_TIMEOUTS, JobScheduler
+    
+    autoajuste = getattr(args, 'autoajuste', False)
+    timeout = args.timeout_doc or DEFAULT_TIMEOUTS.get(modulo.nombre)
+    if args.workers:
+        pool_size = args.workers
+    else:
+        pool_size = initial_workers(modulo.nombre) if autoajuste else 1
+    memoria_max = getattr(args, 'memoria_max', None)
+    scheduler = JobScheduler(
+        pool_size=pool_size,
+        timeouts={modulo.nombre: timeout},
+        limits={},
+        memory_limit=int(memoria_max * 1024 * 1024) if memoria_max is not None else None
+    )
+    tuner = None
+    try:
+        options = {'perfil_ocr': args.perfil_ocr} if args.perfil_ocr else None
+        job = scheduler.submit_batch(
+            modulo.nombre, pdf_files, journal=journal, collector=collector, tracer=tracer,
+            options=options, prefetch=prefetch
+        )
+        if autoajuste:
+            _log(f"Ajuste automático: empezando con {pool_size} trabajadores")
+            tuner = scheduler.autotune(modulo.nombre)
+        job.wait()
+    finally:
+        if tuner is not None:
+            best = tuner.stop()
+            if best:
+                _log(
+                    f"Ajuste automático: {best['workers']} trabajadores "
+                    f"({best['archivos_por_s']:.2f} archivos/s; medidos: "
+                    + ', '.join(f"{n}={r:.2f}" for n, r in sorted(tuner.rates.items()))
+                    + ") guardado para este equipo"
+                )
+            else:
+                _log("Ajuste automático: el lote fue demasiado corto para medir")
+        waits = scheduler.memory_waits()
+        scheduler.shutdown()
+    if waits:
+        _log(
+            f"Control de memoria: {waits} despachos postergados por falta de memoria "
+            f"(techo {scheduler.memory_limit / 2**20:.0f} MB)"
+        )
+    records = RecordStore.for_modulo(modulo.nombre, job.records(), job.sources())
+    return records, job.prefetch_stats()
+
+
+def cmd_analizar(args):
+    """Análisis previo de un lote: páginas, archivos dañados y tiempo estimado de OCR"""
+    from comun.preflight import format_duration, run_preflight
+    
+    modulo = get_modulo(args.modulo)
+    model_class = modulo.model_class()
+    pdf_files = list(iter_pdf_paths(args.entradas))
+    report = run_preflight(
+        pdf_files,
+        getattr(model_class, 'PAGES_TO_READ', 2),
+        getattr(model_class, 'MIN_TEXT_CHARS', 50),
+        workers=args.workers
+    )
+    
+    print(f"Archivos: {len(report.probes)} ({report.total_bytes / 1e6:.1f} MB, "
+          f"{report.total_pages} páginas)")
+    print(f"Páginas que requieren OCR: {report.ocr_pages}")
+    if report.ocr_pages:
+        seconds, measured = report.estimate_seconds(
+            modulo.nombre, args.workers_ocr, perfil=args.perfil_ocr
+        )
+        origen = "rendimiento medido" if measured else "estimación inicial"
+        print(f"Tiempo estimado de OCR: {format_duration(seconds)} "
+              f"con {args.workers_ocr} trabajador(es) ({origen})")
+    for ruta, error in report.rejected:
+        print(f"RECHAZADO {ruta}: {error}")
+    return 1 if report.rejected else 0
+
+
+def cmd_reparsear(args):
+    """Vuelve a aplicar los parsers de campos sobre el texto archivado"""
+    from comun.text_archive import TextArchive, reparse_archive
+    
+    modulo = get_modulo(args.modulo)
+    archive = TextArchive(args.archivo_textos)
+    inicio = time.perf_counter()
+    try:
+        records = reparse_archive(archive, modulo.nombre, workers=args.workers)
+    finally:
+        archive.close()
+    
+    write_records(records, args.salida, modulo)
+    _log(
+        f"Reparseados {len(records)} documentos "
+        f"en {time.perf_counter() - inicio:.1f} s -> {args.salida}"
+    )
+    return 0
+
+
+def cmd_mixto(args):
+    """Procesa documentos de varios tipos juntos: detecta el módulo de cada uno"""
+    from comun.classify import route_files
+    
+    dedup = DedupIndex()
+    pdf_files = [pdf for pdf in iter_pdf_paths(args.entradas) if dedup.add(pdf)]
+    inicio = time.perf_counter()
+    routed, unclassified = route_files(pdf_files, workers=args.workers, ocr=not args.sin_ocr)
+    resumen = ', '.join(f"{nombre}: {len(files)}" for nombre, files in routed.items())
+    _log(
+        f"Clasificados {len(pdf_files)} archivos en {time.perf_counter() - inicio:.1f} s "
+        f"({resumen or 'ninguno reconocido'}; sin clasificar: {len(unclassified)})"
+    )
+    
+    salida_dir = Path(args.salida_dir)
+    for nombre, files in routed.items():
+        modulo = get_modulo(nombre)
+        inicio = time.perf_counter()
+        if args.workers is not None or args.timeout_doc is not None:
+            records, _ = _process_in_pool(modulo, files, None, args, None, None)
+        else:
+            model = modulo.create_model()
+            if args.perfil_ocr and hasattr(model, 'set_ocr_profile'):
+                model.set_ocr_profile(args.perfil_ocr)
+            model.add_pdf_files(files)
+            records = model.process_all_pdfs()
+        salida = salida_dir / f"{Path(modulo.archivo_excel).stem}.{args.formato}"
+        write_records(records, salida, modulo)
+        _log(
+            f"[{nombre}] {len(records)} archivos "
+            f"en {time.perf_counter() - inicio:.1f} s -> {salida}"
+        )
+    
+    if unclassified:
+        salida = salida_dir / 'sin_clasificar.csv'
+        salida_dir.mkdir(parents=True, exist_ok=True)
+        with open(salida, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(['archivo', 'motivo'])
+            writer.writerows(unclassified)
+        _log(f"{len(unclassified)} archivos sin clasificar -> {salida}")
+    return 0
+
+
+def cmd_evaluar(args):
+    """Mide precisión/recall y velocidad de una o más configuraciones sobre un corpus etiquetado"""
+    import json
+    from comun.evaluation import (
+        check_options, evaluate, find_regressions, format_results, load_labels, mark_pareto,
+        parse_config
+    )
+    
+    labels = load_labels(args.etiquetas)
+    # Antes de evaluar: un error en la última configuración no espera a las anteriores
+    try:
+        configs = [parse_config(value) for value in args.config] or [('defecto', {})]
+        for nombre, options in configs:
+            check_options(args.modulo, options)
+    except ValueError as e:
+        _log(str(e))
+        return 2
+    results = []
+    for nombre, options in configs:
+        _log(f"Evaluando '{nombre}' sobre {len(labels)} archivos...")
+        results.append(evaluate(args.modulo, labels, nombre, options))
+    mark_pareto(results)
+    print(format_results(results))
+    
+    if args.salida:
+        with open(args.salida, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        _log(f"Resultados guardados en {args.salida}")
+    
+    if args.base:
+        with open(args.base, 'r', encoding='utf-8') as f:
+            regressions = find_regressions(results, json.load(f), args.tolerancia)
+        for nombre, campo, metric, antes, ahora in regressions:
+            _log(f"REGRESIÓN {nombre} / {campo}: {metric} {antes:.3f} -> {ahora:.3f}")
+        if regressions:
+            return 1
+    return 0
+
+
+def cmd_perfiles_ocr(args):
+    """Lista los perfiles de OCR con su configuración y rendimiento medido"""
+    from comun.ocr_profiles import DEFAULT_PROFILE, PROFILES
+    from comun.preflight import load_profile_rates
+    
+    rates = load_profile_rates()
+    for nombre, profile in PROFILES.items():
+        medido = f"{rates[nombre]:.2f} págs/s por trabajador" if nombre in rates else "sin mediciones"
+        defecto = " (por defecto)" if nombre == DEFAULT_PROFILE else ""
+        print(f"{nombre}{defecto}: {profile.dpi} DPI, {profile.config()}, "
+              f"modelo {profile.modelo or 'instalado'}, {'gris' if profile.gris else 'color'}"
+              f"{', autocontraste' if profile.autocontraste else ''} - {medido}")
+    return 0
+
+
+def _parse_carpeta(value):
+    """Convierte 'modulo=ruta' en (modulo, ruta); 'auto' detecta el tipo de cada archivo"""
+    from comun.watch import AUTO
+    
+    nombre, sep, ruta = value.partition('=')
+    if not sep or (nombre not in MODULOS and nombre != AUTO):
+        raise argparse.ArgumentTypeError(
+            f"Use MODULO=CARPETA con MODULO en: {', '.join(list(MODULOS) + [AUTO])}"
+        )
+    return nombre, ruta
+
+
+def cmd_vigilar(args):
+    """Vigila carpetas y extrae los PDFs nuevos a medida que llegan"""
+    from comun.watch import FolderWatcher
+    
+    estado = args.estado or str(Path(args.salida_dir) / '.vigilancia_estado.json')
+    watcher = FolderWatcher(
+        args.carpeta,
+        args.salida_dir,
+        estado,
+        formato=args.formato,
+        poll_interval=args.intervalo,
+        settle_seconds=args.espera,
+        log=_log
+    )
+    for modulo, ruta in args.carpeta:
+        _log(f"Vigilando {ruta} ({modulo})")
+    try:
+        watcher.run()
+    except KeyboardInterrupt:
+        _log("Vigilancia detenida")
+    return 0
+
+
+def cmd_servir(args):
+    """Inicia el servicio HTTP local de extracción"""
+    from comun.server import serve
+    
+    serve(
+        port=args.puerto,
+        workers=args.workers,
+        modulos=args.modulos,
+        max_pending=args.max_espera,
+        timeout=args.timeout_doc,
+        verbose=args.verbose,
+        log=_log
+    )
+    return 0
+
+
+def cmd_cola(args):
+    """Cola de trabajo compartida para repartir un lote entre varias máquinas"""
+    from comun.work_queue import WorkQueue, run_local_workers, run_worker
+    
+    if args.accion == 'crear':
+        dedup = DedupIndex()
+        pdf_files = [pdf for pdf in iter_pdf_paths(args.entradas) if dedup.add(pdf)]
+        queue = WorkQueue(args.db)
+        items = queue.create(args.modulo, pdf_files, args.tamano_item)
+        queue.close()
+        _log(f"Cola creada con {items} ítems en {args.db}")
+    elif args.accion == 'trabajar':
+        if args.procesos > 1:
+            run_local_workers(args.db, args.procesos, args.arriendo, log=_log)
+        else:
+            processed = run_worker(args.db, args.arriendo, log=_log)
+            _log(f"Trabajador terminado: {processed} archivos")
+    elif args.accion == 'estado':
+        queue = WorkQueue(args.db)
+        for estado, cantidad in sorted(queue.status().items()):
+            print(f"{estado}: {cantidad}")
+        queue.close()
+    elif args.accion == 'unir':
+        modulo = get_modulo(args.modulo)
+        queue = WorkQueue(args.db)
+        if queue.has_unfinished():
+            _log("Aviso: la cola todavía tiene ítems pendientes o en curso")
+        records = queue.merged_results(modulo.nombre)
+        failed = queue.failed_files()
+        queue.close()
+        write_records(records, args.salida, modulo)
+        _log(f"Unidos {len(records)} registros -> {args.salida}")
+        if failed:
+            _log(f"{len(failed)} archivos quedaron en ítems fallidos")
+    return 0
+
+
+def cmd_reporte_inicio(args):
+    """Muestra el último reporte de arranque y mide los imports pesados"""
+    from comun.startup import HEAVY_IMPORTS, StartupReport, format_report, load_last_report
+    
+    report = load_last_report()
+    if report:
+        print("Último arranque de la interfaz:")
+        print(format_report(report))
+    else:
+        print("Todavía no hay un reporte de arranque guardado")
+    
+    # Este proceso no cargó ningún módulo pesado: la medición es en frío
+    startup = StartupReport(time.perf_counter())
+    for grupo in HEAVY_IMPORTS:
+        inicio = time.perf_counter()
+        startup.import_group(grupo)
+        startup.mark(f"grupo_{grupo}")
+        print(f"Carga del grupo '{grupo}': {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    print(format_report(startup.as_dict()))
+    return 0
+
+
+def build_parser():
+    """Construye el parser de argumentos del modo consola"""
+    parser = argparse.ArgumentParser(
+        prog='extractor',
+        description='Sistema de Extracción de Datos PDF (modo consola)'
+    )
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    
+    # procesar: extracción por lotes
+    procesar = subparsers.add_parser('procesar', help='Procesa PDFs sin interfaz gráfica')
+    procesar.add_argument('modulo', choices=list(MODULOS))
+    procesar.add_argument('entradas', nargs='+', help='Archivos PDF o carpetas')
+    procesar.add_argument('-o', '--salida', help='Archivo .xlsx, .csv o .jsonl')
+    procesar.add_argument(
+        '--delta', metavar='ARCHIVO',
+        help='Escribe en un .csv o .jsonl solo las filas nuevas, modificadas o '
+             'eliminadas desde la ejecución anterior con las mismas entradas'
+    )
+    procesar.add_argument(
+        '--delta-estado', metavar='ARCHIVO.json',
+        help='Estado de la ejecución anterior (por defecto uno por módulo y entradas)'
+    )
+    procesar.add_argument(
+        '--archivar-texto', metavar='DB',
+        help='Guarda el texto crudo/OCR comprimido para poder reparsear después'
+    )
+    procesar.add_argument(
+        '--diario', metavar='ARCHIVO',
+        help='Diario de progreso (por defecto uno por lote en la carpeta de datos)'
+    )
+    procesar.add_argument(
+        '--reanudar', action='store_true',
+        help='Continúa un lote interrumpido omitiendo los archivos ya completados'
+    )
+    procesar.add_argument(
+        '--desde-cero', action='store_true',
+        help='Descarta el diario de un lote interrumpido y procesa todo'
+    )
+    procesar.add_argument(
+        '--dedup-contenido', action='store_true',
+        help='Omite también copias del mismo PDF con otro nombre o carpeta'
+    )
+    procesar.add_argument(
+        '--metricas', metavar='ARCHIVO.json',
+        help='Mide cada etapa (apertura, texto, render, OCR, regex, guardado) y guarda el resumen'
+    )
+    procesar.add_argument(
+        '--traza', metavar='ARCHIVO.json',
+        help='Guarda una traza de Chrome con un intervalo por archivo y por etapa'
+    )
+    procesar.add_argument(
+        '--pipeline', action='store_true',
+        help='Render de páginas en otro proceso (memoria compartida) en paralelo con el OCR'
+    )
+    procesar.add_argument(
+        '--perfil-ocr', choices=list(PROFILES), default=None,
+        help='Perfil de OCR (transegen): rapido, equilibrado (por defecto) o mejor'
+    )
+    procesar.add_argument(
+        '--prefetch-mb', type=float, default=None, metavar='MB',
+        help='Lee los próximos PDFs a memoria en paralelo (p. ej. desde una carpeta de red) '
+             'sin superar estos MB; informa la espera de E/S frente al cómputo'
+    )
+    procesar.add_argument(
+        '--dividir', action='store_true',
+        help='Divide los PDFs con varias resoluciones escaneadas juntas (transegen): una fila '
+             'por resolución con su rango de páginas, procesadas en paralelo (--workers)'
+    )
+    procesar.add_argument(
+        '--timeout-doc', type=float, default=None, metavar='SEG',
+        help='Procesa en trabajadores vigilados: un documento que supera este tiempo '
+             'se registra como error y el lote continúa'
+    )
+    procesar.add_argument(
+        '--workers', type=int, default=None,
+        help='Procesos trabajadores (implica el vigilante de tiempo por documento)'
+    )
+    procesar.add_argument(
+        '--memoria-max', type=float, default=None, metavar='MB',
+        help='Techo de memoria de los trabajadores: un documento empieza solo si su memoria '
+             f'estimada entra (por defecto {ENV_MAX_RSS} o el 70%% de la RAM; 0 lo desactiva)'
+    )
+    procesar.add_argument(
+        '--autoajuste', action='store_true',
+        help='Ajusta los trabajadores durante el lote según archivos/s y uso de CPU, '
+             'y guarda el mejor ajuste para este equipo y módulo'
+    )
+    procesar.set_defaults(func=cmd_procesar)
+    
+    # analizar: revisión rápida antes de un lote grande
+    analizar = subparsers.add_parser(
+        'analizar', aliases=['preflight'],
+        help='Revisa un lote sin procesarlo (páginas, dañados, tiempo estimado)'
+    )
+    analizar.add_argument('modulo', choices=list(MODULOS))
+    analizar.add_argument('entradas', nargs='+', help='Archivos PDF o carpetas')
+    analizar.add_argument('--workers', type=int, default=None, help='Procesos para el análisis')
+    analizar.add_argument(
+        '--workers-ocr', type=int, default=1,
+        help='Trabajadores de OCR con los que se estima el tiempo'
+    )
+    analizar.add_argument(
+        '--perfil-ocr', choices=list(PROFILES), default=None,
+        help='Estima con el rendimiento medido de este perfil de OCR'
+    )
+    analizar.set_defaults(func=cmd_analizar)
+    
+    # mixto: lote con documentos de varios tipos
+    mixto = subparsers.add_parser(
+        'mixto', aliases=['auto'],
+        help='Detecta el tipo de cada PDF y escribe una salida por módulo'
+    )
+    mixto.add_argument('entradas', nargs='+', help='Archivos PDF o carpetas')
+    mixto.add_argument('--salida-dir', required=True, help='Carpeta de los archivos de salida')
+    mixto.add_argument('--formato', choices=['xlsx', 'csv', 'jsonl'], default='xlsx')
+    mixto.add_argument(
+        '--sin-ocr', action='store_true',
+        help='No hace OCR del encabezado de los escaneados (quedan sin clasificar)'
+    )
+    mixto.add_argument(
+        '--perfil-ocr', choices=list(PROFILES), default=None,
+        help='Perfil de OCR para los documentos escaneados'
+    )
+    mixto.add_argument('--workers', type=int, default=None, help='Procesos trabajadores')
+    mixto.add_argument(
+        '--timeout-doc', type=float, default=None, metavar='SEG',
+        help='Tiempo máximo por documento (procesa en trabajadores vigilados)'
+    )
+    mixto.set_defaults(func=cmd_mixto)
+    
+    # evaluar: calidad y velocidad sobre un corpus etiquetado
+    evaluar = subparsers.add_parser(
+        'evaluar', aliases=['eval'],
+        help='Precisión/recall por campo y velocidad de cada configuración sobre un corpus etiquetado'
+    )
+    evaluar.add_argument('modulo', choices=list(MODULOS))
+    evaluar.add_argument(
+        'etiquetas', help="Archivo .csv o .jsonl con 'archivo' y el valor correcto de cada campo"
+    )
+    evaluar.add_argument(
+        '--config', action='append', default=[], metavar='NOMBRE:CLAVE=VALOR,...',
+        help='Configuración a comparar, p. ej. rapido:perfil_ocr=rapido (repetible)'
+    )
+    evaluar.add_argument('-o', '--salida', metavar='ARCHIVO.json', help='Guarda los resultados')
+    evaluar.add_argument(
+        '--base', metavar='ARCHIVO.json',
+        help='Resultados anteriores: termina con código 1 si baja la precisión o el recall'
+    )
+    evaluar.add_argument(
+        '--tolerancia', type=float, default=0.01,
+        help='Baja máxima permitida frente a --base (por defecto 0.01)'
+    )
+    evaluar.set_defaults(func=cmd_evaluar)
+    
+    # perfiles-ocr: configuración y rendimiento medido de cada perfil
+    perfiles = subparsers.add_parser(
+        'perfiles-ocr', help='Lista los perfiles de OCR y sus páginas por segundo medidas'
+    )
+    perfiles.set_defaults(func=cmd_perfiles_ocr)
+    
+    # reparsear: aplica los parsers sobre el texto archivado
+    reparsear = subparsers.add_parser(
+        'reparsear', aliases=['reparse'],
+        help='Reaplica los parsers de campos sobre el texto archivado (sin PDFs ni OCR)'
+    )
+    reparsear.add_argument('modulo', choices=list(MODULOS))
+    reparsear.add_argument('archivo_textos', help='Archivo creado con --archivar-texto')
+    reparsear.add_argument('-o', '--salida', required=True, help='Archivo .xlsx, .csv o .jsonl')
+    reparsear.add_argument('--workers', type=int, default=None, help='Procesos a usar')
+    reparsear.set_defaults(func=cmd_reparsear)
+    
+    # vigilar: extracción continua de carpetas compartidas
+    vigilar = subparsers.add_parser(
+        'vigilar', aliases=['watch'],
+        help='Vigila carpetas y extrae los PDFs nuevos a medida que llegan'
+    )
+    vigilar.add_argument(
+        '--carpeta', action='append', required=True, type=_parse_carpeta,
+        metavar='MODULO=CARPETA',
+        help="Carpeta a vigilar y módulo que la procesa, o 'auto' para detectarlo (repetible)"
+    )
+    vigilar.add_argument('--salida-dir', required=True, help='Carpeta de los archivos de salida')
+    vigilar.add_argument('--formato', choices=['jsonl', 'csv'], default='jsonl')
+    vigilar.add_argument(
+        '--estado', help='Archivo de estado (por defecto dentro de --salida-dir)'
+    )
+    vigilar.add_argument(
+        '--intervalo', type=float, default=1.0, help='Segundos entre revisiones'
+    )
+    vigilar.add_argument(
+        '--espera', type=float, default=2.0,
+        help='Segundos que un archivo debe quedar sin cambios antes de procesarlo'
+    )
+    vigilar.set_defaults(func=cmd_vigilar)
+    
+    # servir: servicio HTTP local (solo 127.0.0.1)
+    servir = subparsers.add_parser(
+        'servir', aliases=['serve'],
+        help='Servicio HTTP local que retorna los registros en JSON'
+    )
+    servir.add_argument('--puerto', type=int, default=8765)
+    servir.add_argument('--workers', type=int, default=None, help='Procesos trabajadores')
+    servir.add_argument(
+        '--modulos', nargs='+', choices=list(MODULOS), default=None,
+        help='Módulos a precargar en los trabajadores (por defecto todos)'
+    )
+    servir.add_argument(
+        '--max-espera', type=int, default=256,
+        help='Documentos en cola antes de responder 503 (contrapresión)'
+    )
+    servir.add_argument(
+        '--timeout-doc', type=float, default=None, metavar='SEG',
+        help='Tiempo máximo por documento; el trabajador colgado se reemplaza'
+    )
+    servir.add_argument('--verbose', action='store_true', help='Registra cada solicitud')
+    servir.set_defaults(func=cmd_servir)
+    
+    # cola: lote repartido entre varios procesos o máquinas
+    cola = subparsers.add_parser(
+        'cola', aliases=['queue'],
+        help='Cola de trabajo compartida (SQLite) para lotes en varias máquinas'
+    )
+    cola_sub = cola.add_subparsers(dest='accion', required=True)
+    cola_crear = cola_sub.add_parser('crear', help='Divide las entradas en ítems de trabajo')
+    cola_crear.add_argument('db', help='Archivo de la cola (en una carpeta compartida)')
+    cola_crear.add_argument('modulo', choices=list(MODULOS))
+    cola_crear.add_argument('entradas', nargs='+', help='Archivos PDF o carpetas')
+    cola_crear.add_argument('--tamano-item', type=int, default=20, help='Archivos por ítem')
+    cola_trabajar = cola_sub.add_parser('trabajar', help='Procesa ítems hasta vaciar la cola')
+    cola_trabajar.add_argument('db')
+    cola_trabajar.add_argument('--procesos', type=int, default=1, help='Trabajadores en esta máquina')
+    cola_trabajar.add_argument(
+        '--arriendo', type=float, default=300,
+        help='Segundos sin renovación tras los que otro trabajador reclama el ítem'
+    )
+    cola_estado = cola_sub.add_parser('estado', help='Muestra el avance de la cola')
+    cola_estado.add_argument('db')
+    cola_unir = cola_sub.add_parser('unir', help='Une los resultados en un archivo de salida')
+    cola_unir.add_argument('db')
+    cola_unir.add_argument('modulo', choices=list(MODULOS))
+    cola_unir.add_argument('-o', '--salida', required=True, help='Archivo .xlsx, .csv o .jsonl')
+    cola.set_defaults(func=cmd_cola)
+    
+    # reporte-inicio: tiempos de arranque e imports
+    reporte = subparsers.add_parser(
+        'reporte-inicio', aliases=['startup-report'],
+        help='Muestra el tiempo hasta la primera ventana y el costo de cada import'
+    )
+    reporte.set_defaults(func=cmd_reporte_inicio)
+    
+    return parser
+
+
+def run_cli(argv=None):
+    """Punto de entrada del modo consola"""
+    args = build_parser().parse_args(argv)
+    return args.func(args)
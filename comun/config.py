@@ -0,0 +1,13 @@
+import os
+from pathlib import Path
+
+
+def app_dir(*parts):
+    """Retorna (y crea) una carpeta dentro del directorio de datos de la aplicación
+    
+    Por defecto es ~/.extractor_pdf; se puede cambiar con EXTRACTOR_PDF_HOME.
+    """
+    base = Path(os.environ.get('EXTRACTOR_PDF_HOME', Path.home() / '.extractor_pdf'))
+    path = base.joinpath(*parts)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
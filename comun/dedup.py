@@ -0,0 +1,80 @@
+import hashlib
+import os
+
+
+def normalize_path(pdf_path):
+    """Normaliza una ruta para comparar (absoluta, sin '..', mayúsculas en Windows)"""
+    return os.path.normcase(os.path.abspath(str(pdf_path)))
+
+
+def content_hash(pdf_path, chunk_size=1024 * 1024):
+    """Retorna el SHA-1 del contenido de un archivo"""
+    digest = hashlib.sha1()
+    with open(pdf_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DedupIndex:
+    """Índice para omitir archivos repetidos al agregarlos a un lote
+    
+    Siempre compara por ruta normalizada (O(1) por archivo). Con
+    `by_content=True` también detecta copias con otro nombre: solo se calcula
+    el hash de los archivos cuyo tamaño coincide con el de otro ya agregado.
+    """
+    
+    def __init__(self, by_content=False):
+        self.by_content = by_content
+        self._paths = set()
+        # tamaño -> rutas aún sin hash con ese tamaño
+        self._unhashed_by_size = {}
+        self._hashes = set()
+        self._hashed_sizes = set()
+    
+    def add(self, pdf_path):
+        """Registra un archivo; retorna False si es un duplicado"""
+        key = normalize_path(pdf_path)
+        if key in self._paths:
+            return False
+        if self.by_content and not self._add_content(pdf_path):
+            return False
+        self._paths.add(key)
+        return True
+    
+    def _add_content(self, pdf_path):
+        """Compara por contenido; retorna False si ya hay una copia"""
+        try:
+            size = os.path.getsize(pdf_path)
+        except OSError:
+            # No es un archivo local (p. ej. miembro de un ZIP): solo ruta
+            return True
+        
+        if size not in self._hashed_sizes and size not in self._unhashed_by_size:
+            # Primer archivo con este tamaño: no hace falta leerlo todavía
+            self._unhashed_by_size[size] = [pdf_path]
+            return True
+        
+        # Tamaño repetido: calcular los hashes pendientes de ese tamaño
+        for other in self._unhashed_by_size.pop(size, []):
+            try:
+                self._hashes.add(content_hash(other))
+            except OSError:
+                pass
+        self._hashed_sizes.add(size)
+        
+        try:
+            digest = content_hash(pdf_path)
+        except OSError:
+            return True
+        if digest in self._hashes:
+            return False
+        self._hashes.add(digest)
+        return True
+    
+    def clear(self):
+        """Vacía el índice"""
+        self._paths.clear()
+        self._unhashed_by_size.clear()
+        self._hashes.clear()
+        self._hashed_sizes.clear()
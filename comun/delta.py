@@ -0,0 +1,160 @@
+import csv
+import hashlib
+import json
+import os
+from pathlib import Path
+
+from comun import archives
+from comun.config import app_dir
+from comun.dedup import content_hash, normalize_path
+from comun.export import _rows
+
+
+# Valores de la columna 'cambio' del archivo delta
+NUEVO = 'nuevo'
+MODIFICADO = 'modificado'
+ELIMINADO = 'eliminado'
+
+
+def source_key(pdf_path):
+    """Clave estable de un PDF (ruta normalizada; para miembros, la del ZIP/TAR)"""
+    parts = archives.split_member(pdf_path)
+    if parts is None:
+        return normalize_path(pdf_path)
+    archive, member = parts
+    return f"{normalize_path(archive)}{archives.SEPARATOR}{member}"
+
+
+def source_signature(pdf_path):
+    """(mtime_ns, tamaño) del PDF; para un miembro, fecha del archivo comprimido y tamaño del miembro"""
+    pdf_path = archives.split_pages(pdf_path)[0]
+    parts = archives.split_member(pdf_path)
+    if parts is None:
+        st = os.stat(pdf_path)
+        return [st.st_mtime_ns, st.st_size]
+    return [os.stat(parts[0]).st_mtime_ns, archives.member_size(pdf_path)]
+
+
+def source_hash(pdf_path):
+    """SHA-1 del contenido del PDF (o del miembro del ZIP/TAR)"""
+    pdf_path = archives.split_pages(pdf_path)[0]
+    if archives.is_member(pdf_path):
+        return hashlib.sha1(archives.read_member(pdf_path)).hexdigest()
+    return content_hash(pdf_path)
+
+
+def record_digest(row):
+    """SHA-1 de los campos y el error de una fila (sin el nombre de archivo)"""
+    return hashlib.sha1(
+        json.dumps(row[1:], ensure_ascii=False).encode('utf-8')
+    ).hexdigest()
+
+
+class DeltaState:
+    """Resultado guardado de la ejecución anterior de un lote, para exportar solo cambios
+    
+    Es un JSON {clave del PDF: [mtime_ns, tamaño, sha1 del PDF, sha1 del
+    registro, archivo]}. El hash del PDF solo se recalcula si cambió su
+    fecha o tamaño, así una ejecución sin cambios no vuelve a leer el corpus.
+    """
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+    
+    @classmethod
+    def for_inputs(cls, modulo_nombre, entradas):
+        """Estado por defecto: uno por módulo y conjunto de entradas (archivos o carpetas)"""
+        digest = hashlib.sha1()
+        for entrada in sorted(normalize_path(e) for e in entradas):
+            digest.update(entrada.encode('utf-8') + b'\0')
+        return cls(app_dir('delta') / f"{modulo_nombre}-{digest.hexdigest()[:16]}.json")
+    
+    def compare(self, records, campos):
+        """Compara los registros (RecordStore con rutas) con la ejecución anterior
+        
+        Retorna (filas nuevas o modificadas como (cambio, fila), eliminados
+        como [archivo], movidos como [(archivo anterior, archivo actual)],
+        entradas del nuevo estado). Un PDF que solo cambió de nombre o
+        carpeta (mismo contenido y mismo registro) cuenta como movido y no
+        se exporta.
+        """
+        previous = self.entries
+        entries = {}
+        changed = []
+        added = []
+        # Las resoluciones de un mismo PDF dividido (comun.split) comparten su hash
+        hashes = {}
+        for pdf_path, row in zip(records.sources, _rows(records, campos)):
+            key = source_key(pdf_path)
+            digest = record_digest(row)
+            try:
+                signature = source_signature(pdf_path)
+            except OSError:
+                signature = [None, None]
+            old = previous.get(key)
+            if old is not None and old[:2] == signature:
+                sha1 = old[2]
+            else:
+                base = archives.split_pages(pdf_path)[0]
+                if base not in hashes:
+                    try:
+                        hashes[base] = source_hash(base)
+                    except OSError:
+                        hashes[base] = None
+                sha1 = hashes[base]
+            entries[key] = signature + [sha1, digest, row[0]]
+            if old is None:
+                added.append((key, row))
+            elif old[3] != digest:
+                changed.append((MODIFICADO, row))
+        
+        removed = {key: old for key, old in previous.items() if key not in entries}
+        # Renombrados: mismo contenido y mismo registro que un eliminado
+        by_content = {(old[2], old[3]): key for key, old in removed.items() if old[2]}
+        moved = []
+        for key, row in added:
+            old_key = by_content.pop((entries[key][2], entries[key][3]), None)
+            if old_key is not None:
+                moved.append((removed.pop(old_key)[4], row[0]))
+            else:
+                changed.append((NUEVO, row))
+        return changed, [old[4] for old in removed.values()], moved, entries
+    
+    def save(self, entries):
+        """Reemplaza el estado guardado (escritura atómica)"""
+        self.entries = entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, self.path)
+
+
+def write_delta(changed, removed, file_path, modulo):
+    """Escribe el archivo delta (.csv o .jsonl) con la columna 'cambio'
+    
+    Las filas nuevas y modificadas van completas; las eliminadas solo con el
+    nombre de archivo.
+    """
+    file_path = Path(file_path)
+    suffix = file_path.suffix.lower()
+    keys = ['cambio', 'archivo'] + modulo.campos + ['error']
+    rows = [(cambio,) + tuple(row) for cambio, row in changed]
+    rows.extend((ELIMINADO, archivo) for archivo in removed)
+    file_path.parent.mkdir(parents=True, exist_ok=True)
+    if suffix == '.csv':
+        with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+            writer = csv.writer(f)
+            writer.writerow(keys)
+            writer.writerows(rows)
+    elif suffix in ('.jsonl', '.json'):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(dict(zip(keys, row)), ensure_ascii=False) + '\n')
+    else:
+        raise ValueError(f"Formato de delta no soportado (use .csv o .jsonl): {suffix}")
+    return str(file_path)
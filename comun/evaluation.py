@@ -0,0 +1,185 @@
+import csv
+import json
+import time
+import unicodedata
+from pathlib import Path
+
+from comun.modulos import get_modulo
+from comun.ocr_profiles import get_profile
+from comun.workers import _cpu_seconds
+
+
+def normalize_value(value):
+    """Normaliza un valor para comparar (sin tildes, mayúsculas ni espacios extra)"""
+    value = unicodedata.normalize('NFKD', str(value or ''))
+    value = ''.join(c for c in value if not unicodedata.combining(c))
+    return ' '.join(value.casefold().split())
+
+
+def load_labels(path):
+    """Lee las etiquetas de un corpus (.csv o .jsonl) y retorna [(ruta, {campo: valor})]
+    
+    Cada fila tiene 'archivo' (ruta relativa a la carpeta del archivo de
+    etiquetas, o absoluta) y el valor correcto de cada campo del módulo.
+    """
+    path = Path(path)
+    if path.suffix.lower() == '.csv':
+        with open(path, 'r', newline='', encoding='utf-8-sig') as f:
+            rows = list(csv.DictReader(f))
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    labels = []
+    for row in rows:
+        archivo = Path(row.pop('archivo'))
+        if not archivo.is_absolute():
+            archivo = path.parent / archivo
+        labels.append((str(archivo), row))
+    return labels
+
+
+def parse_config(value):
+    """Convierte 'nombre:clave=valor,clave=valor' en (nombre, opciones)
+    
+    Las opciones se aplican con model.configure (p. ej. perfil_ocr=rapido);
+    'clave=valor' sin nombre usa el mismo texto como nombre.
+    """
+    nombre, sep, rest = value.partition(':')
+    if not sep:
+        rest = value if '=' in value else ''
+    options = {}
+    for item in filter(None, rest.split(',')):
+        key, sep, option = item.partition('=')
+        if not sep:
+            raise ValueError(f"Opción inválida (use clave=valor): {item}")
+        options[key.strip()] = option.strip()
+    return nombre, options
+
+
+def check_options(modulo_nombre, options, model=None):
+    """Verifica que el módulo acepte las opciones de una configuración (ValueError si no)
+    
+    Solo valen las claves de CONFIG_OPTIONS del modelo: una clave que
+    configure() ignoraría daría dos configuraciones iguales con distinto
+    nombre.
+    """
+    if not options:
+        return
+    if model is None:
+        model = get_modulo(modulo_nombre).create_model()
+    supported = getattr(model, 'CONFIG_OPTIONS', ())
+    if not supported:
+        raise ValueError(f"El módulo {modulo_nombre} no acepta opciones: {', '.join(options)}")
+    unknown = [key for key in options if key not in supported]
+    if unknown:
+        raise ValueError(
+            f"Opciones desconocidas para {modulo_nombre}: {', '.join(unknown)} "
+            f"(disponibles: {', '.join(supported)})"
+        )
+    if 'perfil_ocr' in options:
+        get_profile(options['perfil_ocr'])
+    hilos = str(options.get('hilos_ocr', '1'))
+    if not hilos.isdigit() or int(hilos) < 1:
+        raise ValueError(f"hilos_ocr debe ser un entero positivo: {options['hilos_ocr']}")
+
+
+def evaluate(modulo_nombre, labels, nombre='defecto', options=None):
+    """Procesa el corpus con una configuración y compara con las etiquetas
+    
+    Retorna un dict con la precisión, cobertura (recall) y F1 por campo,
+    archivos por segundo y segundos de CPU por archivo.
+    """
+    modulo = get_modulo(modulo_nombre)
+    model = modulo.create_model()
+    if options:
+        check_options(modulo_nombre, options, model)
+        model.configure(options)
+    model.warm_up()
+    
+    counts = {campo: {'correctos': 0, 'extraidos': 0, 'esperados': 0} for campo in modulo.campos}
+    errores = 0
+    inicio, cpu_inicio = time.perf_counter(), _cpu_seconds()
+    for pdf_path, expected in labels:
+        record = model.process_pdf(pdf_path) or {}
+        if 'error' in record:
+            errores += 1
+        for campo in modulo.campos:
+            if campo not in expected:
+                continue
+            got = normalize_value(record.get(campo))
+            want = normalize_value(expected[campo])
+            c = counts[campo]
+            c['extraidos'] += bool(got)
+            c['esperados'] += bool(want)
+            c['correctos'] += bool(got) and got == want
+    segundos = time.perf_counter() - inicio
+    cpu = _cpu_seconds() - cpu_inicio
+    
+    campos = {}
+    for campo, c in counts.items():
+        precision = c['correctos'] / c['extraidos'] if c['extraidos'] else 0.0
+        recall = c['correctos'] / c['esperados'] if c['esperados'] else 0.0
+        f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+        campos[campo] = dict(c, precision=round(precision, 4), recall=round(recall, 4), f1=round(f1, 4))
+    total = len(labels)
+    return {
+        'configuracion': nombre,
+        'opciones': options or {},
+        'archivos': total,
+        'errores': errores,
+        'segundos': round(segundos, 3),
+        'archivos_por_s': round(total / segundos, 3) if segundos else 0.0,
+        'cpu_s_por_archivo': round(cpu / total, 4) if total else 0.0,
+        'f1_medio': round(sum(c['f1'] for c in campos.values()) / len(campos), 4) if campos else 0.0,
+        'campos': campos,
+    }
+
+
+def mark_pareto(results):
+    """Marca las configuraciones no dominadas en F1 medio y archivos por segundo"""
+    for r in results:
+        r['pareto'] = not any(
+            o is not r
+            and o['f1_medio'] >= r['f1_medio'] and o['archivos_por_s'] >= r['archivos_por_s']
+            and (o['f1_medio'] > r['f1_medio'] or o['archivos_por_s'] > r['archivos_por_s'])
+            for o in results
+        )
+    return results
+
+
+def find_regressions(results, baseline, tolerance=0.01):
+    """Compara con un resultado anterior: retorna los campos cuya precisión o recall bajó
+    
+    Se comparan las configuraciones con el mismo nombre; una baja mayor a
+    `tolerance` cuenta como regresión.
+    """
+    previous = {r['configuracion']: r for r in baseline}
+    regressions = []
+    for r in results:
+        base = previous.get(r['configuracion'])
+        if base is None:
+            continue
+        for campo, c in r['campos'].items():
+            base_c = base['campos'].get(campo)
+            if base_c is None:
+                continue
+            for metric in ('precision', 'recall'):
+                if c[metric] < base_c[metric] - tolerance:
+                    regressions.append((r['configuracion'], campo, metric, base_c[metric], c[metric]))
+    return regressions
+
+
+def format_results(results):
+    """Tabla de resultados para la consola"""
+    lines = [f"  {'Configuración':<20} {'arch/s':>8} {'CPU s/arch':>10} {'F1':>6} {'Pareto':>6}"]
+    for r in results:
+        lines.append(
+            f"  {r['configuracion']:<20} {r['archivos_por_s']:>8.2f} {r['cpu_s_por_archivo']:>10.3f} "
+            f"{r['f1_medio']:>6.3f} {'*' if r.get('pareto') else '':>6}"
+        )
+        for campo, c in r['campos'].items():
+            lines.append(
+                f"      {campo:<18} precisión {c['precision']:.3f}  recall {c['recall']:.3f}  "
+                f"({c['correctos']}/{c['esperados']})"
+            )
+    return '\n'.join(lines)
@@ -0,0 +1,117 @@
+import csv
+import json
+from pathlib import Path
+
+from comun import metrics
+from comun.records import RecordStore
+
+
+def write_excel(records, file_path, modulo):
+    """Crea el archivo Excel con los registros de un módulo"""
+    # openpyxl se importa aquí para no cargarlo hasta que se exporte
+    import openpyxl
+    from openpyxl.styles import Font, Alignment, PatternFill
+    from openpyxl.utils import get_column_letter
+    
+    file_path = Path(file_path)
+    if not file_path.parent.exists():
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+    
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = modulo.hoja
+    
+    # Estilos
+    header_fill = PatternFill(
+        start_color=modulo.color_encabezado,
+        end_color=modulo.color_encabezado,
+        fill_type="solid"
+    )
+    header_font = Font(bold=True, color="FFFFFF", size=12)
+    
+    # Encabezados
+    headers = ["N°"] + [encabezado for encabezado, _, _ in modulo.columnas]
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.fill = header_fill
+        cell.font = header_font
+        cell.alignment = Alignment(horizontal="center", vertical="center")
+    
+    # Datos
+    campos = modulo.campos
+    for i, row in enumerate(_rows(records, campos), 2):
+        ws.cell(row=i, column=1, value=i-1)
+        for col in range(2, len(campos) + 2):
+            ws.cell(row=i, column=col, value=row[col - 1])
+    
+    # Ajustar anchos
+    ws.column_dimensions['A'].width = 8
+    for col, (_, _, ancho) in enumerate(modulo.columnas, 2):
+        ws.column_dimensions[get_column_letter(col)].width = ancho
+    
+    # Guardar
+    with metrics.stage('excel.save') as st:
+        wb.save(str(file_path))
+        st.bytes = file_path.stat().st_size
+    return str(file_path)
+
+
+def _row(data, campos):
+    """Convierte un registro en una tupla (archivo, campos..., error)"""
+    return (data['archivo'], *[data[campo] for campo in campos], data.get('error', ''))
+
+
+def _rows(records, campos):
+    """Genera las tuplas de salida (directo de las columnas si es un RecordStore)"""
+    if isinstance(records, RecordStore):
+        return records.rows()
+    return (_row(data, campos) for data in records)
+
+
+def _write_csv(f, records, campos, header=True):
+    writer = csv.writer(f)
+    if header:
+        writer.writerow(['archivo'] + campos + ['error'])
+    writer.writerows(_rows(records, campos))
+
+
+def _write_jsonl(f, records, campos):
+    keys = ['archivo'] + campos + ['error']
+    for row in _rows(records, campos):
+        f.write(json.dumps(dict(zip(keys, row)), ensure_ascii=False) + '\n')
+
+
+def write_records(records, file_path, modulo):
+    """Exporta los registros según la extensión del archivo (.xlsx, .csv o .jsonl)"""
+    suffix = Path(file_path).suffix.lower()
+    if suffix == '.xlsx':
+        return write_excel(records, file_path, modulo)
+    
+    Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+    campos = modulo.campos
+    if suffix == '.csv':
+        with open(file_path, 'w', newline='', encoding='utf-8-sig') as f:
+            _write_csv(f, records, campos)
+    elif suffix in ('.jsonl', '.json'):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            _write_jsonl(f, records, campos)
+    else:
+        raise ValueError(f"Formato de salida no soportado: {suffix}")
+    return str(file_path)
+
+
+def append_records(records, file_path, modulo):
+    """Agrega registros al final de un archivo .csv o .jsonl (lo crea si no existe)"""
+    suffix = Path(file_path).suffix.lower()
+    Path(file_path).parent.mkdir(parents=True, exist_ok=True)
+    campos = modulo.campos
+    if suffix == '.csv':
+        is_new = not Path(file_path).exists() or Path(file_path).stat().st_size == 0
+        with open(file_path, 'a', newline='', encoding='utf-8-sig' if is_new else 'utf-8') as f:
+            _write_csv(f, records, campos, header=is_new)
+    elif suffix in ('.jsonl', '.json'):
+        with open(file_path, 'a', encoding='utf-8') as f:
+            _write_jsonl(f, records, campos)
+    else:
+        raise ValueError(f"Formato no soportado para agregar registros: {suffix}")
+    return str(file_path)
@@ -0,0 +1,98 @@
+import os
+import queue
+import threading
+from pathlib import Path
+
+from comun.archives import is_archive, list_members
+
+
+def walk_pdfs(root):
+    """Recorre una carpeta (y subcarpetas) entregando los PDFs a medida que aparecen
+    
+    Usa os.scandir, que no necesita un stat por archivo; el orden dentro de
+    cada carpeta es alfabético.
+    """
+    stack = [str(root)]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                entries = sorted(entries, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir():
+                    subdirs.append(entry.path)
+                elif entry.name.lower().endswith('.pdf'):
+                    yield entry.path
+            except OSError:
+                continue
+        # Recorrer las subcarpetas en orden alfabético
+        stack.extend(reversed(subdirs))
+
+
+def iter_pdf_paths(entradas):
+    """Expande archivos, carpetas y ZIP/TAR en la lista de rutas PDF a procesar"""
+    for entrada in entradas:
+        path = Path(entrada)
+        if path.is_dir():
+            yield from walk_pdfs(path)
+        elif is_archive(path) and path.is_file():
+            yield from list_members(path)
+        else:
+            yield str(path)
+
+
+class FolderScanner(threading.Thread):
+    """Recorre una carpeta en segundo plano y entrega los PDFs por bloques
+    
+    La interfaz llama a drain() periódicamente para agregar lo encontrado sin
+    esperar a que termine el recorrido.
+    """
+    
+    def __init__(self, root, chunk_size=500):
+        super().__init__(daemon=True)
+        self.root = root
+        self.chunk_size = chunk_size
+        self.found = 0
+        # Duplicados omitidos al agregar lo encontrado (lo cuenta el controlador)
+        self.skipped = 0
+        self._queue = queue.Queue()
+        self._cancelled = threading.Event()
+    
+    def run(self):
+        chunk = []
+        try:
+            for pdf_path in walk_pdfs(self.root):
+                if self._cancelled.is_set():
+                    break
+                chunk.append(pdf_path)
+                if len(chunk) >= self.chunk_size:
+                    self._queue.put(chunk)
+                    chunk = []
+        finally:
+            if chunk:
+                self._queue.put(chunk)
+            self._queue.put(None)
+    
+    def cancel(self):
+        """Detiene el recorrido"""
+        self._cancelled.set()
+    
+    def drain(self):
+        """Retorna (rutas encontradas desde la última llamada, terminó)"""
+        paths = []
+        finished = False
+        while True:
+            try:
+                chunk = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if chunk is None:
+                finished = True
+                break
+            paths.extend(chunk)
+        self.found += len(paths)
+        return paths, finished
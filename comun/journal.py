@@ -0,0 +1,109 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from comun.config import app_dir
+
+
+class BatchJournal:
+    """Diario append-only con el resultado de cada archivo completado de un lote
+    
+    Cada línea es un JSON {"ruta": ..., "registro": ...}. Se escribe al sistema
+    operativo apenas termina cada archivo y se hace fsync por lotes (cada
+    `fsync_every` registros o `fsync_interval` segundos), así una caída solo
+    pierde unos segundos de trabajo.
+    """
+    
+    def __init__(self, path, fsync_every=20, fsync_interval=2.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+    
+    @classmethod
+    def for_batch(cls, modulo_nombre, pdf_files, **kwargs):
+        """Crea el diario por defecto de un lote (mismo módulo y mismos archivos)"""
+        digest = hashlib.sha1()
+        for pdf_path in sorted(str(p) for p in pdf_files):
+            digest.update(pdf_path.encode('utf-8') + b'\0')
+        path = app_dir('diarios') / f"{modulo_nombre}-{digest.hexdigest()[:16]}.jsonl"
+        return cls(path, **kwargs)
+    
+    def exists(self):
+        """Verifica si el diario tiene registros de una ejecución anterior"""
+        return self.path.exists() and self.path.stat().st_size > 0
+    
+    def load(self):
+        """Retorna {ruta: registro} de los archivos ya completados
+        
+        Una última línea incompleta (caída durante la escritura) se ignora.
+        Los registros con error (tiempo agotado, trabajador caído, falla de
+        lectura) no cuentan como completados: al reanudar se reintentan.
+        """
+        done = {}
+        if not self.path.exists():
+            return done
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                registro = entry['registro']
+                if isinstance(registro, dict) and 'error' in registro:
+                    done.pop(entry['ruta'], None)
+                else:
+                    done[entry['ruta']] = registro
+        return done
+    
+    def record(self, pdf_path, data):
+        """Registra el resultado de un archivo completado"""
+        if self._file is None:
+            self._file = self._open_for_append()
+        line = json.dumps({'ruta': str(pdf_path), 'registro': data}, ensure_ascii=False)
+        self._file.write(line + '\n')
+        self._file.flush()
+        
+        self._unsynced += 1
+        now = time.monotonic()
+        if self._unsynced >= self.fsync_every or now - self._last_sync >= self.fsync_interval:
+            self.sync()
+    
+    def _open_for_append(self):
+        """Abre el diario para agregar, cerrando una línea que quedó incompleta"""
+        needs_newline = False
+        if self.path.exists() and self.path.stat().st_size > 0:
+            with open(self.path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                needs_newline = f.read(1) != b'\n'
+        f = open(self.path, 'a', encoding='utf-8')
+        if needs_newline:
+            f.write('\n')
+        return f
+    
+    def sync(self):
+        """Fuerza la escritura a disco de lo registrado"""
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+    
+    def close(self):
+        """Cierra el diario (conservándolo en disco)"""
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+    
+    def remove(self):
+        """Elimina el diario una vez que los resultados fueron exportados"""
+        self.close()
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
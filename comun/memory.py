@@ -0,0 +1,137 @@
+import os
+import sys
+
+from comun.ocr_profiles import DEFAULT_PROFILE, get_profile
+
+
+# Variable de entorno con el techo de memoria residente (MB) de la aplicación
+ENV_MAX_RSS = 'EXTRACTOR_PDF_MAX_RSS_MB'
+
+# Sin techo configurado se usa esta fracción de la memoria física
+DEFAULT_MEMORY_FRACTION = 0.7
+
+# Memoria de un trabajador con los modelos cargados, hasta que informe la real
+DEFAULT_WORKER_RSS = 150 * 1024 * 1024
+
+# Superficie de una página A4 en pulgadas cuadradas (8,27 x 11,69)
+PAGE_AREA_IN2 = 96.7
+
+# Copias simultáneas de una página dibujada durante el OCR: pixmap de
+# PyMuPDF, imagen de PIL, la del preprocesamiento y la de tesseract
+OCR_IMAGE_COPIES = 4
+
+# PyMuPDF mantiene el archivo y sus objetos ya interpretados
+DOCUMENT_OVERHEAD = 3
+
+# El texto extraído (y sus copias al buscar) no supera en general el
+# tamaño del PDF; se reserva esa cantidad para el texto
+TEXT_FACTOR = 1
+
+# Piso por tarea (intérprete, búferes de PyMuPDF)
+TASK_BASE_BYTES = 8 * 1024 * 1024
+
+
+def current_rss():
+    """Memoria residente de este proceso en bytes (None si no se puede medir)"""
+    if sys.platform == 'win32':
+        return _windows_rss()
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+        # Máximo histórico (en KB en Linux, en bytes en macOS): cota superior
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return maxrss if sys.platform == 'darwin' else maxrss * 1024
+    except (ImportError, OSError):
+        return None
+
+
+def _windows_rss():
+    import ctypes
+    from ctypes import wintypes
+    
+    class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+        _fields_ = [
+            ('cb', wintypes.DWORD),
+            ('PageFaultCount', wintypes.DWORD),
+            ('PeakWorkingSetSize', ctypes.c_size_t),
+            ('WorkingSetSize', ctypes.c_size_t),
+            ('QuotaPeakPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t),
+            ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+            ('PagefileUsage', ctypes.c_size_t),
+            ('PeakPagefileUsage', ctypes.c_size_t),
+        ]
+    
+    counters = PROCESS_MEMORY_COUNTERS()
+    counters.cb = ctypes.sizeof(counters)
+    try:
+        handle = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(
+                handle, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+    except (AttributeError, OSError):
+        pass
+    return None
+
+
+def physical_memory():
+    """Memoria física total en bytes (None si no se puede saber)"""
+    if sys.platform == 'win32':
+        import ctypes
+        
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ('dwLength', ctypes.c_ulong),
+                ('dwMemoryLoad', ctypes.c_ulong),
+                ('ullTotalPhys', ctypes.c_ulonglong),
+                ('ullAvailPhys', ctypes.c_ulonglong),
+                ('ullTotalPageFile', ctypes.c_ulonglong),
+                ('ullAvailPageFile', ctypes.c_ulonglong),
+                ('ullTotalVirtual', ctypes.c_ulonglong),
+                ('ullAvailVirtual', ctypes.c_ulonglong),
+                ('ullAvailExtendedVirtual', ctypes.c_ulonglong),
+            ]
+        
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(status)
+        try:
+            if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+                return status.ullTotalPhys
+        except (AttributeError, OSError):
+            pass
+        return None
+    try:
+        return os.sysconf('SC_PHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def default_memory_limit():
+    """Techo de memoria por defecto: el de la variable de entorno o una fracción de la RAM"""
+    value = os.environ.get(ENV_MAX_RSS)
+    if value:
+        return int(float(value) * 1024 * 1024)
+    total = physical_memory()
+    if total is None:
+        return None
+    return int(total * DEFAULT_MEMORY_FRACTION)
+
+
+def estimate_task_memory(modulo_nombre, file_bytes, options=None):
+    """Memoria estimada de procesar un documento (bytes, por encima del trabajador)
+    
+    Documento abierto (unas veces su tamaño) y texto extraído; con OCR,
+    además una página dibujada a la resolución del perfil (páginas x DPI²
+    como máximo de a una: las páginas se dibujan y liberan una por vez).
+    """
+    cost = TASK_BASE_BYTES + file_bytes * (DOCUMENT_OVERHEAD + TEXT_FACTOR)
+    if modulo_nombre == 'transegen':
+        profile = get_profile((options or {}).get('perfil_ocr') or DEFAULT_PROFILE)
+        channels = 1 if profile.gris else 3
+        cost += int(PAGE_AREA_IN2 * profile.dpi ** 2 * channels * OCR_IMAGE_COPIES)
+    return cost
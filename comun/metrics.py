@@ -0,0 +1,264 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from comun.config import app_dir
+from comun.tracing import Tracer, now_us
+
+
+# Con esta variable la interfaz mide cada lote y guarda el resumen en
+# <datos>/metricas (en la línea de comandos se usa --metricas)
+ENV_VAR = 'EXTRACTOR_PDF_METRICAS'
+
+# Orden en que se muestran las etapas conocidas (las demás van al final)
+STAGE_ORDER = [
+    'documento',
+    'fitz.open',
+    'get_text',
+    'get_pixmap',
+    'png',
+    'tesseract',
+    'regex',
+    'excel.save',
+]
+
+# Categoría de cada etapa en las trazas (ver comun.tracing)
+STAGE_CATEGORY = {
+    'documento': 'archivo',
+    'fitz.open': 'open',
+    'get_text': 'classify',
+    'get_pixmap': 'render',
+    'png': 'render',
+    'tesseract': 'ocr',
+    'regex': 'parse',
+    'excel.save': 'export',
+}
+
+
+def _percentile(sorted_values, fraction):
+    """Percentil por rango más cercano de una lista ordenada"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class BatchMetrics:
+    """Tiempos por etapa de un lote
+    
+    Guarda cada duración para calcular el histograma de la etapa (cantidad,
+    p50/p95/máximo) junto con los bytes y páginas procesados.
+    """
+    
+    def __init__(self):
+        self.stages = {}
+        self.bytes = {}
+        self.pages = {}
+        self._lock = threading.Lock()
+    
+    def add(self, name, seconds, nbytes=0, pages=0):
+        """Registra una medición de una etapa"""
+        with self._lock:
+            self.stages.setdefault(name, []).append(seconds)
+            if nbytes:
+                self.bytes[name] = self.bytes.get(name, 0) + nbytes
+            if pages:
+                self.pages[name] = self.pages.get(name, 0) + pages
+    
+    def take(self):
+        """Retorna las mediciones crudas (para enviarlas a otro proceso) y las vacía"""
+        with self._lock:
+            raw = {'etapas': self.stages, 'bytes': self.bytes, 'paginas': self.pages}
+            self.stages, self.bytes, self.pages = {}, {}, {}
+        return raw
+    
+    def merge(self, raw):
+        """Suma las mediciones crudas de otro proceso (ver take)"""
+        with self._lock:
+            for name, values in raw['etapas'].items():
+                self.stages.setdefault(name, []).extend(values)
+            for name, nbytes in raw['bytes'].items():
+                self.bytes[name] = self.bytes.get(name, 0) + nbytes
+            for name, pages in raw['paginas'].items():
+                self.pages[name] = self.pages.get(name, 0) + pages
+    
+    def summary(self):
+        """Retorna {etapa: histograma} en el orden de STAGE_ORDER"""
+        with self._lock:
+            names = sorted(
+                self.stages,
+                key=lambda n: (STAGE_ORDER.index(n) if n in STAGE_ORDER else len(STAGE_ORDER), n)
+            )
+            result = {}
+            for name in names:
+                values = sorted(self.stages[name])
+                result[name] = {
+                    'cantidad': len(values),
+                    'total_s': round(sum(values), 4),
+                    'p50_ms': round(_percentile(values, 0.50) * 1000, 3),
+                    'p95_ms': round(_percentile(values, 0.95) * 1000, 3),
+                    'max_ms': round(values[-1] * 1000, 3),
+                    'bytes': self.bytes.get(name, 0),
+                    'paginas': self.pages.get(name, 0),
+                }
+            return result
+    
+    def save(self, path):
+        """Guarda el resumen en JSON"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'etapas': self.summary()}, f, indent=2, ensure_ascii=False)
+        return str(path)
+
+
+def format_summary(summary):
+    """Formatea el resumen de un lote para la consola"""
+    lines = [f"  {'Etapa':<12} {'n':>7} {'total s':>9} {'p50 ms':>9} {'p95 ms':>9} "
+             f"{'máx ms':>9} {'MB':>8} {'págs':>6}"]
+    for name, h in summary.items():
+        lines.append(
+            f"  {name:<12} {h['cantidad']:>7} {h['total_s']:>9.2f} {h['p50_ms']:>9.1f} "
+            f"{h['p95_ms']:>9.1f} {h['max_ms']:>9.1f} {h['bytes'] / 1e6:>8.1f} {h['paginas']:>6}"
+        )
+    return '\n'.join(lines)
+
+
+class _Stage:
+    """Mide una etapa (con bytes y páginas opcionales) y/o la agrega a la traza"""
+    
+    __slots__ = ('collector', 'tracer', 'name', 'archivo', 'bytes', 'pages', 't0', 'start_us')
+    
+    def __init__(self, collector, tracer, name, archivo):
+        self.collector = collector
+        self.tracer = tracer
+        self.name = name
+        self.archivo = archivo
+        self.bytes = 0
+        self.pages = 0
+    
+    def __enter__(self):
+        if self.tracer is not None:
+            self.start_us = now_us()
+        self.t0 = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.t0
+        if self.collector is not None:
+            self.collector.add(self.name, seconds, self.bytes, self.pages)
+        if self.tracer is not None:
+            args = {'archivo': self.archivo} if self.archivo else None
+            self.tracer.span(
+                self.name, STAGE_CATEGORY.get(self.name, 'otros'),
+                self.start_us, int(seconds * 1e6), args
+            )
+        return False
+
+
+class _NullStage:
+    """Etapa sin medición: no hace nada (métricas desactivadas)"""
+    
+    __slots__ = ()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        return False
+    
+    def __setattr__(self, name, value):
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+# Colector y traza activos en este proceso (None = desactivados)
+_collector = None
+_tracer = None
+
+
+def stage(name, archivo=None):
+    """Contexto que mide una etapa en el colector y la traza activos
+    
+    Con ambos desactivados retorna siempre el mismo objeto vacío, así el
+    costo es una llamada a función. Dentro del bloque se pueden asignar
+    `.bytes` y `.pages` al objeto retornado; `archivo` solo va a la traza.
+    """
+    if _collector is None and _tracer is None:
+        return _NULL_STAGE
+    return _Stage(_collector, _tracer, name, archivo)
+
+
+def enabled():
+    """Verifica si hay un colector activo en este proceso"""
+    return _collector is not None
+
+
+def enable(collector=None):
+    """Activa las métricas en este proceso y retorna el colector"""
+    global _collector
+    _collector = collector if collector is not None else BatchMetrics()
+    return _collector
+
+
+def disable():
+    """Desactiva las métricas en este proceso"""
+    global _collector
+    _collector = None
+
+
+def start_tracing(tracer=None):
+    """Activa la traza en este proceso y la retorna"""
+    global _tracer
+    _tracer = tracer if tracer is not None else Tracer()
+    return _tracer
+
+
+def stop_tracing():
+    """Desactiva la traza en este proceso"""
+    global _tracer
+    _tracer = None
+
+
+@contextmanager
+def tracing_into(tracer):
+    """Agrega las etapas del bloque a `tracer` (sin efecto si es None)"""
+    global _tracer
+    if tracer is None:
+        yield None
+        return
+    previous, _tracer = _tracer, tracer
+    try:
+        yield tracer
+    finally:
+        _tracer = previous
+
+
+@contextmanager
+def collecting(collector):
+    """Mide dentro del bloque en `collector` (sin efecto si es None)"""
+    global _collector
+    if collector is None:
+        yield None
+        return
+    previous, _collector = _collector, collector
+    try:
+        yield collector
+    finally:
+        _collector = previous
+
+
+def requested():
+    """Verifica si se pidió medir los lotes de la interfaz (variable de entorno)"""
+    return bool(os.environ.get(ENV_VAR))
+
+
+def report(collector, nombre, show=True):
+    """Guarda el resumen en <datos>/metricas/<nombre>.json y lo muestra en la consola"""
+    path = collector.save(app_dir('metricas') / f"{nombre}.json")
+    if show:
+        print(f"Métricas de {nombre} ({path}):", file=sys.stderr)
+        print(format_summary(collector.summary()), file=sys.stderr, flush=True)
+    return path
@@ -0,0 +1,92 @@
+import importlib
+
+
+class ModuloInfo:
+    """Describe un módulo de extracción: su modelo y el formato de salida"""
+    
+    def __init__(self, nombre, titulo, model_path, columnas, hoja, color_encabezado, archivo_excel,
+                 categorias=None, huellas=()):
+        self.nombre = nombre
+        self.titulo = titulo
+        self.model_path = model_path
+        # Lista de (encabezado, campo, ancho) para la exportación
+        self.columnas = columnas
+        self.hoja = hoja
+        self.color_encabezado = color_encabezado
+        self.archivo_excel = archivo_excel
+        # Campos con pocos valores posibles: {campo: valores} (ver comun.records)
+        self.categorias = categorias or {}
+        # Patrones que identifican el tipo de documento en la página 1 (ver comun.classify)
+        self.huellas = list(huellas)
+    
+    @property
+    def campos(self):
+        """Retorna los campos de datos del módulo (sin 'archivo' ni 'error')"""
+        return [campo for _, campo, _ in self.columnas]
+    
+    def error_record(self, archivo, error):
+        """Retorna un registro vacío con el error (mismo formato que los modelos)"""
+        record = {'archivo': archivo}
+        for campo in self.campos:
+            record[campo] = ''
+        record['error'] = str(error)
+        return record
+    
+    def model_class(self):
+        """Importa (recién al necesitarla) y retorna la clase del modelo"""
+        module_name, class_name = self.model_path.split(':')
+        return getattr(importlib.import_module(module_name), class_name)
+    
+    def create_model(self):
+        """Crea una instancia nueva del modelo"""
+        return self.model_class()()
+
+
+MODULOS = {
+    'estudiantes': ModuloInfo(
+        nombre='estudiantes',
+        titulo='Informe Socioeconómico',
+        model_path='modulo1.model:PDFDataModel',
+        columnas=[
+            ('Nombres y Apellidos', 'nombres', 40),
+            ('DNI', 'dni', 15),
+            ('Nivel de Riesgo Social', 'nivel_riesgo', 25),
+        ],
+        hoja='Datos Estudiantes',
+        color_encabezado='366092',
+        archivo_excel='datos_estudiantes.xlsx',
+        categorias={'nivel_riesgo': ('', 'Alto', 'Medio', 'Bajo', 'Ninguno')},
+        huellas=[
+            r'INFORME\s+SOCIO\s*-?\s*ECON[OÓ]MICO',
+            r'NIVEL\s+DE\s+RIESGO',
+            r'Nombres\s+y\s+apellidos',
+        ]
+    ),
+    'transegen': ModuloInfo(
+        nombre='transegen',
+        titulo='Trans-Segen',
+        model_path='modulo2.model_transegen:TransSegenModel',
+        columnas=[
+            ('Nombres y Apellidos', 'nombres', 40),
+            ('Nro Trans-Segen', 'nro_transegen', 35),
+        ],
+        hoja='Datos Trans-Segen',
+        color_encabezado='2E7D32',
+        archivo_excel='datos_transegen.xlsx',
+        huellas=[
+            r'TRANS[-\s]?SEGEN',
+            r'CONSIDERANDO',
+            r'SE\s+RESUELVE',
+        ]
+    ),
+}
+
+
+def get_modulo(nombre):
+    """Retorna la información de un módulo por su nombre"""
+    try:
+        return MODULOS[nombre]
+    except KeyError:
+        raise ValueError(
+            f"Módulo desconocido: {nombre} (disponibles: {', '.join(MODULOS)})"
+        )
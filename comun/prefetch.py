@@ -0,0 +1,174 @@
+import threading
+import time
+from pathlib import Path
+
+from comun.archives import file_size, is_member, read_member
+
+
+# Hilos de lectura por defecto: en un recurso compartido (SMB) la latencia,
+# no el ancho de banda, limita; varias lecturas en vuelo la ocultan
+PREFETCH_THREADS = 4
+
+# Presupuesto por defecto de bytes leídos y aún no procesados
+PREFETCH_BUDGET = 256 * 1024 * 1024
+
+
+def read_bytes(pdf_path):
+    """Lee un PDF completo (o un miembro de un ZIP/TAR) a memoria"""
+    if is_member(pdf_path):
+        return read_member(pdf_path)
+    return Path(pdf_path).read_bytes()
+
+
+class Prefetcher:
+    """Lee por adelantado los próximos PDFs de un lote en hilos, con un límite de bytes
+    
+    Se recorre en el orden de `pdf_files` y entrega (ruta, bytes); los
+    bytes son None si la lectura falló (el modelo abrirá la ruta y
+    registrará el error). Los hilos reservan el tamaño de cada archivo en
+    orden antes de leerlo, así nunca hay más de `budget` bytes en memoria
+    (salvo un archivo más grande que el presupuesto, que se lee solo).
+    
+    Con `auto_release` los bytes de un archivo se liberan al pedir el
+    siguiente; si no, quien los consume llama a release() al terminar (p.
+    ej. cuando un trabajador del pool procesó el documento). `idle` indica
+    si el consumidor se quedó sin trabajo: solo esas esperas cuentan como
+    espera de E/S (un pool con documentos en cola no está esperando la red).
+    """
+    
+    def __init__(self, pdf_files, budget=PREFETCH_BUDGET, threads=PREFETCH_THREADS,
+                 auto_release=True, idle=None):
+        self.pdf_files = [str(p) for p in pdf_files]
+        self.budget = budget
+        self.auto_release = auto_release
+        self.idle = idle
+        self._cond = threading.Condition()
+        self._ready = {}
+        self._next_claim = 0
+        self._next_reserve = 0
+        self._in_flight = 0
+        self._closed = False
+        # Estadísticas del lote (ver stats())
+        self._bytes = 0
+        self._read_seconds = 0.0
+        self._wait_seconds = 0.0
+        self._started = None
+        self._stopped = None
+        self._threads = [
+            threading.Thread(target=self._read_loop, daemon=True)
+            for _ in range(min(threads, len(self.pdf_files)))
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def _read_loop(self):
+        """Hilo lector: toma el próximo archivo, espera su turno y presupuesto, y lo lee"""
+        while True:
+            with self._cond:
+                if self._closed or self._next_claim >= len(self.pdf_files):
+                    return
+                index = self._next_claim
+                self._next_claim += 1
+            pdf_path = self.pdf_files[index]
+            try:
+                size = file_size(pdf_path)
+            except Exception:
+                size = 0
+            with self._cond:
+                # Reservas en el orden del lote: el archivo que el consumidor
+                # espera siempre tiene su lugar antes que los siguientes
+                while not self._closed and (
+                    self._next_reserve != index
+                    or (self._in_flight and self._in_flight + size > self.budget)
+                ):
+                    self._cond.wait()
+                if self._closed:
+                    return
+                self._in_flight += size
+                self._next_reserve += 1
+                self._cond.notify_all()
+            inicio = time.perf_counter()
+            data = None
+            try:
+                data = read_bytes(pdf_path)
+            except Exception:
+                # ZIP/TAR dañado (zlib.error, BadZipFile, KeyError...): el
+                # modelo abrirá la ruta y registrará el error como sin prefetch
+                data = None
+            finally:
+                segundos = time.perf_counter() - inicio
+                with self._cond:
+                    # El tamaño real puede diferir del estimado (archivo que cambió)
+                    self._in_flight += (len(data) if data is not None else 0) - size
+                    self._bytes += len(data) if data is not None else 0
+                    self._read_seconds += segundos
+                    self._ready[index] = data
+                    self._cond.notify_all()
+    
+    def release(self, nbytes):
+        """Devuelve al presupuesto los bytes de un archivo ya procesado"""
+        with self._cond:
+            self._in_flight -= nbytes
+            self._cond.notify_all()
+    
+    def __iter__(self):
+        self._started = time.perf_counter()
+        previous = 0
+        for index, pdf_path in enumerate(self.pdf_files):
+            if self.auto_release and previous:
+                self.release(previous)
+            inicio = time.perf_counter()
+            idle = self.idle is None or self.idle()
+            with self._cond:
+                while index not in self._ready and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                data = self._ready.pop(index)
+                if idle:
+                    self._wait_seconds += time.perf_counter() - inicio
+            previous = len(data) if data is not None else 0
+            yield pdf_path, data
+        if self.auto_release and previous:
+            self.release(previous)
+    
+    def close(self):
+        """Detiene los hilos lectores y descarta lo leído"""
+        with self._cond:
+            self._closed = True
+            self._ready.clear()
+            if self._stopped is None:
+                self._stopped = time.perf_counter()
+            self._cond.notify_all()
+    
+    def stats(self):
+        """Tiempos del lote: espera de E/S del consumidor frente a cómputo
+        
+        'espera_s' es el tiempo que el consumidor estuvo detenido esperando
+        datos (lo que el prefetch no alcanzó a ocultar) y 'calculo_s' el resto
+        del tiempo transcurrido; 'lectura_s' suma la duración de las
+        lecturas en todos los hilos.
+        """
+        with self._cond:
+            if self._started is None:
+                total = 0.0
+            else:
+                total = (self._stopped or time.perf_counter()) - self._started
+            return {
+                'archivos': len(self.pdf_files),
+                'bytes': self._bytes,
+                'lectura_s': round(self._read_seconds, 3),
+                'espera_s': round(self._wait_seconds, 3),
+                'calculo_s': round(max(total - self._wait_seconds, 0.0), 3),
+            }
+
+
+def format_stats(stats):
+    """Resumen de una línea de las estadísticas del prefetch"""
+    total = stats['espera_s'] + stats['calculo_s']
+    pct = 100 * stats['espera_s'] / total if total else 0.0
+    return (
+        f"Prefetch: {stats['archivos']} archivos, {stats['bytes'] / 1e6:.1f} MB leídos en "
+        f"{stats['lectura_s']:.1f} s de E/S; espera de E/S {stats['espera_s']:.1f} s "
+        f"({pct:.0f}%), cómputo {stats['calculo_s']:.1f} s"
+    )
@@ -0,0 +1,259 @@
+import itertools
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from comun.archives import file_size, open_pdf
+from comun.config import app_dir
+
+
+# Con menos archivos que esto el análisis se hace en este proceso
+PREFLIGHT_MIN_PARALLEL = 64
+
+# Archivos analizados por tarea en el análisis paralelo
+PREFLIGHT_CHUNK = 32
+
+# Segundos de OCR por página (por trabajador) mientras no haya mediciones
+DEFAULT_OCR_SECONDS_PER_PAGE = 4.0
+
+# Peso de la última medición en el promedio móvil del rendimiento
+RATE_SMOOTHING = 0.3
+
+# Costo relativo de una página con texto frente a una página con OCR
+TEXT_SECONDS_PER_PAGE = 0.005
+
+
+def probe_pdf(pdf_path, max_pages=2, min_text_chars=50):
+    """Revisa un PDF sin procesarlo: páginas, cifrado, daño y páginas a OCR
+    
+    Cuenta como páginas escaneadas las primeras `max_pages` con menos de
+    `min_text_chars` caracteres de texto (el mismo criterio del modelo).
+    """
+    info = {'ruta': str(pdf_path), 'bytes': 0, 'paginas': 0, 'ocr_paginas': 0, 'error': None}
+    try:
+        info['bytes'] = file_size(pdf_path)
+        doc = open_pdf(pdf_path)
+    except Exception as e:
+        info['error'] = f"No se puede abrir: {e}"
+        return info
+    
+    try:
+        if doc.needs_pass:
+            info['error'] = "El PDF está protegido con contraseña"
+            return info
+        info['paginas'] = len(doc)
+        if len(doc) == 0:
+            info['error'] = "El PDF no tiene páginas"
+            return info
+        for page_num in range(min(len(doc), max_pages)):
+            if len(doc[page_num].get_text().strip()) < min_text_chars:
+                info['ocr_paginas'] += 1
+    except Exception as e:
+        info['error'] = f"PDF dañado: {e}"
+    finally:
+        doc.close()
+    return info
+
+
+def _probe_chunk(chunk, max_pages, min_text_chars):
+    """Analiza un grupo de archivos (se ejecuta en un proceso del pool)"""
+    return [probe_pdf(pdf_path, max_pages, min_text_chars) for pdf_path in chunk]
+
+
+class PreflightReport:
+    """Resultado del análisis previo de un lote"""
+    
+    def __init__(self, probes):
+        self.probes = probes
+    
+    @property
+    def ok_files(self):
+        """Archivos que se pueden procesar"""
+        return [p['ruta'] for p in self.probes if p['error'] is None]
+    
+    @property
+    def rejected(self):
+        """Lista de (ruta, motivo) de los archivos dañados o cifrados"""
+        return [(p['ruta'], p['error']) for p in self.probes if p['error'] is not None]
+    
+    @property
+    def total_pages(self):
+        return sum(p['paginas'] for p in self.probes)
+    
+    @property
+    def ocr_pages(self):
+        return sum(p['ocr_paginas'] for p in self.probes)
+    
+    @property
+    def total_bytes(self):
+        return sum(p['bytes'] for p in self.probes)
+    
+    def costs(self):
+        """Costo estimado de cada archivo ({ruta: segundos}) para ordenar el lote"""
+        return {
+            p['ruta']: p['ocr_paginas'] * DEFAULT_OCR_SECONDS_PER_PAGE
+            + p['paginas'] * TEXT_SECONDS_PER_PAGE
+            for p in self.probes
+        }
+    
+    def estimate_seconds(self, modulo_nombre, workers=1, perfil=None):
+        """Tiempo estimado del OCR con el rendimiento medido en lotes anteriores
+        
+        Con `perfil` se usan las páginas por segundo medidas con ese perfil de
+        OCR (comun.ocr_profiles), si las hay. Retorna (segundos, medido);
+        `medido` es False si todavía no hay mediciones y se usó el valor por
+        defecto.
+        """
+        seconds_per_page = None
+        if perfil is not None:
+            pages_per_second = load_profile_rate(perfil)
+            if pages_per_second:
+                seconds_per_page = 1 / pages_per_second
+        if seconds_per_page is None:
+            seconds_per_page = load_ocr_rate(modulo_nombre)
+        measured = seconds_per_page is not None
+        if not measured:
+            seconds_per_page = DEFAULT_OCR_SECONDS_PER_PAGE
+        return self.ocr_pages * seconds_per_page / max(1, workers), measured
+
+
+def quick_costs(pdf_files):
+    """Costo aproximado de cada archivo sin abrirlo ({ruta: tamaño en bytes})"""
+    costs = {}
+    for pdf_path in pdf_files:
+        try:
+            costs[str(pdf_path)] = file_size(pdf_path)
+        except (OSError, KeyError):
+            costs[str(pdf_path)] = 0
+    return costs
+
+
+def run_preflight(pdf_files, max_pages=2, min_text_chars=50, workers=None, progress=None):
+    """Analiza todos los archivos (en paralelo si son muchos) y retorna el reporte
+    
+    `progress(n)` se llama con la cantidad de archivos ya analizados.
+    """
+    pdf_files = [str(p) for p in pdf_files]
+    workers = workers or os.cpu_count() or 1
+    
+    if workers <= 1 or len(pdf_files) < PREFLIGHT_MIN_PARALLEL:
+        probes = []
+        for pdf_path in pdf_files:
+            probes.append(probe_pdf(pdf_path, max_pages, min_text_chars))
+            if progress:
+                progress(len(probes))
+        return PreflightReport(probes)
+    
+    chunks = [pdf_files[i:i + PREFLIGHT_CHUNK] for i in range(0, len(pdf_files), PREFLIGHT_CHUNK)]
+    probes = []
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx) as executor:
+        results = executor.map(
+            _probe_chunk, chunks, itertools.repeat(max_pages), itertools.repeat(min_text_chars)
+        )
+        for chunk_probes in results:
+            probes.extend(chunk_probes)
+            if progress:
+                progress(len(probes))
+    return PreflightReport(probes)
+
+
+class PreflightScan(threading.Thread):
+    """Análisis previo en segundo plano (para no bloquear la ventana)"""
+    
+    def __init__(self, pdf_files, max_pages=2, min_text_chars=50):
+        super().__init__(daemon=True)
+        self.pdf_files = list(pdf_files)
+        self.max_pages = max_pages
+        self.min_text_chars = min_text_chars
+        self.checked = 0
+        self.report = None
+        self.error = None
+    
+    def run(self):
+        try:
+            self.report = run_preflight(
+                self.pdf_files, self.max_pages, self.min_text_chars,
+                progress=self._set_progress
+            )
+        except Exception as e:
+            self.error = e
+    
+    def _set_progress(self, checked):
+        self.checked = checked
+
+
+def _rates_path():
+    return app_dir() / 'rendimiento.json'
+
+
+def _load_rates():
+    try:
+        with open(_rates_path(), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def load_ocr_rate(modulo_nombre):
+    """Segundos de OCR por página y trabajador medidos en lotes anteriores (o None)"""
+    return _load_rates().get(modulo_nombre, {}).get('segundos_por_pagina_ocr')
+
+
+def record_ocr_rate(modulo_nombre, ocr_pages, seconds, workers):
+    """Actualiza el rendimiento medido con un lote terminado (promedio móvil)"""
+    if ocr_pages <= 0 or seconds <= 0:
+        return
+    sample = seconds * max(1, workers) / ocr_pages
+    rates = _load_rates()
+    entry = rates.setdefault(modulo_nombre, {})
+    previous = entry.get('segundos_por_pagina_ocr')
+    if previous is not None:
+        sample = previous + RATE_SMOOTHING * (sample - previous)
+    entry['segundos_por_pagina_ocr'] = round(sample, 4)
+    _save_rates(rates)
+
+
+def load_profile_rate(perfil):
+    """Páginas de OCR por segundo y trabajador medidas con un perfil (o None)"""
+    return _load_rates().get('perfiles_ocr', {}).get(perfil)
+
+
+def load_profile_rates():
+    """Retorna {perfil: páginas por segundo} de los perfiles ya medidos"""
+    return _load_rates().get('perfiles_ocr', {})
+
+
+def record_profile_rate(perfil, ocr_pages, seconds, workers=1):
+    """Actualiza las páginas por segundo medidas con un perfil de OCR (promedio móvil)"""
+    if ocr_pages <= 0 or seconds <= 0:
+        return
+    sample = ocr_pages / (seconds * max(1, workers))
+    rates = _load_rates()
+    profiles = rates.setdefault('perfiles_ocr', {})
+    previous = profiles.get(perfil)
+    if previous is not None:
+        sample = previous + RATE_SMOOTHING * (sample - previous)
+    profiles[perfil] = round(sample, 4)
+    _save_rates(rates)
+
+
+def _save_rates(rates):
+    try:
+        with open(_rates_path(), 'w', encoding='utf-8') as f:
+            json.dump(rates, f, indent=2)
+    except OSError:
+        pass
+
+
+def format_duration(seconds):
+    """Formatea una duración aproximada ('~45 s', '~12 min', '~2 h 10 min')"""
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"~{seconds} s"
+    minutes = (seconds + 30) // 60
+    if minutes < 60:
+        return f"~{minutes} min"
+    return f"~{minutes // 60} h {minutes % 60} min"
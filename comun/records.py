@@ -0,0 +1,199 @@
+import itertools
+import sys
+from array import array
+from collections.abc import Mapping
+
+
+class RecordView(Mapping):
+    """Acceso tipo dict a un registro de un RecordStore (sin copiarlo)
+    
+    Soporta data['campo'], data.get(...), 'error' in data, keys/items y
+    dict(data); la clave 'error' solo existe si el registro tiene error.
+    """
+    
+    __slots__ = ('_store', '_index')
+    
+    def __init__(self, store, index):
+        self._store = store
+        self._index = index
+    
+    def __getitem__(self, key):
+        return self._store.value(self._index, key)
+    
+    def __contains__(self, key):
+        if key == 'error':
+            return self._index in self._store.errors
+        return key in self._store.column_index
+    
+    def __iter__(self):
+        yield 'archivo'
+        yield from self._store.campos
+        if self._index in self._store.errors:
+            yield 'error'
+    
+    def __len__(self):
+        return len(self._store.campos) + 1 + (self._index in self._store.errors)
+    
+    def __repr__(self):
+        return repr(dict(self))
+    
+    def to_dict(self):
+        """Copia el registro a un dict (p. ej. para serializarlo)"""
+        return dict(self)
+
+
+class TextColumn:
+    """Columna de textos guardada como un solo búfer UTF-8
+    
+    Evita un objeto str por valor. `ends` guarda dónde termina cada valor
+    (en caracteres); para leer se decodifica el búfer una vez y se corta,
+    y esa copia se descarta al agregar otro valor.
+    """
+    
+    __slots__ = ('data', 'ends', '_text')
+    
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array('Q')
+        self._text = None
+    
+    def __len__(self):
+        return len(self.ends)
+    
+    def append(self, value):
+        self.data += value.encode('utf-8')
+        self.ends.append((self.ends[-1] if self.ends else 0) + len(value))
+        self._text = None
+    
+    def text(self):
+        """Todo el contenido decodificado (se guarda hasta el próximo append)"""
+        if self._text is None:
+            self._text = self.data.decode('utf-8')
+        return self._text
+    
+    def __getitem__(self, index):
+        start = self.ends[index - 1] if index > 0 else 0
+        return self.text()[start:self.ends[index]]
+    
+    def __iter__(self):
+        # Todo el recorrido en C: map sobre los cortes del texto decodificado
+        starts = itertools.chain((0,), self.ends)
+        return map(self.text().__getitem__, map(slice, starts, self.ends))
+
+
+class RecordStore:
+    """Registros extraídos guardados por columnas
+    
+    En lugar de un dict por archivo (con las claves repetidas en cada uno)
+    se guarda una columna por campo: los textos en un solo búfer UTF-8, los
+    campos con pocos valores posibles (p. ej. el nivel de riesgo) como un
+    byte por registro y los errores, que son pocos, en un dict aparte. Los
+    nombres de archivo se internan (son los mismos objetos que la lista de
+    archivos del modelo). Se usa como una lista de dicts: len, índice,
+    iteración y append.
+    """
+    
+    def __init__(self, campos, categorias=None):
+        self.campos = list(campos)
+        self.column_index = {'archivo': None}
+        self.column_index.update((campo, i) for i, campo in enumerate(self.campos))
+        # Campo categórico -> lista de valores; el código es la posición
+        self.categories = {
+            campo: list(valores) for campo, valores in (categorias or {}).items()
+        }
+        self._codes = {campo: {v: i for i, v in enumerate(valores)}
+                       for campo, valores in self.categories.items()}
+        self.archivos = []
+        self.columns = [
+            array('B') if campo in self.categories else TextColumn() for campo in self.campos
+        ]
+        self.errors = {}
+        # Ruta del PDF de cada registro (las mismas cadenas de la lista de archivos)
+        self.sources = []
+    
+    @classmethod
+    def for_modulo(cls, nombre, records=(), sources=None):
+        """Crea un almacén con los campos de un módulo (ver comun.modulos)"""
+        from comun.modulos import get_modulo
+        
+        modulo = get_modulo(nombre)
+        store = cls(modulo.campos, modulo.categorias)
+        store.extend(records, sources)
+        return store
+    
+    def __len__(self):
+        return len(self.archivos)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [RecordView(self, i) for i in range(len(self))[index]]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("índice de registro fuera de rango")
+        return RecordView(self, index)
+    
+    def __iter__(self):
+        for index in range(len(self.archivos)):
+            yield RecordView(self, index)
+    
+    def _encode(self, campo, value):
+        """Código de un valor categórico (agrega el valor si es nuevo)"""
+        codes = self._codes[campo]
+        code = codes.get(value)
+        if code is None:
+            code = len(self.categories[campo])
+            if code > 255:
+                raise ValueError(f"Demasiados valores distintos para {campo}")
+            self.categories[campo].append(value)
+            codes[value] = code
+        return code
+    
+    def append(self, record, source=None):
+        """Agrega un registro (dict o vista de otro almacén) y la ruta de su PDF"""
+        index = len(self.archivos)
+        self.sources.append(source)
+        self.archivos.append(sys.intern(record['archivo']))
+        for campo, column in zip(self.campos, self.columns):
+            value = record.get(campo) or ''
+            if campo in self.categories:
+                value = self._encode(campo, value)
+            column.append(value)
+        if 'error' in record:
+            self.errors[index] = record['error']
+    
+    def extend(self, records, sources=None):
+        if sources is None:
+            for record in records:
+                self.append(record)
+        else:
+            for record, source in zip(records, sources):
+                self.append(record, source)
+    
+    def with_sources(self):
+        """Genera (ruta del PDF, registro) de cada registro"""
+        return zip(self.sources, self)
+    
+    def value(self, index, key):
+        """Valor de un campo de un registro (KeyError si no existe)"""
+        if key == 'archivo':
+            return self.archivos[index]
+        if key == 'error':
+            return self.errors[index]
+        value = self.columns[self.column_index[key]][index]
+        if key in self.categories:
+            return self.categories[key][value]
+        return value
+    
+    def rows(self):
+        """Genera cada registro como tupla (archivo, campos..., error), con '' sin error
+        
+        Recorre las columnas directamente, más rápido que pasar por las vistas.
+        """
+        columns = [
+            map(self.categories[campo].__getitem__, column) if campo in self.categories
+            else column
+            for campo, column in zip(self.campos, self.columns)
+        ]
+        errors = map(self.errors.get, range(len(self)), itertools.repeat(''))
+        return zip(self.archivos, *columns, errors)
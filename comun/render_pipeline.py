@@ -0,0 +1,160 @@
+import multiprocessing
+import queue
+from multiprocessing import shared_memory
+
+from comun.archives import display_name
+
+
+# Tamaño de cada búfer de página: una hoja A4 a 300 DPI en RGB ocupa ~26 MB
+DEFAULT_SLOT_BYTES = 32 * 1024 * 1024
+
+# Páginas renderizadas que pueden esperar al OCR (memoria compartida = slots × tamaño)
+DEFAULT_SLOTS = 3
+
+# Modo de PIL según los canales del pixmap
+_PIL_MODES = {1: 'L', 3: 'RGB', 4: 'RGBA'}
+
+
+def _render_main(shm_name, slot_bytes, pdf_files, pages_to_read, min_text_chars, dpi, gray,
+                 free_slots, ready):
+    """Proceso de render: lee el texto o dibuja cada página y la deja en un búfer"""
+    import fitz
+    from comun.archives import open_pdf
+    
+    # El segmento es del proceso principal (que lo libera); aquí solo se abre
+    shm = shared_memory.SharedMemory(name=shm_name)
+    matrix = fitz.Matrix(dpi / 72, dpi / 72)
+    colorspace = fitz.csGRAY if gray else fitz.csRGB
+    try:
+        for pdf_path in pdf_files:
+            error = None
+            try:
+                doc = open_pdf(pdf_path)
+                try:
+                    for page_num in range(min(len(doc), pages_to_read)):
+                        page = doc[page_num]
+                        text = page.get_text()
+                        if len(text.strip()) >= min_text_chars:
+                            ready.put(('texto', text))
+                            continue
+                        pix = page.get_pixmap(matrix=matrix, colorspace=colorspace)
+                        size = pix.stride * pix.height
+                        shape = (pix.width, pix.height, pix.stride, pix.n)
+                        if size > slot_bytes:
+                            # Página más grande que un búfer: se envía copiada
+                            ready.put(('bytes', pix.samples) + shape)
+                            continue
+                        # Espera un búfer libre (contrapresión si el OCR va más lento)
+                        slot = free_slots.get()
+                        start = slot * slot_bytes
+                        shm.buf[start:start + size] = pix.samples_mv
+                        ready.put(('imagen', slot) + shape)
+                finally:
+                    doc.close()
+            except Exception as e:
+                error = f"Error al procesar {display_name(pdf_path)}: {str(e)}"
+            ready.put(('fin', pdf_path, error))
+        ready.put(None)
+    finally:
+        shm.close()
+
+
+class RenderPipeline:
+    """Render y OCR en paralelo, conectados por búferes de memoria compartida
+    
+    Un proceso aparte abre los PDFs y dibuja las páginas escaneadas mientras
+    este proceso ejecuta el OCR de las anteriores. Los píxeles no se
+    serializan: el render los escribe en un búfer de
+    multiprocessing.shared_memory y por la cola solo viaja el número de
+    búfer. La cantidad de búferes limita cuánto se adelanta el render.
+    """
+    
+    def __init__(self, pages_to_read=2, min_text_chars=50, dpi=300, gray=False,
+                 slots=DEFAULT_SLOTS, slot_bytes=DEFAULT_SLOT_BYTES):
+        self.pages_to_read = pages_to_read
+        self.min_text_chars = min_text_chars
+        self.dpi = dpi
+        self.gray = gray
+        self.slots = slots
+        self.slot_bytes = slot_bytes
+    
+    def texts(self, pdf_files, ocr):
+        """Genera (ruta, texto, error) por archivo, en el orden de `pdf_files`
+        
+        `ocr(imagen)` recibe una imagen PIL que apunta al búfer compartido y
+        retorna el texto de la página.
+        """
+        from PIL import Image
+        
+        pdf_files = [str(p) for p in pdf_files]
+        ctx = multiprocessing.get_context('spawn')
+        shm = shared_memory.SharedMemory(create=True, size=self.slots * self.slot_bytes)
+        free_slots = ctx.Queue()
+        for slot in range(self.slots):
+            free_slots.put(slot)
+        ready = ctx.Queue(maxsize=self.slots * 4)
+        process = ctx.Process(
+            target=_render_main,
+            args=(shm.name, self.slot_bytes, pdf_files, self.pages_to_read,
+                  self.min_text_chars, self.dpi, self.gray, free_slots, ready),
+            daemon=True
+        )
+        process.start()
+        
+        pending = iter(pdf_files)
+        pages = []
+        error = None
+        try:
+            while True:
+                try:
+                    message = ready.get(timeout=1)
+                except queue.Empty:
+                    if process.is_alive():
+                        continue
+                    # El render murió (p. ej. un PDF que rompe MuPDF): el resto queda con error
+                    for pdf_path in pending:
+                        yield pdf_path, None, "El proceso de render terminó inesperadamente"
+                    return
+                if message is None:
+                    return
+                
+                kind = message[0]
+                if kind == 'fin':
+                    _, pdf_path, render_error = message
+                    next(pending)
+                    if error is not None and render_error is None:
+                        render_error = f"Error al procesar {display_name(pdf_path)}: {error}"
+                    yield pdf_path, ''.join(pages), render_error
+                    pages = []
+                    error = None
+                elif kind == 'texto':
+                    pages.append(message[1] + "\n\n")
+                else:
+                    if kind == 'imagen':
+                        _, slot, width, height, stride, n = message
+                        start = slot * self.slot_bytes
+                        view = shm.buf[start:start + stride * height]
+                    else:
+                        _, samples, width, height, stride, n = message
+                        slot, view = None, samples
+                    mode = _PIL_MODES[n]
+                    img = None
+                    try:
+                        if error is None:
+                            img = Image.frombuffer(mode, (width, height), view, 'raw', mode, stride, 1)
+                            pages.append(ocr(img) + "\n\n")
+                    except Exception as e:
+                        error = str(e)
+                    finally:
+                        # La imagen exporta el búfer de `view`: soltarla antes de liberarlo
+                        # (también si el OCR falló), o release() y shm.close() fallan
+                        img = None
+                        if slot is not None:
+                            view.release()
+                            free_slots.put(slot)
+        finally:
+            if process.is_alive():
+                process.terminate()
+            process.join(timeout=5)
+            shm.close()
+            shm.unlink()
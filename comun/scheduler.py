@@ -0,0 +1,348 @@
+import itertools
+import os
+import threading
+import time
+
+from comun import metrics, tracing
+from comun.autotune import Autotuner, load_settings
+from comun.memory import default_memory_limit, estimate_task_memory
+from comun.prefetch import Prefetcher
+from comun.preflight import quick_costs
+from comun.workers import WorkerPool
+
+
+# Prioridad por defecto de cada módulo (menor número = antes): la extracción
+# digital es barata y no debe esperar detrás de lotes de OCR
+DEFAULT_PRIORITIES = {
+    'estudiantes': 0,
+    'transegen': 10,
+}
+
+# Tiempo máximo por documento antes de que el vigilante del pool reemplace
+# al trabajador (un PDF dañado o enorme no debe detener todo el lote)
+DEFAULT_TIMEOUTS = {
+    'estudiantes': 60,
+    'transegen': 600,
+}
+
+# Orden de los archivos dentro de un trabajo: el de la lista, o los más
+# baratos primero (los resultados siempre se entregan en el orden original)
+ORDEN_ORIGINAL = 'orden'
+MAS_BARATOS_PRIMERO = 'costo'
+
+# Estados de un trabajo
+EN_ESPERA = 'En espera'
+EN_CURSO = 'En curso'
+COMPLETADO = 'Completado'
+CANCELADO = 'Cancelado'
+
+
+class Job:
+    """Lote de documentos enviado al planificador"""
+    
+    def __init__(self, job_id, modulo, pdf_files, priority, journal=None, collector=None,
+                 tracer=None):
+        self.job_id = job_id
+        self.modulo = modulo
+        self.pdf_files = list(pdf_files)
+        self.priority = priority
+        self.journal = journal
+        # Tiempos por etapa (comun.metrics.BatchMetrics) si se pidió medir
+        self.metrics = collector
+        # Traza de Chrome (comun.tracing.Tracer) si se pidió trazar
+        self.tracer = tracer
+        # Lector por adelantado de los PDFs (comun.prefetch.Prefetcher) si se pidió
+        self.prefetcher = None
+        # Memoria estimada de cada archivo ({ruta: bytes}) si el pool tiene techo
+        self.memory = {}
+        self.estado = EN_ESPERA
+        self.creado = time.time()
+        self.finalizado = None
+        self._results = [None] * len(self.pdf_files)
+        self._completed = 0
+        self._futures = []
+        self._lock = threading.Lock()
+        self._done_event = threading.Event()
+    
+    @property
+    def total(self):
+        return len(self.pdf_files)
+    
+    @property
+    def completed(self):
+        with self._lock:
+            return self._completed
+    
+    def is_done(self):
+        """Verifica si el trabajo terminó (completado o cancelado)"""
+        return self._done_event.is_set()
+    
+    def wait(self, timeout=None):
+        """Espera a que termine el trabajo"""
+        return self._done_event.wait(timeout)
+    
+    def records(self):
+        """Retorna los registros terminados en el orden original de los archivos"""
+        with self._lock:
+            return [data for data in self._results if data is not None]
+    
+    def sources(self):
+        """Retorna las rutas de los registros de records(), en el mismo orden"""
+        with self._lock:
+            return [
+                str(pdf_path) for pdf_path, data in zip(self.pdf_files, self._results)
+                if data is not None
+            ]
+    
+    def partial_records(self):
+        """Retorna (posición, registro) de los archivos ya terminados, en orden original"""
+        with self._lock:
+            return [(index, data) for index, data in enumerate(self._results) if data is not None]
+    
+    def _set_result(self, index, data, from_journal=False):
+        """Guarda el resultado de un archivo (llamado desde el hilo del pool)"""
+        with self._lock:
+            self._results[index] = data
+            self._completed += 1
+            if self.estado == EN_ESPERA:
+                self.estado = EN_CURSO
+            finished = self._completed == self.total and self.estado != CANCELADO
+            # Bajo el lock: el colector y el vigilante del pool escriben a la
+            # vez; tras _finish el diario ya está cerrado y no se reabre
+            if self.journal is not None and not from_journal and self.finalizado is None:
+                self.journal.record(self.pdf_files[index], data)
+        if finished:
+            self._finish(COMPLETADO)
+    
+    def _finish(self, estado):
+        """Marca el trabajo como terminado"""
+        with self._lock:
+            if self.finalizado is not None:
+                return
+            self.estado = estado
+            self.finalizado = time.time()
+            if self.journal is not None:
+                self.journal.close()
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+        self._done_event.set()
+    
+    def prefetch_stats(self):
+        """Espera de E/S frente a cómputo del lote (None sin prefetch)"""
+        if self.prefetcher is None:
+            return None
+        return self.prefetcher.stats()
+    
+    def cancel(self):
+        """Cancela los archivos que todavía no empezaron"""
+        for future in self._futures:
+            future.cancel()
+        self._finish(CANCELADO)
+
+
+class JobScheduler:
+    """Planificador de trabajos compartido por todas las ventanas de la aplicación
+    
+    Mantiene un único pool de procesos (ver comun.workers) que sobrevive a
+    los lotes y a las ventanas de los módulos. Cada archivo entra al pool
+    con la prioridad de su trabajo; el OCR nunca ocupa todos los
+    trabajadores, así siempre queda uno libre para la extracción digital.
+    """
+    
+    def __init__(self, pool_size=None, timeouts=None, limits=None, policy=MAS_BARATOS_PRIMERO,
+                 memory_limit=None):
+        self.pool_size = pool_size or os.cpu_count() or 1
+        self.policy = policy
+        # Techo de memoria residente del pool (bytes); por defecto el de
+        # comun.memory, 0 lo desactiva
+        if memory_limit is None:
+            memory_limit = default_memory_limit()
+        self.memory_limit = memory_limit or None
+        self.timeouts = dict(DEFAULT_TIMEOUTS if timeouts is None else timeouts)
+        if limits is None:
+            # El OCR deja siempre un trabajador libre para la extracción digital;
+            # si se midió un ajuste para este equipo (comun.autotune), se usa ese
+            limits = {}
+            if self.pool_size > 1:
+                tuned = load_settings('transegen')
+                limits['transegen'] = min(
+                    self.pool_size - 1, tuned['workers'] if tuned else self.pool_size
+                )
+        self.limits = limits
+        self._pool = None
+        self._jobs = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+    
+    def _get_pool(self):
+        """Crea el pool al enviar el primer trabajo"""
+        with self._lock:
+            if self._pool is None:
+                self._pool = WorkerPool(
+                    size=self.pool_size, limits=self.limits, timeouts=self.timeouts,
+                    memory_limit=self.memory_limit
+                )
+                for modulo in self._pool.modulos:
+                    # Los hilos guardados valen para la cantidad de trabajadores
+                    # con la que se midieron: con otra cantidad (p. ej. --workers
+                    # explícito) manda esa y no se aplican
+                    tuned = load_settings(modulo)
+                    if (tuned and tuned.get('hilos_ocr')
+                            and tuned.get('workers') == self.workers_for(modulo)):
+                        self._pool.task_options[modulo] = {'hilos_ocr': tuned['hilos_ocr']}
+            return self._pool
+    
+    def autotune(self, modulo, **kwargs):
+        """Inicia el ajuste automático de la cantidad de trabajadores (ver comun.autotune)
+        
+        Pensado para un planificador dedicado a un lote: cambia el tamaño
+        de todo el pool.
+        """
+        return Autotuner(self._get_pool(), modulo, **kwargs).start()
+    
+    def submit_batch(self, modulo, pdf_files, priority=None, journal=None,
+                     collector=None, tracer=None, prefilled=None, costs=None, options=None,
+                     prefetch=None):
+        """Envía un lote y retorna su Job (no bloquea)
+        
+        Con un diario (comun.journal.BatchJournal) los archivos ya completados
+        se toman de él y los nuevos se registran al terminar. Con la variable
+        de entorno de comun.metrics el trabajo mide las etapas de cada archivo
+        y con la de comun.tracing las registra en una traza (o se pasan
+        `collector` / `tracer` directamente). `prefilled` ({ruta: registro})
+        son resultados ya conocidos que no se envían al pool, p. ej. los
+        archivos rechazados por el análisis previo (comun.preflight).
+        
+        Con la política MAS_BARATOS_PRIMERO los archivos se despachan por
+        costo estimado (`costs` = {ruta: costo}, o el tamaño del archivo si no
+        se indica), así los documentos livianos terminan primero. `options` se
+        aplica al modelo en cada trabajador (p. ej. {'perfil_ocr': 'rapido'}).
+        Con techo de memoria, cada archivo lleva su memoria estimada (tamaño y
+        resolución del OCR) para el control de admisión del pool.
+        
+        Con `prefetch` (bytes) un lector en hilos lee los próximos PDFs a
+        memoria y cada archivo se envía al pool recién cuando está leído, así
+        los trabajadores no esperan la red (ver comun.prefetch).
+        """
+        if priority is None:
+            priority = DEFAULT_PRIORITIES.get(modulo, 0)
+        if collector is None and metrics.requested():
+            collector = metrics.BatchMetrics()
+        if tracer is None and tracing.requested():
+            tracer = tracing.Tracer()
+        job = Job(next(self._ids), modulo, pdf_files, priority, journal, collector, tracer)
+        with self._lock:
+            self._jobs.append(job)
+        
+        done = journal.load() if journal is not None else {}
+        if prefilled:
+            done = {**prefilled, **done}
+        pool = self._get_pool() if len(done) < job.total else None
+        indexes = range(job.total)
+        costs_by_index = {}
+        sizes = None
+        if pool is not None and (
+            self.memory_limit is not None
+            or (self.policy == MAS_BARATOS_PRIMERO and costs is None)
+        ):
+            sizes = quick_costs(p for p in job.pdf_files if str(p) not in done)
+        memory = {}
+        if sizes is not None and self.memory_limit is not None:
+            memory = {
+                ruta: estimate_task_memory(modulo, size, options) for ruta, size in sizes.items()
+            }
+        job.memory = memory
+        if pool is not None and self.policy == MAS_BARATOS_PRIMERO:
+            if costs is None:
+                costs = sizes
+            costs_by_index = {i: costs.get(str(p), 0) for i, p in enumerate(job.pdf_files)}
+            # También se envían en ese orden, así el primero despachado ya es el más barato
+            indexes = sorted(indexes, key=costs_by_index.get)
+        if pool is not None and prefetch:
+            pending = [i for i in indexes if str(job.pdf_files[i]) not in done]
+            job.prefetcher = Prefetcher(
+                [job.pdf_files[i] for i in pending], prefetch, auto_release=False,
+                idle=lambda: pool.pending_count() == 0
+            )
+        for index in indexes:
+            pdf_path = job.pdf_files[index]
+            if str(pdf_path) in done:
+                job._set_result(index, done[str(pdf_path)], from_journal=True)
+                continue
+            if job.prefetcher is not None:
+                continue
+            cost = costs_by_index.get(index, 0)
+            future = pool.submit(
+                modulo, pdf_path, priority=priority, metrics=job.metrics, tracer=job.tracer,
+                cost=cost, options=options, memory=memory.get(str(pdf_path), 0)
+            )
+            future.add_done_callback(self._make_callback(job, index))
+            job._futures.append(future)
+        if job.prefetcher is not None:
+            threading.Thread(
+                target=self._feed,
+                args=(job, pool, pending, priority, costs_by_index, options),
+                daemon=True
+            ).start()
+        if job.total == 0:
+            job._finish(COMPLETADO)
+        return job
+    
+    def _feed(self, job, pool, indexes, priority, costs_by_index, options):
+        """Envía al pool cada archivo del trabajo a medida que el prefetch lo lee"""
+        prefetcher = job.prefetcher
+        for index, (pdf_path, data) in zip(indexes, prefetcher):
+            if job.is_done():
+                break
+            try:
+                future = pool.submit(
+                    job.modulo, pdf_path, data=data, priority=priority, metrics=job.metrics,
+                    tracer=job.tracer, cost=costs_by_index.get(index, 0), options=options,
+                    memory=job.memory.get(pdf_path, 0)
+                )
+            except RuntimeError:
+                # El pool se cerró (cierre de la aplicación)
+                break
+            nbytes = len(data) if data is not None else 0
+            future.add_done_callback(lambda _, n=nbytes: prefetcher.release(n))
+            future.add_done_callback(self._make_callback(job, index))
+            job._futures.append(future)
+    
+    @staticmethod
+    def _make_callback(job, index):
+        """Crea el callback que guarda el resultado de un archivo"""
+        def callback(future):
+            if not future.cancelled():
+                job._set_result(index, future.result())
+        return callback
+    
+    def jobs(self):
+        """Retorna todos los trabajos (más recientes al final)"""
+        with self._lock:
+            return list(self._jobs)
+    
+    def workers_for(self, modulo):
+        """Cantidad de trabajadores que puede ocupar un módulo a la vez"""
+        return min(self.limits.get(modulo, self.pool_size), self.pool_size)
+    
+    def workers_busy(self):
+        """Retorna (trabajadores ocupados, total)"""
+        if self._pool is None:
+            return 0, self.pool_size
+        return self._pool.busy_count(), self.pool_size
+    
+    def memory_waits(self):
+        """Despachos postergados por falta de memoria (control de admisión)"""
+        if self._pool is None:
+            return 0
+        return self._pool.admission_waits
+    
+    def shutdown(self):
+        """Detiene el pool (al cerrar la aplicación)"""
+        for job in self.jobs():
+            if not job.is_done():
+                job.cancel()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
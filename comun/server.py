@@ -0,0 +1,152 @@
+import base64
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+from comun.modulos import MODULOS
+from comun.workers import PoolFullError, WorkerPool
+
+
+# Tamaño máximo aceptado por solicitud (PDF o lote)
+MAX_BODY_BYTES = 200 * 1024 * 1024
+
+
+class ExtractionRequestHandler(BaseHTTPRequestHandler):
+    """Atiende las solicitudes HTTP del servicio de extracción
+    
+    GET  /salud                    estado del servicio
+    POST /extraer/<modulo>         un PDF: cuerpo application/pdf (nombre en
+                                   ?nombre=) o JSON {"ruta": "..."}
+    POST /lote/<modulo>            JSON {"rutas": [...]} y/o
+                                   {"documentos": [{"nombre", "contenido_base64"}]}
+    """
+    
+    server_version = 'ExtractorPDF/1.0'
+    
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+    
+    def _send_json(self, status, payload, headers=None):
+        """Envía una respuesta JSON"""
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _read_body(self):
+        """Lee el cuerpo de la solicitud"""
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError(f"La solicitud supera {MAX_BODY_BYTES} bytes")
+        return self.rfile.read(length)
+    
+    def _route(self):
+        """Retorna las partes de la ruta y los parámetros de la URL"""
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        return parts, parse_qs(url.query)
+    
+    def do_GET(self):
+        parts, _ = self._route()
+        if parts == ['salud']:
+            pool = self.server.pool
+            self._send_json(200, {
+                'estado': 'ok',
+                'modulos': pool.modulos,
+                'trabajadores': pool.size,
+                'ocupados': pool.busy_count(),
+                'en_espera': pool.pending_count(),
+            })
+        else:
+            self._send_json(404, {'error': 'Ruta no encontrada'})
+    
+    def do_POST(self):
+        parts, query = self._route()
+        if len(parts) != 2 or parts[0] not in ('extraer', 'lote') or parts[1] not in MODULOS:
+            self._send_json(404, {'error': 'Ruta no encontrada'})
+            return
+        
+        accion, modulo = parts
+        try:
+            body = self._read_body()
+            if accion == 'extraer':
+                futures = [self._submit_single(modulo, body, query)]
+            else:
+                futures = self._submit_batch(modulo, body)
+        except PoolFullError as e:
+            self._send_json(503, {'error': f"Servicio ocupado: {e}"}, {'Retry-After': '1'})
+            return
+        except (ValueError, KeyError, TypeError) as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        
+        records = [future.result() for future in futures]
+        if accion == 'extraer':
+            self._send_json(200, {'registro': records[0]})
+        else:
+            self._send_json(200, {'registros': records})
+    
+    def _submit_single(self, modulo, body, query):
+        """Encola un único documento (bytes del PDF o ruta en el servidor)"""
+        content_type = self.headers.get('Content-Type', '')
+        if content_type.startswith('application/json'):
+            ruta = json.loads(body)['ruta']
+            return self.server.pool.submit(modulo, ruta)
+        if not body:
+            raise ValueError("La solicitud no contiene un PDF")
+        nombre = query.get('nombre', ['documento.pdf'])[0]
+        return self.server.pool.submit(modulo, nombre, data=body)
+    
+    def _submit_batch(self, modulo, body):
+        """Encola un lote de documentos; si el lote no cabe en la cola se rechaza completo"""
+        payload = json.loads(body)
+        items = [(ruta, None) for ruta in payload.get('rutas', [])]
+        for doc in payload.get('documentos', []):
+            items.append((doc['nombre'], base64.b64decode(doc['contenido_base64'])))
+        if not items:
+            raise ValueError("El lote está vacío")
+        
+        pool = self.server.pool
+        if pool.max_pending is not None and pool.pending_count() + len(items) > pool.max_pending:
+            raise PoolFullError(f"El lote de {len(items)} documentos no cabe en la cola")
+        return [pool.submit(modulo, nombre, data=data) for nombre, data in items]
+
+
+class ExtractionServer(ThreadingHTTPServer):
+    """Servidor HTTP local con un pool de trabajadores caliente"""
+    
+    daemon_threads = True
+    
+    def __init__(self, pool, host='127.0.0.1', port=8765, verbose=False):
+        super().__init__((host, port), ExtractionRequestHandler)
+        self.pool = pool
+        self.verbose = verbose
+
+
+def serve(host='127.0.0.1', port=8765, workers=None, modulos=None, max_pending=256,
+          timeout=None, verbose=False, log=None):
+    """Inicia el servicio y atiende solicitudes hasta Ctrl+C
+    
+    Si un trabajador muere durante un documento, la solicitud responde con
+    un registro de error y el trabajador se reemplaza; con `timeout`
+    (segundos) lo mismo ocurre con un documento que lo supera.
+    """
+    log = log or (lambda message: None)
+    modulos = list(modulos or MODULOS)
+    timeouts = {modulo: timeout for modulo in modulos} if timeout else None
+    pool = WorkerPool(size=workers, modulos=modulos, max_pending=max_pending, timeouts=timeouts)
+    server = ExtractionServer(pool, host, port, verbose)
+    log(f"Servicio de extracción en http://{host}:{server.server_port} "
+        f"({pool.size} trabajadores: {', '.join(pool.modulos)})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        log("Servicio detenido")
+    finally:
+        server.server_close()
+        pool.shutdown()
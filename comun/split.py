@@ -0,0 +1,215 @@
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from comun.archives import open_pdf, with_pages
+from comun.classify import MIN_TEXT_CHARS, header_clip, header_ocr
+from comun.ocr_profiles import get_profile
+
+
+# Encabezado con el que empieza cada resolución (TRANS-SEGEN-UPCH-2025-CU-XXXX)
+HEADER_PATTERN = re.compile(r'TRANS[-\s]?SEGEN[-\s]?UPCH', re.IGNORECASE)
+NUMBER_PATTERN = re.compile(
+    r'TRANS[-\s]?SEGEN[-\s]?UPCH[-\s]?(\d{4})[-\s]?CU[-\s]?(\d{4})', re.IGNORECASE
+)
+
+# Con menos páginas que esto la búsqueda de encabezados se hace en este proceso
+SPLIT_MIN_PARALLEL_PAGES = 24
+
+# Páginas revisadas por tarea en la búsqueda paralela
+SPLIT_PAGE_CHUNK = 16
+
+# Documentos procesados por tarea (varios por tarea amortizan el envío)
+SPLIT_DOCUMENT_CHUNK = 4
+
+# Modelos ya creados en cada proceso del pool (se reutilizan entre tareas)
+_models = {}
+
+
+def page_header(page, profile=None):
+    """Encabezado de resolución de una página mirando solo su franja superior
+    
+    Usa la capa de texto de esa franja; si la página no tiene texto
+    (escaneada) hace un OCR de baja resolución de ella con el perfil de OCR
+    del lote. Retorna el número ('2025-0001'), True si hay encabezado pero
+    el número no se pudo leer, o None si no hay encabezado.
+    """
+    if len(page.get_text().strip()) >= MIN_TEXT_CHARS:
+        # Con texto: solo el de la franja superior (el número también puede citarse en el cuerpo)
+        text = page.get_text(clip=header_clip(page))
+    else:
+        text = header_ocr(page, profile)
+    match = NUMBER_PATTERN.search(text)
+    if match:
+        return f"{match.group(1)}-{match.group(2)}"
+    return True if HEADER_PATTERN.search(text) else None
+
+
+def _scan_pages(pdf_path, start, stop, perfil_ocr=None):
+    """Retorna [(página, encabezado)] de las páginas de [start, stop) con encabezado"""
+    profile = get_profile(perfil_ocr) if perfil_ocr else None
+    doc = open_pdf(pdf_path)
+    try:
+        found = []
+        for page_num in range(start, min(stop, len(doc))):
+            try:
+                header = page_header(doc[page_num], profile)
+                if header is not None:
+                    found.append((page_num, header))
+            except Exception:
+                # Una página que no se puede leer no corta el documento
+                continue
+        return found
+    finally:
+        doc.close()
+
+
+def _process_chunk(modulo_nombre, options, pdf_paths):
+    """Procesa un grupo de documentos (se ejecuta en un proceso del pool)
+    
+    Retorna (registros, páginas con OCR, segundos de tesseract) del grupo.
+    """
+    from comun.modulos import get_modulo
+    
+    model = _models.get(modulo_nombre)
+    if model is None:
+        model = get_modulo(modulo_nombre).create_model()
+        model.warm_up()
+        _models[modulo_nombre] = model
+    if hasattr(model, 'configure'):
+        model.configure(options or {})
+    pages, seconds = getattr(model, 'ocr_pages', 0), getattr(model, 'ocr_seconds', 0.0)
+    records = [model.process_pdf(pdf_path) for pdf_path in pdf_paths]
+    return (
+        records,
+        getattr(model, 'ocr_pages', 0) - pages,
+        getattr(model, 'ocr_seconds', 0.0) - seconds,
+    )
+
+
+class DocumentSplitter:
+    """Divide PDFs con varias resoluciones escaneadas juntas y las procesa en paralelo
+    
+    split() busca el encabezado de cada resolución página por página y
+    reemplaza cada PDF con varias por rutas con su rango de páginas
+    ('lote.pdf#p3-4', ver comun.archives.with_pages); process() extrae una
+    fila por ruta repartiendo los documentos entre `workers` procesos.
+    `perfil_ocr` es el perfil con el que se leen los encabezados escaneados;
+    `ocr_pages` y `ocr_seconds` suman el OCR de los documentos procesados.
+    """
+    
+    def __init__(self, workers=None, perfil_ocr=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.perfil_ocr = perfil_ocr
+        self.ocr_pages = 0
+        self.ocr_seconds = 0.0
+        self._executor = None
+    
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context('spawn')
+            )
+        return self._executor
+    
+    def find_documents(self, pdf_path):
+        """Retorna los rangos [(inicio, fin)] de las resoluciones de un PDF (páginas desde 0)
+        
+        Una página con encabezado empieza una resolución, salvo que repita el
+        número de la resolución en curso (membrete en todas las páginas). Con
+        una resolución abierta, un encabezado sin número legible cuenta como
+        la misma: solo un número legible y distinto corta el documento.
+        """
+        doc = open_pdf(pdf_path)
+        try:
+            total = len(doc)
+        finally:
+            doc.close()
+        if total == 0:
+            return []
+        if self.workers <= 1 or total < SPLIT_MIN_PARALLEL_PAGES:
+            headers = _scan_pages(pdf_path, 0, total, self.perfil_ocr)
+        else:
+            executor = self._get_executor()
+            futures = [
+                executor.submit(
+                    _scan_pages, pdf_path, start, start + SPLIT_PAGE_CHUNK, self.perfil_ocr
+                )
+                for start in range(0, total, SPLIT_PAGE_CHUNK)
+            ]
+            headers = [found for future in futures for found in future.result()]
+        starts = []
+        # Número de la resolución abierta (True si aún no se pudo leer)
+        current = None
+        for page_num, header in headers:
+            if current is None:
+                starts.append(page_num)
+                current = header
+            elif header is not True:
+                if current is not True and header != current:
+                    starts.append(page_num)
+                current = header
+        if not starts:
+            return [(0, total)]
+        # Las páginas antes del primer encabezado (p. ej. una carátula) no son
+        # de ninguna resolución: el primer rango empieza en ese encabezado
+        bounds = starts + [total]
+        return list(zip(bounds, bounds[1:]))
+    
+    def split(self, pdf_files, progress=None):
+        """Reemplaza cada PDF con varias resoluciones por las rutas de cada una
+        
+        Un PDF con una sola (o sin encabezados reconocibles) queda igual.
+        """
+        result = []
+        for n, pdf_path in enumerate(pdf_files, 1):
+            pdf_path = str(pdf_path)
+            try:
+                ranges = self.find_documents(pdf_path)
+            except Exception:
+                # El error aparecerá al procesar el archivo completo
+                ranges = []
+            if len(ranges) <= 1:
+                result.append(pdf_path)
+            else:
+                result.extend(with_pages(pdf_path, start, stop) for start, stop in ranges)
+            if progress:
+                progress(n)
+        return result
+    
+    def process(self, modulo_nombre, pdf_paths, options=None):
+        """Procesa los documentos en paralelo; genera (ruta, registro) en el mismo orden"""
+        pdf_paths = list(pdf_paths)
+        if self.workers <= 1 or len(pdf_paths) <= 1:
+            yield from zip(pdf_paths, self._take(_process_chunk(modulo_nombre, options, pdf_paths)))
+            return
+        executor = self._get_executor()
+        chunks = [
+            pdf_paths[i:i + SPLIT_DOCUMENT_CHUNK]
+            for i in range(0, len(pdf_paths), SPLIT_DOCUMENT_CHUNK)
+        ]
+        futures = [
+            executor.submit(_process_chunk, modulo_nombre, options, chunk) for chunk in chunks
+        ]
+        for chunk, future in zip(chunks, futures):
+            yield from zip(chunk, self._take(future.result()))
+    
+    def _take(self, result):
+        """Suma el OCR de un grupo procesado y retorna sus registros"""
+        records, pages, seconds = result
+        self.ocr_pages += pages
+        self.ocr_seconds += seconds
+        return records
+    
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.close()
+
@@ -0,0 +1,128 @@
+import importlib
+import json
+import os
+import sys
+import threading
+import time
+
+from comun.config import app_dir
+
+
+# Módulos pesados de cada módulo de la aplicación (se cargan recién al usarlos)
+HEAVY_IMPORTS = {
+    'estudiantes': [
+        'fitz',
+        'modulo1.model',
+        'modulo1.view',
+        'modulo1.controller',
+    ],
+    'transegen': [
+        'fitz',
+        'PIL.Image',
+        'pytesseract',
+        'modulo2.model_transegen',
+        'modulo2.view_transegen',
+        'modulo2.controller_transegen',
+    ],
+    'exportacion': [
+        'openpyxl',
+        'openpyxl.styles',
+    ],
+}
+
+
+class StartupReport:
+    """Mide el arranque: tiempo hasta la primera ventana y costo de cada import
+    
+    El último reporte se guarda en <datos>/inicio.json; con la variable
+    EXTRACTOR_PDF_REPORTE_INICIO=1 también se muestra en la consola.
+    """
+    
+    def __init__(self, inicio):
+        self.inicio = inicio
+        self.eventos = []
+        self.imports = []
+        self._lock = threading.Lock()
+    
+    def mark(self, evento):
+        """Registra un hito del arranque (segundos desde el inicio)"""
+        with self._lock:
+            self.eventos.append((evento, time.perf_counter() - self.inicio))
+    
+    def timed_import(self, module_name):
+        """Importa un módulo midiendo cuánto tarda (0 si ya estaba cargado)"""
+        already_loaded = module_name in sys.modules
+        t0 = time.perf_counter()
+        module = importlib.import_module(module_name)
+        if not already_loaded:
+            with self._lock:
+                self.imports.append((module_name, time.perf_counter() - t0))
+        return module
+    
+    def import_group(self, grupo):
+        """Importa todos los módulos pesados de un grupo"""
+        for module_name in HEAVY_IMPORTS[grupo]:
+            self.timed_import(module_name)
+    
+    def preload_in_background(self, grupos=None):
+        """Precarga los módulos pesados en un hilo tras mostrar el menú
+        
+        Si el usuario abre un módulo antes de que termine, el import del hilo
+        principal espera al de este hilo (lock de importación de Python).
+        """
+        def preload():
+            for grupo in grupos or HEAVY_IMPORTS:
+                try:
+                    self.import_group(grupo)
+                except Exception:
+                    # El error aparecerá al abrir el módulo correspondiente
+                    pass
+            self.mark('precarga_completa')
+            self.save()
+        
+        thread = threading.Thread(target=preload, daemon=True)
+        thread.start()
+        return thread
+    
+    def as_dict(self):
+        """Retorna el reporte como diccionario"""
+        with self._lock:
+            return {
+                'eventos': {evento: round(t, 4) for evento, t in self.eventos},
+                'imports': [
+                    {'modulo': name, 'segundos': round(t, 4)}
+                    for name, t in sorted(self.imports, key=lambda item: -item[1])
+                ],
+            }
+    
+    def save(self):
+        """Guarda el reporte y, si se pidió, lo muestra en la consola"""
+        report = self.as_dict()
+        try:
+            with open(app_dir() / 'inicio.json', 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=2)
+        except OSError:
+            pass
+        if os.environ.get('EXTRACTOR_PDF_REPORTE_INICIO'):
+            print(format_report(report), file=sys.stderr, flush=True)
+
+
+def format_report(report):
+    """Formatea un reporte de arranque para la consola"""
+    lines = ["Arranque:"]
+    for evento, t in report['eventos'].items():
+        lines.append(f"  {evento:<28} {t * 1000:8.1f} ms")
+    if report['imports']:
+        lines.append("Imports (más costosos primero):")
+        for item in report['imports']:
+            lines.append(f"  {item['modulo']:<28} {item['segundos'] * 1000:8.1f} ms")
+    return '\n'.join(lines)
+
+
+def load_last_report():
+    """Retorna el último reporte guardado (o None)"""
+    try:
+        with open(app_dir() / 'inicio.json', 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,143 @@
+import itertools
+import multiprocessing
+import os
+import sqlite3
+import threading
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from comun.archives import display_name
+from comun.modulos import get_modulo
+
+
+# Cantidad de documentos por lote al reparsear en paralelo
+REPARSE_CHUNK = 500
+
+# Por debajo de esta cantidad no vale la pena levantar procesos
+REPARSE_MIN_PARALLEL = 2000
+
+
+class TextArchive:
+    """Archivo comprimido (SQLite + zlib) con el texto crudo de cada documento"""
+    
+    def __init__(self, db_path, commit_every=50):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.commit_every = commit_every
+        self._pending = 0
+        self._lock = threading.Lock()
+        
+        self.conn = sqlite3.connect(str(self.db_path), timeout=30, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS textos ("
+            " clave TEXT PRIMARY KEY,"
+            " modulo TEXT NOT NULL,"
+            " archivo TEXT NOT NULL,"
+            " texto BLOB NOT NULL)"
+        )
+        self.conn.commit()
+    
+    def store(self, modulo, pdf_path, text, archivo=None):
+        """Guarda (o reemplaza) el texto de un documento"""
+        clave = f"{modulo}:{pdf_path}"
+        archivo = archivo or display_name(pdf_path)
+        blob = zlib.compress(text.encode('utf-8'), 6)
+        
+        with self._lock:
+            # El upsert conserva el rowid, así se mantiene el orden original
+            self.conn.execute(
+                "INSERT INTO textos (clave, modulo, archivo, texto) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(clave) DO UPDATE SET archivo=excluded.archivo, texto=excluded.texto",
+                (clave, modulo, archivo, blob)
+            )
+            self._pending += 1
+            if self._pending >= self.commit_every:
+                self.conn.commit()
+                self._pending = 0
+    
+    def get_text(self, modulo, pdf_path):
+        """Retorna el texto archivado de un documento (o None)"""
+        row = self.conn.execute(
+            "SELECT texto FROM textos WHERE clave = ?", (f"{modulo}:{pdf_path}",)
+        ).fetchone()
+        return zlib.decompress(row[0]).decode('utf-8') if row else None
+    
+    def iter_blobs(self, modulo):
+        """Itera (archivo, texto comprimido) en el orden en que se archivaron"""
+        cursor = self.conn.execute(
+            "SELECT archivo, texto FROM textos WHERE modulo = ? ORDER BY rowid", (modulo,)
+        )
+        yield from cursor
+    
+    def iter_texts(self, modulo):
+        """Itera (archivo, texto) en el orden en que se archivaron"""
+        for archivo, blob in self.iter_blobs(modulo):
+            yield archivo, zlib.decompress(blob).decode('utf-8')
+    
+    def count(self, modulo=None):
+        """Retorna la cantidad de documentos archivados"""
+        if modulo is None:
+            return self.conn.execute("SELECT COUNT(*) FROM textos").fetchone()[0]
+        return self.conn.execute(
+            "SELECT COUNT(*) FROM textos WHERE modulo = ?", (modulo,)
+        ).fetchone()[0]
+    
+    def flush(self):
+        """Confirma las escrituras pendientes"""
+        with self._lock:
+            self.conn.commit()
+            self._pending = 0
+    
+    def close(self):
+        """Cierra el archivo confirmando lo pendiente"""
+        self.flush()
+        self.conn.close()
+
+
+def _parse_chunk(modulo_nombre, chunk):
+    """Aplica los parsers de campos a un lote de textos comprimidos"""
+    model = get_modulo(modulo_nombre).create_model()
+    records = []
+    for archivo, blob in chunk:
+        text = zlib.decompress(blob).decode('utf-8')
+        if text:
+            records.append(model.extract_data_from_text(text, archivo))
+    return records
+
+
+def _chunks(iterable, size):
+    """Agrupa un iterable en listas de tamaño fijo"""
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def reparse_archive(archive, modulo_nombre, workers=None):
+    """Vuelve a ejecutar solo los parsers de campos sobre el texto archivado
+    
+    No abre ningún PDF ni ejecuta OCR: solo descomprime y aplica
+    extract_data_from_text del modelo del módulo.
+    """
+    total = archive.count(modulo_nombre)
+    workers = workers or os.cpu_count() or 1
+    
+    if workers <= 1 or total < REPARSE_MIN_PARALLEL:
+        return _parse_chunk(modulo_nombre, archive.iter_blobs(modulo_nombre))
+    
+    records = []
+    with ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context('spawn')
+    ) as executor:
+        chunks = _chunks(archive.iter_blobs(modulo_nombre), REPARSE_CHUNK)
+        for chunk_records in executor.map(_parse_chunk, itertools.repeat(modulo_nombre), chunks):
+            records.extend(chunk_records)
+    return records
+
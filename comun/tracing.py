@@ -0,0 +1,94 @@
+import json
+import os
+import threading
+import time
+
+from comun.config import app_dir
+
+
+# Con esta variable la interfaz guarda una traza de cada lote en
+# <datos>/trazas (en la línea de comandos se usa --traza)
+ENV_VAR = 'EXTRACTOR_PDF_TRAZA'
+
+
+def now_us():
+    """Hora actual en microsegundos (común a todos los procesos de la máquina)"""
+    return time.time_ns() // 1000
+
+
+class Tracer:
+    """Eventos de una traza en formato Chrome (chrome://tracing, Perfetto)
+    
+    Cada etapa de cada archivo es un intervalo ('X') con el proceso e hilo
+    que la ejecutó; la espera en la cola del pool es un intervalo asíncrono
+    por documento, así se ven trabajadores ociosos y colas de OCR.
+    """
+    
+    def __init__(self):
+        self.events = []
+        self._named = set()
+        self._lock = threading.Lock()
+    
+    def span(self, name, cat, start_us, dur_us, args=None, pid=None, tid=None):
+        """Registra un intervalo completo"""
+        event = {
+            'name': name, 'cat': cat, 'ph': 'X',
+            'ts': start_us, 'dur': dur_us,
+            'pid': pid if pid is not None else os.getpid(),
+            'tid': tid if tid is not None else threading.get_native_id(),
+        }
+        if args:
+            event['args'] = args
+        with self._lock:
+            self.events.append(event)
+    
+    def async_span(self, name, cat, span_id, start_us, end_us, args=None):
+        """Registra un intervalo asíncrono (se dibuja en su propia fila)"""
+        base = {'name': name, 'cat': cat, 'id': span_id, 'pid': os.getpid(), 'tid': 0}
+        begin = dict(base, ph='b', ts=start_us)
+        if args:
+            begin['args'] = args
+        with self._lock:
+            self.events.append(begin)
+            self.events.append(dict(base, ph='e', ts=end_us))
+    
+    def name_process(self, name, pid=None):
+        """Pone nombre a un proceso en el visor (una sola vez por proceso)"""
+        pid = pid if pid is not None else os.getpid()
+        with self._lock:
+            if pid in self._named:
+                return
+            self._named.add(pid)
+            self.events.append({
+                'name': 'process_name', 'ph': 'M', 'pid': pid, 'tid': 0,
+                'args': {'name': name},
+            })
+    
+    def take(self):
+        """Retorna los eventos (para enviarlos a otro proceso) y los vacía"""
+        with self._lock:
+            events, self.events = self.events, []
+        return events
+    
+    def extend(self, events):
+        """Agrega los eventos de otro proceso (ver take)"""
+        with self._lock:
+            self.events.extend(events)
+    
+    def save(self, path):
+        """Guarda la traza en JSON (formato de eventos de Chrome)"""
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e.get('ts', 0))
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return str(path)
+
+
+def requested():
+    """Verifica si se pidió trazar los lotes de la interfaz (variable de entorno)"""
+    return bool(os.environ.get(ENV_VAR))
+
+
+def report(tracer, nombre):
+    """Guarda la traza en <datos>/trazas/<nombre>.json y retorna la ruta"""
+    return tracer.save(app_dir('trazas') / f"{nombre}.json")
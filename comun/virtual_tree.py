@@ -0,0 +1,117 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+# Alto de fila por defecto de ttk.Treeview si el tema no lo define
+DEFAULT_ROW_HEIGHT = 20
+
+
+class VirtualTreeview:
+    """Vista previa virtualizada sobre un ttk.Treeview
+    
+    Los datos se guardan en una lista de Python y el Treeview solo contiene
+    las filas visibles, que se reutilizan al desplazarse. Agregar filas no
+    toca el widget: el redibujado se agrupa en uno por cuadro, así cargar o
+    mostrar decenas de miles de filas es instantáneo.
+    """
+    
+    def __init__(self, tree, scrollbar, frame_ms=16):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.frame_ms = frame_ms
+        self.rows = []
+        self.first = 0
+        self._items = []
+        self._render_pending = False
+        
+        row_height = ttk.Style().lookup('Treeview', 'rowheight')
+        self.row_height = int(row_height) if row_height else DEFAULT_ROW_HEIGHT
+        
+        self.scrollbar.config(command=self.yview)
+        self.tree.config(yscrollcommand='')
+        self.tree.bind('<Configure>', lambda event: self._schedule_render())
+        self.tree.bind('<MouseWheel>', self._on_mousewheel)
+        self.tree.bind('<Button-4>', lambda event: self.yview('scroll', -3, 'units'))
+        self.tree.bind('<Button-5>', lambda event: self.yview('scroll', 3, 'units'))
+        self._schedule_render()
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def visible_count(self):
+        """Cantidad de filas que caben en el alto actual del widget"""
+        height = self.tree.winfo_height()
+        if height <= 1:
+            # Todavía no se dibujó: usar el alto configurado
+            return int(self.tree.cget('height'))
+        # Una fila menos por el encabezado
+        return max(1, height // self.row_height - 1)
+    
+    def append(self, rows):
+        """Agrega filas (text, values) al final"""
+        self.rows.extend(rows)
+        self._schedule_render()
+    
+    def set_rows(self, rows, keep_position=False):
+        """Reemplaza todas las filas (opcionalmente sin volver al inicio)"""
+        self.rows = list(rows)
+        if not keep_position:
+            self.first = 0
+        self._schedule_render()
+    
+    def clear(self):
+        """Elimina todas las filas"""
+        self.set_rows([])
+    
+    def yview(self, *args):
+        """Comando de la barra de desplazamiento (moveto / scroll)"""
+        visible = self.visible_count()
+        max_first = max(0, len(self.rows) - visible)
+        if args and args[0] == 'moveto':
+            self.first = int(float(args[1]) * len(self.rows))
+        elif args and args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= visible
+            self.first += step
+        self.first = min(max(0, self.first), max_first)
+        self._render()
+    
+    def _on_mousewheel(self, event):
+        """Desplaza con la rueda del mouse (Windows / macOS)"""
+        self.yview('scroll', -3 if event.delta > 0 else 3, 'units')
+        return 'break'
+    
+    def _schedule_render(self):
+        """Agrupa los cambios en un solo redibujado por cuadro"""
+        if not self._render_pending:
+            self._render_pending = True
+            self.tree.after(self.frame_ms, self._render)
+    
+    def _render(self):
+        """Materializa solo las filas visibles"""
+        self._render_pending = False
+        try:
+            visible = self.visible_count()
+        except tk.TclError:
+            # La ventana se cerró
+            return
+        total = len(self.rows)
+        self.first = min(self.first, max(0, total - visible))
+        
+        # Ajustar la cantidad de filas reutilizables del widget
+        needed = min(visible, total)
+        while len(self._items) < needed:
+            self._items.append(self.tree.insert('', tk.END, text=''))
+        if len(self._items) > needed:
+            self.tree.delete(*self._items[needed:])
+            del self._items[needed:]
+        
+        for offset, item in enumerate(self._items):
+            text, values = self.rows[self.first + offset]
+            self.tree.item(item, text=text, values=values)
+        
+        if total:
+            self.scrollbar.set(self.first / total, (self.first + needed) / total)
+        else:
+            self.scrollbar.set(0.0, 1.0)
@@ -0,0 +1,241 @@
+import json
+import os
+import time
+from pathlib import Path
+
+from comun.export import append_records
+from comun.modulos import get_modulo
+
+
+# Nombre de módulo para las carpetas con documentos mezclados (ver comun.classify)
+AUTO = 'auto'
+
+
+class FolderIndex:
+    """Índice mtime/tamaño de los PDFs de una carpeta (sondeo eficiente)
+    
+    Solo se vuelve a listar una subcarpeta cuando cambia su mtime (se
+    agregaron o quitaron entradas); cada `full_scan_every` segundos se hace
+    un recorrido completo por si el sistema de archivos no actualiza el mtime
+    de las carpetas (algunos recursos de red). `skip(ruta, firma)` indica
+    los archivos que ya no hace falta revisar (ya procesados): en una
+    carpeta sin cambios no se consultan hasta el próximo recorrido
+    completo, así un sondeo sobre un recurso de red no cuesta un stat por
+    cada documento del corpus.
+    """
+    
+    def __init__(self, root, full_scan_every=60.0, skip=None):
+        self.root = str(Path(root))
+        self.full_scan_every = full_scan_every
+        self.skip = skip
+        # carpeta -> (mtime_ns, PDFs, subcarpetas)
+        self._dirs = {}
+        self._files = {}
+        self._last_full_scan = 0.0
+    
+    def scan(self):
+        """Retorna {ruta: (mtime_ns, tamaño)} de los PDFs actuales"""
+        now = time.monotonic()
+        if now - self._last_full_scan >= self.full_scan_every:
+            # Forzar el listado de todas las carpetas
+            self._dirs = {d: (None, pdfs, subdirs) for d, (_, pdfs, subdirs) in self._dirs.items()}
+            self._last_full_scan = now
+        
+        seen_dirs = set()
+        self._scan_dir(self.root, seen_dirs)
+        
+        # Olvidar carpetas eliminadas
+        for directory in list(self._dirs):
+            if directory not in seen_dirs:
+                for path in self._dirs.pop(directory)[1]:
+                    self._files.pop(path, None)
+        return self._files
+    
+    def _scan_dir(self, directory, seen_dirs):
+        """Recorre una carpeta, listándola solo si cambió"""
+        try:
+            mtime = os.stat(directory).st_mtime_ns
+        except OSError:
+            return
+        seen_dirs.add(directory)
+        previous = self._dirs.get(directory)
+        
+        changed = previous is None or previous[0] != mtime
+        if changed:
+            pdfs, subdirs = set(), []
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.name.lower().endswith('.pdf'):
+                            pdfs.add(entry.path)
+            except OSError:
+                return
+            if previous is not None:
+                for path in previous[1] - pdfs:
+                    self._files.pop(path, None)
+            self._dirs[directory] = (mtime, pdfs, subdirs)
+        else:
+            # Carpeta sin cambios: solo revisar sus archivos, que pueden
+            # seguir creciendo mientras se copian
+            _, pdfs, subdirs = previous
+        
+        for path in pdfs:
+            known = self._files.get(path)
+            if (not changed and known is not None
+                    and self.skip is not None and self.skip(path, known)):
+                continue
+            self._stat_file(path)
+        for subdir in subdirs:
+            self._scan_dir(subdir, seen_dirs)
+    
+    def _stat_file(self, path):
+        """Actualiza el mtime/tamaño de un archivo"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._files.pop(path, None)
+            return
+        self._files[path] = (st.st_mtime_ns, st.st_size)
+
+
+class WatchState:
+    """Estado persistente del modo vigilancia: archivos ya procesados"""
+    
+    def __init__(self, path):
+        self.path = Path(path)
+        self.processed = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.processed = {k: tuple(v) for k, v in json.load(f).items()}
+    
+    def is_processed(self, path, signature):
+        """Verifica si un archivo ya se procesó con el mismo mtime/tamaño"""
+        return self.processed.get(path) == signature
+    
+    def mark(self, path, signature):
+        """Marca un archivo como procesado"""
+        self.processed[path] = signature
+    
+    def save(self):
+        """Guarda el estado de forma atómica"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + '.tmp')
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.processed, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+class FolderWatcher:
+    """Vigila carpetas y extrae los PDFs nuevos a medida que llegan
+    
+    Un archivo se procesa cuando su mtime y tamaño se mantienen estables
+    durante `settle_seconds` (ya terminó de copiarse). Los resultados se
+    agregan al archivo de salida de cada módulo. En las carpetas con módulo
+    'auto' el tipo de cada documento se detecta con comun.classify.
+    """
+    
+    def __init__(self, carpetas, salida_dir, state_path, formato='jsonl',
+                 poll_interval=1.0, settle_seconds=2.0, log=None):
+        self.state = WatchState(state_path)
+        # carpetas: lista de (nombre_modulo, ruta)
+        self.carpetas = [
+            (
+                None if nombre == AUTO else get_modulo(nombre),
+                FolderIndex(ruta, skip=self.state.is_processed)
+            )
+            for nombre, ruta in carpetas
+        ]
+        self.salida_dir = Path(salida_dir)
+        self.formato = formato
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.log = log or (lambda message: None)
+        self._models = {}
+        self._pending = {}
+        self._running = False
+    
+    def output_path(self, modulo):
+        """Retorna el archivo de salida de un módulo"""
+        return self.salida_dir / f"{Path(modulo.archivo_excel).stem}.{self.formato}"
+    
+    def _model(self, modulo):
+        """Retorna (creándolo una sola vez) el modelo de un módulo"""
+        if modulo.nombre not in self._models:
+            self._models[modulo.nombre] = modulo.create_model()
+        return self._models[modulo.nombre]
+    
+    def _route(self, modulo, path):
+        """Decide qué módulo procesa un archivo (None si no se reconoce su tipo)"""
+        if modulo is not None:
+            return modulo
+        from comun.classify import classify_pdf
+        
+        nombre, _ = classify_pdf(path)
+        return get_modulo(nombre) if nombre is not None else None
+    
+    def poll(self):
+        """Revisa las carpetas una vez y procesa los archivos estables"""
+        now = time.monotonic()
+        ready = []
+        seen = set()
+        
+        for modulo, index in self.carpetas:
+            for path, signature in list(index.scan().items()):
+                seen.add(path)
+                if self.state.is_processed(path, signature):
+                    self._pending.pop(path, None)
+                    continue
+                
+                # Antirrebote: esperar a que deje de cambiar
+                pending = self._pending.get(path)
+                if pending is None or pending[0] != signature:
+                    self._pending[path] = (signature, now)
+                elif now - pending[1] >= self.settle_seconds:
+                    ready.append((modulo, path, signature))
+        
+        # Descartar pendientes que desaparecieron antes de estabilizarse
+        for path in [p for p in self._pending if p not in seen]:
+            del self._pending[path]
+        
+        results = {}
+        for modulo, path, signature in ready:
+            modulo = self._route(modulo, path)
+            del self._pending[path]
+            if modulo is None:
+                self.state.mark(path, signature)
+                self.log(f"[sin clasificar] {Path(path).name}")
+                continue
+            data = self._model(modulo).process_pdf(path)
+            results.setdefault(modulo.nombre, []).append((path, signature, data))
+            estado = " (error)" if data is not None and 'error' in data else ""
+            self.log(f"[{modulo.nombre}] {Path(path).name}{estado}")
+        
+        # Cada lote se marca y guarda apenas se escribe: si el proceso se
+        # corta, al reiniciar no se vuelven a agregar las filas ya escritas
+        for nombre, batch in results.items():
+            modulo = get_modulo(nombre)
+            records = [data for _, _, data in batch if data is not None]
+            if records:
+                append_records(records, self.output_path(modulo), modulo)
+            for path, signature, _ in batch:
+                self.state.mark(path, signature)
+            self.state.save()
+        if ready and not results:
+            self.state.save()
+        return len(ready)
+    
+    def run(self):
+        """Vigila indefinidamente hasta llamar a stop()"""
+        self._running = True
+        while self._running:
+            inicio = time.monotonic()
+            self.poll()
+            time.sleep(max(0.0, self.poll_interval - (time.monotonic() - inicio)))
+    
+    def stop(self):
+        """Detiene la vigilancia"""
+        self._running = False
@@ -0,0 +1,233 @@
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from comun.modulos import get_modulo
+
+
+# Estados de un ítem de trabajo
+PENDIENTE = 'pendiente'
+EN_CURSO = 'en_curso'
+HECHO = 'hecho'
+FALLIDO = 'fallido'
+
+
+class WorkQueue:
+    """Cola de trabajo compartida en un archivo SQLite
+    
+    Un coordinador divide la lista de PDFs en ítems; cada trabajador (proceso
+    o máquina) reclama un ítem con un arriendo (lease) que renueva mientras
+    lo procesa. Si un trabajador muere, su arriendo vence y otro trabajador
+    reclama el ítem automáticamente.
+    
+    Los vencimientos usan la hora del sistema, por lo que los relojes de las
+    máquinas deben estar sincronizados (NTP). En carpetas de red el archivo
+    depende del bloqueo de archivos del recurso compartido.
+    """
+    
+    def __init__(self, db_path, timeout=60):
+        self.db_path = Path(db_path)
+        self.conn = sqlite3.connect(str(self.db_path), timeout=timeout, isolation_level=None)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS items ("
+            " id INTEGER PRIMARY KEY,"
+            " modulo TEXT NOT NULL,"
+            " rutas TEXT NOT NULL,"
+            " estado TEXT NOT NULL DEFAULT 'pendiente',"
+            " trabajador TEXT,"
+            " vence REAL,"
+            " intentos INTEGER NOT NULL DEFAULT 0,"
+            " resultado TEXT,"
+            " error TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_items_estado ON items (estado, vence)")
+    
+    def create(self, modulo_nombre, pdf_files, item_size=20):
+        """Divide la lista de archivos en ítems de `item_size` documentos
+        
+        Las rutas se guardan absolutas: los trabajadores pueden correr en otra
+        carpeta (u otro equipo con el mismo punto de montaje).
+        """
+        get_modulo(modulo_nombre)
+        pdf_files = [os.path.abspath(str(p)) for p in pdf_files]
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            for start in range(0, len(pdf_files), item_size):
+                self.conn.execute(
+                    "INSERT INTO items (modulo, rutas) VALUES (?, ?)",
+                    (modulo_nombre, json.dumps(pdf_files[start:start + item_size]))
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return (len(pdf_files) + item_size - 1) // item_size
+    
+    def claim(self, worker_id, lease_seconds, max_attempts=3):
+        """Reclama un ítem pendiente (o con arriendo vencido)
+        
+        Retorna (id, modulo, rutas) o None si no queda trabajo disponible.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Los ítems que agotaron sus intentos se marcan como fallidos
+            self.conn.execute(
+                "UPDATE items SET estado = ?, error = 'Arriendo vencido demasiadas veces' "
+                "WHERE estado = ? AND vence < ? AND intentos >= ?",
+                (FALLIDO, EN_CURSO, now, max_attempts)
+            )
+            row = self.conn.execute(
+                "SELECT id, modulo, rutas FROM items "
+                "WHERE estado = ? OR (estado = ? AND vence < ?) "
+                "ORDER BY id LIMIT 1",
+                (PENDIENTE, EN_CURSO, now)
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    "UPDATE items SET estado = ?, trabajador = ?, vence = ?, "
+                    "intentos = intentos + 1 WHERE id = ?",
+                    (EN_CURSO, worker_id, now + lease_seconds, row[0])
+                )
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+    
+    def renew(self, item_id, worker_id, lease_seconds):
+        """Renueva el arriendo de un ítem; retorna False si ya no es nuestro"""
+        cursor = self.conn.execute(
+            "UPDATE items SET vence = ? WHERE id = ? AND trabajador = ? AND estado = ?",
+            (time.time() + lease_seconds, item_id, worker_id, EN_CURSO)
+        )
+        return cursor.rowcount == 1
+    
+    def complete(self, item_id, records):
+        """Guarda el resultado de un ítem (el primero que termina gana)"""
+        self.conn.execute(
+            "UPDATE items SET estado = ?, resultado = ?, vence = NULL "
+            "WHERE id = ? AND estado != ?",
+            (HECHO, json.dumps(records, ensure_ascii=False), item_id, HECHO)
+        )
+    
+    def has_unfinished(self):
+        """Verifica si quedan ítems pendientes o en curso"""
+        row = self.conn.execute(
+            "SELECT COUNT(*) FROM items WHERE estado IN (?, ?)", (PENDIENTE, EN_CURSO)
+        ).fetchone()
+        return row[0] > 0
+    
+    def status(self):
+        """Retorna {estado: cantidad de ítems}"""
+        return dict(self.conn.execute("SELECT estado, COUNT(*) FROM items GROUP BY estado"))
+    
+    def merged_results(self, modulo_nombre):
+        """Une los resultados de los ítems terminados en el orden original"""
+        records = []
+        cursor = self.conn.execute(
+            "SELECT resultado FROM items WHERE modulo = ? AND estado = ? ORDER BY id",
+            (modulo_nombre, HECHO)
+        )
+        for (resultado,) in cursor:
+            records.extend(json.loads(resultado))
+        return records
+    
+    def failed_files(self):
+        """Retorna las rutas de los ítems fallidos"""
+        files = []
+        for (rutas,) in self.conn.execute("SELECT rutas FROM items WHERE estado = ?", (FALLIDO,)):
+            files.extend(json.loads(rutas))
+        return files
+    
+    def close(self):
+        """Cierra la conexión"""
+        self.conn.close()
+
+
+class _LeaseKeeper(threading.Thread):
+    """Renueva el arriendo del ítem en curso mientras se procesa"""
+    
+    def __init__(self, db_path, item_id, worker_id, lease_seconds):
+        super().__init__(daemon=True)
+        self.db_path = db_path
+        self.item_id = item_id
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self._stop_event = threading.Event()
+    
+    def run(self):
+        queue = WorkQueue(self.db_path)
+        try:
+            while not self._stop_event.wait(self.lease_seconds / 3):
+                if not queue.renew(self.item_id, self.worker_id, self.lease_seconds):
+                    break
+        finally:
+            queue.close()
+    
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def run_worker(db_path, lease_seconds=300, poll_interval=2.0, exit_when_done=True, log=None):
+    """Bucle de un trabajador: reclama ítems, los procesa y guarda el resultado"""
+    log = log or (lambda message: None)
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    queue = WorkQueue(db_path)
+    models = {}
+    processed = 0
+    
+    try:
+        while True:
+            item = queue.claim(worker_id, lease_seconds)
+            if item is None:
+                if exit_when_done and not queue.has_unfinished():
+                    break
+                # Puede quedar trabajo si otro trabajador muere: esperar y reintentar
+                time.sleep(poll_interval)
+                continue
+            
+            item_id, modulo_nombre, rutas = item
+            if modulo_nombre not in models:
+                models[modulo_nombre] = get_modulo(modulo_nombre).create_model()
+            model = models[modulo_nombre]
+            
+            keeper = _LeaseKeeper(db_path, item_id, worker_id, lease_seconds)
+            keeper.start()
+            try:
+                records = []
+                for pdf_path in rutas:
+                    data = model.process_pdf(pdf_path)
+                    if data is not None:
+                        records.append(data)
+            finally:
+                keeper.stop()
+            queue.complete(item_id, records)
+            processed += len(rutas)
+            log(f"[{worker_id}] ítem {item_id}: {len(rutas)} archivos")
+    finally:
+        queue.close()
+    return processed
+
+
+def run_local_workers(db_path, processes, lease_seconds=300, log=None):
+    """Ejecuta varios trabajadores en esta máquina y espera a que terminen"""
+    ctx = multiprocessing.get_context('spawn')
+    workers = [
+        ctx.Process(target=run_worker, args=(str(db_path), lease_seconds))
+        for _ in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    if log:
+        log(f"{processes} trabajadores terminaron")
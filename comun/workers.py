@@ -0,0 +1,465 @@
+import heapq
+import itertools
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from comun import metrics
+from comun.archives import display_name
+from comun.memory import DEFAULT_WORKER_RSS, current_rss
+from comun.tracing import now_us
+from comun.modulos import get_modulo, MODULOS
+
+
+# Cada cuánto revisa el vigilante si un trabajador se colgó o murió
+WATCHDOG_INTERVAL = 0.5
+
+# Tareas de la cola de un módulo que se revisan buscando una que entre en
+# la memoria libre cuando la primera no entra
+ADMISSION_SCAN = 32
+
+
+class PoolFullError(Exception):
+    """La cola de trabajo del pool está llena (contrapresión)"""
+
+
+def _cpu_seconds():
+    """CPU del proceso y de sus hijos ya terminados (p. ej. tesseract; en Windows solo el proceso)"""
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _worker_main(worker_id, modulos, task_queue, result_queue):
+    """Proceso trabajador: carga los modelos una vez y atiende tareas"""
+    models = {}
+    for nombre in modulos:
+        model = get_modulo(nombre).create_model()
+        model.warm_up()
+        models[nombre] = model
+    result_queue.put(('ready', worker_id, None, None, None, None, 0.0, current_rss()))
+    
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        task_id, nombre, pdf_path, data, options, measure, trace = task
+        model = models[nombre]
+        # Opciones del lote (p. ej. el perfil de OCR); sin opciones, las de por defecto
+        if hasattr(model, 'configure'):
+            model.configure(options or {})
+        # Solo se mide o se traza si la tarea lo pide (ver comun.metrics)
+        collector = metrics.enable() if measure else None
+        tracer = metrics.start_tracing() if trace else None
+        cpu = _cpu_seconds()
+        try:
+            record = model.process_pdf(pdf_path, data=data)
+        except BaseException as e:
+            record = model.error_record(display_name(pdf_path), e)
+        stats = events = None
+        if collector is not None:
+            metrics.disable()
+            stats = collector.take()
+        if tracer is not None:
+            metrics.stop_tracing()
+            events = tracer.take()
+        cpu = _cpu_seconds() - cpu
+        result_queue.put(('done', worker_id, task_id, record, stats, events, cpu, current_rss()))
+
+
+class _Task:
+    """Tarea pendiente o en curso dentro del pool"""
+    
+    __slots__ = ('task_id', 'modulo', 'pdf_path', 'data', 'options', 'priority', 'metrics',
+                 'tracer', 'memory', 'submitted_us', 'started_us', 'future')
+    
+    def __init__(self, task_id, modulo, pdf_path, data, priority, metrics=None, tracer=None,
+                 options=None, memory=0):
+        self.task_id = task_id
+        self.modulo = modulo
+        self.pdf_path = pdf_path
+        self.data = data
+        self.options = options
+        self.priority = priority
+        self.metrics = metrics
+        self.tracer = tracer
+        # Memoria estimada del documento (ver comun.memory.estimate_task_memory)
+        self.memory = memory
+        self.submitted_us = now_us() if tracer is not None else 0
+        self.started_us = 0
+        self.future = Future()
+    
+    def message(self, extra_options=None):
+        """Retorna la tarea en el formato que recibe el trabajador"""
+        options = self.options
+        if extra_options:
+            options = {**extra_options, **(options or {})}
+        return (self.task_id, self.modulo, self.pdf_path, self.data, options,
+                self.metrics is not None, self.tracer is not None)
+
+
+class _Worker:
+    """Proceso trabajador y la tarea que está atendiendo"""
+    
+    def __init__(self, worker_id, process, task_queue):
+        self.worker_id = worker_id
+        self.process = process
+        self.task_queue = task_queue
+        self.task = None
+        self.started = None
+        # El plazo de un documento corre recién cuando el trabajador cargó los modelos
+        self.ready = False
+        # Se detiene al terminar su tarea actual (ver WorkerPool.resize)
+        self.retiring = False
+        # Memoria residente informada por el trabajador tras su última tarea
+        self.rss = None
+
+
+class WorkerPool:
+    """Pool de procesos 'calientes' con los modelos ya cargados
+    
+    Los trabajadores importan PyMuPDF/tesseract y crean los modelos una sola
+    vez al iniciar, así cada documento solo paga su propio procesamiento.
+    Las tareas esperan en una cola con prioridad (menor número = antes; a
+    igual prioridad, menor costo estimado = antes); si la cola supera
+    `max_pending`, submit() lanza PoolFullError. `limits`
+    ({modulo: máximo}) limita cuántos trabajadores puede ocupar un módulo a la
+    vez, para dejar capacidad libre a los trabajos livianos.
+    
+    Un vigilante reemplaza los trabajadores que mueren con un documento en
+    curso (p. ej. un fallo de MuPDF o tesseract) y lo resuelve con un
+    registro de error; con `timeouts` ({modulo: segundos}) también termina
+    y reemplaza los que superan su tiempo.
+    
+    resize() cambia la cantidad de trabajadores durante un lote y
+    `task_options` ({modulo: opciones}) agrega opciones a las tareas al
+    despacharlas (ver comun.autotune).
+    
+    Con `memory_limit` (bytes) un documento solo se despacha si la memoria
+    de este proceso y de los trabajadores, más la estimada de los
+    documentos en curso y la suya, no supera el techo; si el primero de la
+    cola no entra se busca uno más chico, y uno solo siempre se admite.
+    """
+    
+    def __init__(self, size=None, modulos=None, max_pending=None, limits=None, timeouts=None,
+                 memory_limit=None):
+        self.size = size or os.cpu_count() or 1
+        self.modulos = list(modulos or MODULOS)
+        self.max_pending = max_pending
+        self.limits = dict(limits or {})
+        self.timeouts = dict(timeouts or {})
+        self.task_options = {}
+        self.memory_limit = memory_limit
+        # Memoria estimada de los documentos en curso
+        self._reserved = 0
+        # Despachos postergados porque ningún documento entraba en la memoria libre
+        self.admission_waits = 0
+        # Documentos terminados y segundos de CPU usados en los trabajadores
+        self.completed = 0
+        self.cpu_seconds = 0.0
+        self._ctx = multiprocessing.get_context('spawn')
+        self._result_queue = self._ctx.Queue()
+        self._lock = threading.Lock()
+        self._pending = {modulo: [] for modulo in self.modulos}
+        self._tasks = {}
+        self._ids = itertools.count()
+        self._workers = {}
+        self._worker_ids = itertools.count()
+        self._closed = False
+        
+        for _ in range(self.size):
+            self._start_worker()
+        
+        self._collector = threading.Thread(target=self._collect, daemon=True)
+        self._collector.start()
+        
+        # Siempre activo: sin él, un trabajador muerto deja su documento sin resolver
+        self._stop_watchdog = threading.Event()
+        self._watchdog = threading.Thread(target=self._watch, daemon=True)
+        self._watchdog.start()
+    
+    def _start_worker(self):
+        """Inicia un proceso trabajador nuevo"""
+        worker_id = next(self._worker_ids)
+        task_queue = self._ctx.Queue()
+        process = self._ctx.Process(
+            target=_worker_main,
+            args=(worker_id, self.modulos, task_queue, self._result_queue),
+            daemon=True
+        )
+        process.start()
+        self._workers[worker_id] = _Worker(worker_id, process, task_queue)
+        return worker_id
+    
+    def submit(self, modulo, pdf_path, data=None, priority=0, metrics=None, tracer=None, cost=0,
+               options=None, memory=0):
+        """Encola un documento y retorna un Future con su registro
+        
+        Con `metrics` (comun.metrics.BatchMetrics) el trabajador mide las
+        etapas del documento y se suman a ese colector; con `tracer`
+        (comun.tracing.Tracer) sus etapas y su espera en cola van a la traza.
+        `cost` ordena las tareas de igual prioridad (las más baratas primero).
+        `options` ({nombre: valor}) se aplica al modelo del trabajador antes de
+        procesar el documento (ver TransSegenModel.configure). `memory` es la
+        memoria estimada del documento para el control de admisión.
+        """
+        if modulo not in self.modulos:
+            raise ValueError(f"El pool no tiene cargado el módulo: {modulo}")
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("El pool está cerrado")
+            pending = self._pending_total()
+            if self.max_pending is not None and pending >= self.max_pending:
+                raise PoolFullError(f"Hay {pending} documentos en espera")
+            task = _Task(
+                next(self._ids), modulo, str(pdf_path), data, priority, metrics, tracer, options,
+                memory
+            )
+            self._tasks[task.task_id] = task
+            heapq.heappush(self._pending[modulo], (priority, cost, task.task_id))
+            self._dispatch()
+        return task.future
+    
+    def resize(self, size):
+        """Cambia la cantidad de trabajadores
+        
+        Los nuevos cargan los modelos en segundo plano; al reducir se
+        detienen primero los libres y los ocupados terminan su documento.
+        """
+        size = max(1, size)
+        with self._lock:
+            if self._closed:
+                return
+            active = [w for w in self._workers.values() if not w.retiring]
+            for _ in range(size - len(active)):
+                self._start_worker()
+            excess = len(active) - size
+            # Primero los libres, luego los que terminarán antes
+            for worker in sorted(active, key=lambda w: (w.task is not None, w.started or 0)):
+                if excess <= 0:
+                    break
+                excess -= 1
+                if worker.task is None:
+                    del self._workers[worker.worker_id]
+                    worker.task_queue.put(None)
+                else:
+                    worker.retiring = True
+            self.size = size
+            self._dispatch()
+    
+    def counters(self):
+        """Retorna (documentos terminados, segundos de CPU de los trabajadores)"""
+        with self._lock:
+            return self.completed, self.cpu_seconds
+    
+    def memory_used(self):
+        """Memoria en uso estimada (bytes): este proceso, los trabajadores y los documentos en curso"""
+        with self._lock:
+            return self._memory_used()
+    
+    def _memory_used(self):
+        used = current_rss() or 0
+        for worker in self._workers.values():
+            used += worker.rss or DEFAULT_WORKER_RSS
+        return used + self._reserved
+    
+    def _pop_admissible(self, modulo, busy):
+        """Saca de la cola de un módulo la mejor tarea que entra en memoria (o None)
+        
+        Las tareas revisadas que no entran vuelven a la cola.
+        """
+        heap = self._pending[modulo]
+        if self.memory_limit is None:
+            return heapq.heappop(heap)[-1]
+        free = self.memory_limit - self._memory_used()
+        skipped = []
+        chosen = None
+        while heap and len(skipped) < ADMISSION_SCAN:
+            entry = heapq.heappop(heap)
+            task = self._tasks[entry[-1]]
+            if task.memory <= free or (busy == 0 and not skipped):
+                chosen = entry[-1]
+                break
+            skipped.append(entry)
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+        if chosen is None:
+            self.admission_waits += 1
+        return chosen
+    
+    def _pending_total(self):
+        """Cantidad de tareas en espera (con el lock tomado)"""
+        return sum(len(heap) for heap in self._pending.values())
+    
+    def pending_count(self):
+        """Retorna la cantidad de documentos en espera"""
+        with self._lock:
+            return self._pending_total()
+    
+    def busy_count(self):
+        """Retorna la cantidad de trabajadores ocupados"""
+        with self._lock:
+            return sum(1 for w in self._workers.values() if w.task is not None)
+    
+    def _dispatch(self):
+        """Asigna tareas pendientes a los trabajadores libres (con el lock tomado)
+        
+        Hay una cola con prioridad por módulo: se toma la mejor tarea entre los
+        módulos que no alcanzaron su límite.
+        """
+        idle = [w for w in self._workers.values() if w.task is None and not w.retiring]
+        if not idle:
+            return
+        
+        running = {}
+        for worker in self._workers.values():
+            if worker.task is not None:
+                running[worker.task.modulo] = running.get(worker.task.modulo, 0) + 1
+        # Módulos sin ninguna tarea que entre en la memoria libre
+        blocked = set()
+        
+        while idle:
+            candidates = [
+                (heap[0], modulo) for modulo, heap in self._pending.items()
+                if heap and modulo not in blocked
+                and running.get(modulo, 0) < self.limits.get(modulo, self.size)
+            ]
+            if not candidates:
+                break
+            _, modulo = min(candidates)
+            task_id = self._pop_admissible(modulo, sum(running.values()))
+            if task_id is None:
+                blocked.add(modulo)
+                continue
+            task = self._tasks[task_id]
+            if not task.future.set_running_or_notify_cancel():
+                del self._tasks[task_id]
+                continue
+            worker = idle.pop()
+            worker.task = task
+            worker.started = time.monotonic()
+            if task.tracer is not None:
+                task.started_us = now_us()
+            running[modulo] = running.get(modulo, 0) + 1
+            self._reserved += task.memory
+            worker.task_queue.put(task.message(self.task_options.get(modulo)))
+    
+    def _collect(self):
+        """Recibe los resultados de los trabajadores"""
+        while True:
+            message = self._result_queue.get()
+            if message is None:
+                break
+            kind, worker_id, task_id, record, stats, events, cpu, rss = message
+            if kind == 'ready':
+                with self._lock:
+                    worker = self._workers.get(worker_id)
+                    if worker is not None:
+                        worker.ready = True
+                        worker.started = time.monotonic()
+                        worker.rss = rss
+                        # Con la memoria real del trabajador puede entrar otro documento
+                        self._dispatch()
+                continue
+            with self._lock:
+                worker = self._workers.get(worker_id)
+                if worker is not None:
+                    worker.task = None
+                    worker.rss = rss
+                    if worker.retiring:
+                        del self._workers[worker_id]
+                        worker.task_queue.put(None)
+                task = self._tasks.pop(task_id, None)
+                if task is not None:
+                    self._reserved -= task.memory
+                self.completed += 1
+                self.cpu_seconds += cpu
+                self._dispatch()
+            if task is not None:
+                if stats is not None and task.metrics is not None:
+                    task.metrics.merge(stats)
+                if events is not None and task.tracer is not None:
+                    self._add_trace(task, worker_id, worker, events)
+                task.future.set_result(record)
+    
+    def _watch(self):
+        """Vigilante: reemplaza los trabajadores colgados o muertos"""
+        while not self._stop_watchdog.wait(WATCHDOG_INTERVAL):
+            failed = []
+            with self._lock:
+                if self._closed:
+                    break
+                now = time.monotonic()
+                for worker in list(self._workers.values()):
+                    task = worker.task
+                    if task is None:
+                        continue
+                    timeout = self.timeouts.get(task.modulo)
+                    if worker.ready and timeout is not None and now - worker.started > timeout:
+                        error = f"Tiempo agotado: el documento superó {timeout:g} s"
+                    elif not worker.process.is_alive():
+                        error = "El proceso trabajador terminó inesperadamente"
+                    else:
+                        continue
+                    del self._workers[worker.worker_id]
+                    self._tasks.pop(task.task_id, None)
+                    self._reserved -= task.memory
+                    failed.append((worker, task, error))
+                    if not worker.retiring:
+                        self._start_worker()
+                if failed:
+                    self._dispatch()
+            
+            for worker, task, error in failed:
+                self._stop_process(worker.process)
+                record = get_modulo(task.modulo).error_record(display_name(task.pdf_path), error)
+                task.future.set_result(record)
+    
+    @staticmethod
+    def _stop_process(process):
+        """Termina un proceso trabajador (a la fuerza si no responde)"""
+        process.terminate()
+        process.join(timeout=2)
+        if process.is_alive():
+            process.kill()
+            process.join(timeout=2)
+    
+    @staticmethod
+    def _add_trace(task, worker_id, worker, events):
+        """Agrega a la traza los eventos del trabajador y la espera en cola"""
+        tracer = task.tracer
+        tracer.name_process('Planificador')
+        if worker is not None:
+            tracer.name_process(f"Trabajador {worker_id}", pid=worker.process.pid)
+        tracer.extend(events)
+        tracer.async_span(
+            'en cola', f"cola.{task.modulo}", task.task_id,
+            task.submitted_us, task.started_us, {'archivo': display_name(task.pdf_path)}
+        )
+    
+    def shutdown(self):
+        """Detiene los trabajadores (las tareas en espera se cancelan)"""
+        self._stop_watchdog.set()
+        with self._lock:
+            self._closed = True
+            for heap in self._pending.values():
+                for *_, task_id in heap:
+                    self._tasks.pop(task_id).future.cancel()
+                heap.clear()
+            workers = list(self._workers.values())
+        for worker in workers:
+            worker.task_queue.put(None)
+        for worker in workers:
+            worker.process.join(timeout=5)
+            if worker.process.is_alive():
+                self._stop_process(worker.process)
+        self._result_queue.put(None)
+        self._collector.join(timeout=5)
+        self._watchdog.join(timeout=5)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.shutdown()
@@ -1,5 +1,9 @@
+import time
+_INICIO = time.perf_counter()
+
 import tkinter as tk
-from tkinter import ttk
+from tkinter import ttk, messagebox
+import multiprocessing
 import sys
 from pathlib import Path
 
@@ -7,29 +11,36 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent / "modulo1"))
 sys.path.insert(0, str(Path(__file__).parent / "modulo2"))
 
-# Importar los módulos
-from modulo1.model import PDFDataModel
-from modulo1.view import PDFExtractorView
-from modulo1.controller import PDFExtractorController
+# Los módulos (PyMuPDF, PIL, pytesseract, openpyxl) se importan recién al
+# abrirlos, o en segundo plano después de mostrar el menú
+from comun.startup import StartupReport
+from comun.scheduler import JobScheduler
+from comun.modulos import MODULOS
+
 
-from modulo2.model_transegen import TransSegenModel
-from modulo2.view_transegen import TransSegenView
-from modulo2.controller_transegen import TransSegenController
+# Cada cuánto se actualiza la lista de trabajos del menú
+JOBS_REFRESH_MS = 500
 
 
 class MainMenu:
     """Menú principal para seleccionar el módulo de extracción"""
     
-    def __init__(self, root):
+    def __init__(self, root, startup=None):
         self.root = root
+        self.startup = startup or StartupReport(time.perf_counter())
         self.root.title("Sistema de Extracción de Datos PDF")
-        self.root.geometry("500x400")
+        self.root.geometry("560x640")
         self.root.resizable(False, False)
         
+        # Planificador compartido: los módulos pueden procesar lotes a la vez
+        self.scheduler = JobScheduler()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_app_closing)
+        
         # Centrar ventana
         self.center_window()
         
         self.setup_ui()
+        self.refresh_jobs()
     
     def center_window(self):
         """Centra la ventana en la pantalla"""
@@ -48,22 +59,22 @@ class MainMenu:
         
         # Título
         title_label = ttk.Label(
-            main_frame, 
+            main_frame,
             text="Sistema de Extracción de Datos PDF",
             font=('Arial', 18, 'bold')
         )
-        title_label.pack(pady=20)
+        title_label.pack(pady=(10, 15))
         
         subtitle_label = ttk.Label(
             main_frame,
             text="Seleccione el módulo que desea utilizar:",
             font=('Arial', 11)
         )
-        subtitle_label.pack(pady=10)
+        subtitle_label.pack(pady=5)
         
         # Frame para los botones
         button_frame = ttk.Frame(main_frame)
-        button_frame.pack(pady=30)
+        button_frame.pack(pady=10)
         
         # Botón Módulo 1: Datos de Estudiantes
         btn_estudiantes = ttk.Button(
@@ -72,7 +83,7 @@ class MainMenu:
             command=self.open_estudiantes_module,
             width=40
         )
-        btn_estudiantes.pack(pady=10, ipady=20)
+        btn_estudiantes.pack(pady=8, ipady=15)
         
         # Botón Módulo 2: Trans-Segen
         btn_transegen = ttk.Button(
@@ -81,7 +92,10 @@ class MainMenu:
             command=self.open_transegen_module,
             width=40
         )
-        btn_transegen.pack(pady=10, ipady=20)
+        btn_transegen.pack(pady=8, ipady=15)
+        
+        # Lista de trabajos del planificador
+        self._create_jobs_frame(main_frame)
         
         # Información
         info_frame = ttk.Frame(main_frame)
@@ -95,53 +109,147 @@ class MainMenu:
         )
         info_label.pack()
     
+    def _create_jobs_frame(self, parent):
+        """Crea la lista de trabajos en curso de todos los módulos"""
+        jobs_frame = ttk.LabelFrame(parent, text="Trabajos", padding="10")
+        jobs_frame.pack(fill=tk.BOTH, expand=True, pady=10)
+        
+        self.jobs_tree = ttk.Treeview(
+            jobs_frame,
+            columns=('modulo', 'estado', 'avance', 'prioridad'),
+            height=6
+        )
+        self.jobs_tree.column('#0', width=40, minwidth=40, anchor=tk.CENTER)
+        self.jobs_tree.column('modulo', width=150, minwidth=100)
+        self.jobs_tree.column('estado', width=100, minwidth=80, anchor=tk.CENTER)
+        self.jobs_tree.column('avance', width=110, minwidth=80, anchor=tk.CENTER)
+        self.jobs_tree.column('prioridad', width=70, minwidth=60, anchor=tk.CENTER)
+        self.jobs_tree.heading('#0', text='#', anchor=tk.CENTER)
+        self.jobs_tree.heading('modulo', text='Módulo')
+        self.jobs_tree.heading('estado', text='Estado')
+        self.jobs_tree.heading('avance', text='Avance')
+        self.jobs_tree.heading('prioridad', text='Prioridad')
+        self.jobs_tree.pack(fill=tk.BOTH, expand=True)
+        
+        bottom_frame = ttk.Frame(jobs_frame)
+        bottom_frame.pack(fill=tk.X, pady=(5, 0))
+        
+        self.workers_label = ttk.Label(bottom_frame, text="", font=('Arial', 8))
+        self.workers_label.pack(side=tk.LEFT)
+        
+        btn_cancel = ttk.Button(
+            bottom_frame,
+            text="Cancelar trabajo",
+            command=self.cancel_selected_job
+        )
+        btn_cancel.pack(side=tk.RIGHT)
+    
+    def refresh_jobs(self):
+        """Actualiza la lista de trabajos y el uso de los trabajadores"""
+        for job in self.scheduler.jobs():
+            item_id = str(job.job_id)
+            values = (
+                MODULOS[job.modulo].titulo,
+                job.estado,
+                f"{job.completed}/{job.total}",
+                job.priority
+            )
+            if self.jobs_tree.exists(item_id):
+                self.jobs_tree.item(item_id, values=values)
+            else:
+                self.jobs_tree.insert('', 0, iid=item_id, text=item_id, values=values)
+        
+        busy, total = self.scheduler.workers_busy()
+        self.workers_label.config(text=f"Trabajadores ocupados: {busy}/{total}")
+        self.root.after(JOBS_REFRESH_MS, self.refresh_jobs)
+    
+    def cancel_selected_job(self):
+        """Cancela el trabajo seleccionado en la lista"""
+        selected = self.jobs_tree.selection()
+        for job in self.scheduler.jobs():
+            if str(job.job_id) in selected and not job.is_done():
+                job.cancel()
+    
+    def on_app_closing(self):
+        """Detiene los trabajadores y cierra la aplicación"""
+        pending = [job for job in self.scheduler.jobs() if not job.is_done()]
+        if pending and not messagebox.askyesno(
+            "Trabajos en curso",
+            f"Hay {len(pending)} trabajos en curso. Los archivos ya procesados quedan "
+            "en el diario para reanudar después.\n¿Desea salir?"
+        ):
+            return
+        self.scheduler.shutdown()
+        self.root.destroy()
+    
     def open_estudiantes_module(self):
         """Abre el módulo de datos de estudiantes"""
         # Crear nueva ventana
         estudiantes_window = tk.Toplevel(self.root)
         
-        # Ocultar el menú principal
-        self.root.withdraw()
-        
-        # Configurar el cierre del módulo
+        # El menú queda visible con la lista de trabajos; otros módulos
+        # pueden abrirse y procesar en paralelo
         def on_closing():
             estudiantes_window.destroy()
-            self.root.deiconify()  # Mostrar menú principal nuevamente
         
         estudiantes_window.protocol("WM_DELETE_WINDOW", on_closing)
         
+        # Importar el módulo recién ahora (si la precarga no lo hizo ya)
+        self.startup.import_group('estudiantes')
+        from modulo1.model import PDFDataModel
+        from modulo1.view import PDFExtractorView
+        from modulo1.controller import PDFExtractorController
+        
         # Crear el modelo, vista y controlador
         model = PDFDataModel()
         view = PDFExtractorView(estudiantes_window)
-        controller = PDFExtractorController(model, view)
+        controller = PDFExtractorController(model, view, self.scheduler)
     
     def open_transegen_module(self):
         """Abre el módulo de Trans-Segen"""
         # Crear nueva ventana
         transegen_window = tk.Toplevel(self.root)
         
-        # Ocultar el menú principal
-        self.root.withdraw()
-        
-        # Configurar el cierre del módulo
+        # El menú queda visible con la lista de trabajos; otros módulos
+        # pueden abrirse y procesar en paralelo
         def on_closing():
             transegen_window.destroy()
-            self.root.deiconify()  # Mostrar menú principal nuevamente
         
         transegen_window.protocol("WM_DELETE_WINDOW", on_closing)
         
+        # Importar el módulo recién ahora (si la precarga no lo hizo ya)
+        self.startup.import_group('transegen')
+        from modulo2.model_transegen import TransSegenModel
+        from modulo2.view_transegen import TransSegenView
+        from modulo2.controller_transegen import TransSegenController
+        
         # Crear el modelo, vista y controlador
         model = TransSegenModel()
         view = TransSegenView(transegen_window)
-        controller = TransSegenController(model, view)
+        controller = TransSegenController(model, view, self.scheduler)
 
 
 def main():
     """Punto de entrada de la aplicación"""
+    # Con argumentos se usa el modo consola (procesar, reparsear, ...)
+    if len(sys.argv) > 1:
+        from comun.cli import run_cli
+        sys.exit(run_cli(sys.argv[1:]))
+    
+    startup = StartupReport(_INICIO)
     root = tk.Tk()
-    app = MainMenu(root)
+    app = MainMenu(root, startup)
+    
+    # Cuando la ventana ya está visible, medir y precargar en segundo plano
+    def on_first_window():
+        startup.mark('primera_ventana')
+        startup.preload_in_background()
+    
+    root.after_idle(on_first_window)
     root.mainloop()
 
 
 if __name__ == "__main__":
+    # Necesario para los procesos trabajadores en el ejecutable de PyInstaller
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
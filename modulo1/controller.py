@@ -1,37 +1,124 @@
-from tkinter import filedialog, messagebox
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill
+from tkinter import filedialog, messagebox, TclError
 from pathlib import Path
 import os
 
+from comun import metrics, tracing
+from comun.export import write_excel
+from comun.inputs import FolderScanner
+from comun.journal import BatchJournal
+from comun.modulos import get_modulo
+from comun.scheduler import CANCELADO
+
+
+# Cada cuánto se revisa el avance de un lote del planificador
+JOB_POLL_MS = 200
+
+# Cada cuánto se agregan los PDFs encontrados al recorrer una carpeta
+SCAN_POLL_MS = 100
+
 
 class PDFExtractorController:
     """Controlador para el módulo de datos de estudiantes"""
     
-    def __init__(self, model, view):
+    def __init__(self, model, view, scheduler=None):
         self.model = model
         self.view = view
         
+        # Planificador compartido (opcional) y lote en curso
+        self.scheduler = scheduler
+        self.job = None
+        # Archivos del lote ya mostrados en la vista previa
+        self.rows_shown = 0
+        
+        # Diario del último lote (permite reanudar si la app se cierra)
+        self.journal = None
+        
+        # Recorrido de carpeta en segundo plano
+        self.scanner = None
+        
         # Conectar botones
         self.view.set_button_commands(
             load_cmd=self.load_pdfs,
             extract_cmd=self.extract_data,
             generate_cmd=self.generate_excel,
             debug_cmd=self.debug_pdf,
-            clear_cmd=self.clear_data
+            clear_cmd=self.clear_data,
+            folder_cmd=self.load_folder
         )
     
     def load_pdfs(self):
         """Carga archivos PDF"""
         files = filedialog.askopenfilenames(
             title="Seleccionar archivos PDF (Estudiantes)",
-            filetypes=[("Archivos PDF", "*.pdf"), ("Todos los archivos", "*.*")]
+            filetypes=[
+                ("Archivos PDF", "*.pdf"),
+                ("PDFs comprimidos (ZIP/TAR)", "*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tar.xz"),
+                ("Todos los archivos", "*.*")
+            ]
         )
         
         if files:
-            total = self.model.add_pdf_files(files)
-            self.view.update_file_list(self.model.get_pdf_names())
-            self.view.update_status(f"Cargados {total} archivos PDF")
+            total = self._add_files(files)
+            self.view.update_status(self._loaded_message(total))
+    
+    def load_folder(self):
+        """Carga todos los PDFs de una carpeta (recorrida en segundo plano)"""
+        folder = filedialog.askdirectory(title="Seleccionar carpeta con PDFs (Estudiantes)")
+        if not folder:
+            return
+        
+        if self.scanner is not None:
+            self.scanner.cancel()
+        self.scanner = FolderScanner(folder)
+        self.scanner.start()
+        self.view.update_status("Buscando archivos PDF...")
+        self.view.root.after(SCAN_POLL_MS, self._poll_scanner, self.scanner)
+    
+    def _poll_scanner(self, scanner):
+        """Agrega a la lista los PDFs encontrados hasta ahora"""
+        if not self._window_alive():
+            scanner.cancel()
+            return
+        if scanner is not self.scanner:
+            # Se limpió la lista o se eligió otra carpeta
+            return
+        
+        paths, finished = scanner.drain()
+        if paths:
+            total = self._add_files(paths)
+            scanner.skipped += self.model.skipped_duplicates
+        else:
+            total = len(self.model.get_pdf_files())
+        
+        if finished:
+            self.view.update_status(self._loaded_message(total, scanner.skipped))
+            self.scanner = None
+        else:
+            self.view.update_status(f"Buscando archivos PDF... {scanner.found} encontrados")
+            self.view.root.after(SCAN_POLL_MS, self._poll_scanner, scanner)
+    
+    def _add_files(self, files):
+        """Agrega archivos al modelo y solo los nuevos nombres a la lista"""
+        before = len(self.model.get_pdf_files())
+        total = self.model.add_pdf_files(files)
+        self.view.append_file_list(self.model.get_pdf_names(before))
+        return total
+    
+    def _loaded_message(self, total, skipped=None):
+        """Mensaje de estado tras cargar archivos (con los duplicados omitidos)"""
+        if skipped is None:
+            skipped = self.model.skipped_duplicates
+        message = f"Cargados {total} archivos PDF"
+        if skipped:
+            message += f" ({skipped} duplicados omitidos)"
+        return message
+    
+    def _window_alive(self):
+        """Verifica si la ventana del módulo sigue abierta"""
+        try:
+            return bool(self.view.root.winfo_exists())
+        except TclError:
+            return False
     
     def extract_data(self):
         """Extrae datos de los PDFs"""
@@ -39,6 +126,18 @@ class PDFExtractorController:
             messagebox.showwarning("Advertencia", "No hay archivos PDF cargados")
             return
         
+        if self.job is not None and not self.job.is_done():
+            messagebox.showinfo("Lote en curso", "Ya hay un lote en proceso en esta ventana")
+            return
+        
+        # Reanudar un lote interrumpido con los mismos archivos
+        self.journal = self._open_journal()
+        
+        # Con el planificador compartido el lote corre sin bloquear la ventana
+        if self.scheduler is not None:
+            self._start_job()
+            return
+        
         # Mostrar loading
         self.view.show_loading("Extrayendo datos de estudiantes...")
         
@@ -47,31 +146,13 @@ class PDFExtractorController:
             self.view.update_status("Extrayendo datos...")
             self.view.root.update()
             
-            extracted_data = self.model.process_all_pdfs()
+            extracted_data = self.model.process_all_pdfs(journal=self.journal)
             
             # PRIMERO ocultar loading
             self.view.hide_loading()
             
             # LUEGO mostrar datos
-            for i, data in enumerate(extracted_data, 1):
-                if 'error' in data:
-                    self.view.add_data_to_tree(i, f"ERROR: {data['archivo']}", "", "")
-                else:
-                    self.view.add_data_to_tree(
-                        i, 
-                        data['nombres'], 
-                        data['dni'], 
-                        data['nivel_riesgo']
-                    )
-            
-            self.view.update_status(f"Datos extraídos de {len(extracted_data)} archivos")
-            
-            if extracted_data:
-                messagebox.showinfo(
-                    "Éxito", 
-                    f"Se extrajeron datos de {len(extracted_data)} archivos.\n"
-                    "Revise los datos en la vista previa."
-                )
+            self._show_extracted_data(extracted_data)
         
         except Exception as e:
             # Asegurar que se oculte incluso con error
@@ -79,6 +160,88 @@ class PDFExtractorController:
             messagebox.showerror("Error", f"Error durante la extracción: {str(e)}")
             self.view.update_status("Error en la extracción")
     
+    def _start_job(self):
+        """Envía el lote al planificador y sigue su avance"""
+        self.view.clear_data_tree()
+        self.job = self.scheduler.submit_batch(
+            'estudiantes',
+            self.model.get_pdf_files(),
+            journal=self.journal
+        )
+        self.rows_shown = 0
+        self.view.update_status(f"Lote #{self.job.job_id} en cola: 0/{self.job.total} archivos")
+        self.view.root.after(JOB_POLL_MS, self._poll_job)
+    
+    def _poll_job(self):
+        """Actualiza el avance del lote y muestra los datos al terminar"""
+        if not self._window_alive():
+            return
+        
+        job = self.job
+        if not job.is_done():
+            self._show_partial_results(job)
+            self.view.update_status(f"Extrayendo datos... {job.completed}/{job.total} archivos")
+            self.view.root.after(JOB_POLL_MS, self._poll_job)
+            return
+        
+        self.model.set_extracted_data(job.records(), job.sources())
+        if job.estado == CANCELADO:
+            self.view.update_status(f"Lote cancelado ({job.completed}/{job.total} archivos)")
+            return
+        if job.metrics is not None:
+            metrics.report(job.metrics, self._metrics_name(job))
+        if job.tracer is not None:
+            tracing.report(job.tracer, self._metrics_name(job))
+        self.view.clear_data_tree()
+        self._show_extracted_data(self.model.get_extracted_data())
+    
+    def _build_rows(self, items):
+        """Convierte pares (número, registro) en filas de la vista previa"""
+        rows = []
+        for i, data in items:
+            if 'error' in data:
+                rows.append((i, (f"ERROR: {data['archivo']}", "", "")))
+            else:
+                rows.append((i, (data['nombres'], data['dni'], data['nivel_riesgo'])))
+        return rows
+    
+    def _show_partial_results(self, job):
+        """Muestra los archivos ya terminados (los más livianos terminan primero)"""
+        completed = job.completed
+        if completed == self.rows_shown:
+            return
+        self.rows_shown = completed
+        self.view.replace_rows_in_tree(self._build_rows(
+            (index + 1, data) for index, data in job.partial_records()
+        ))
+    
+    def _show_extracted_data(self, extracted_data):
+        """Muestra los datos extraídos en la vista previa"""
+        self.view.add_rows_to_tree(self._build_rows(enumerate(extracted_data, 1)))
+        
+        self.view.update_status(f"Datos extraídos de {len(extracted_data)} archivos")
+        
+        if extracted_data:
+            messagebox.showinfo(
+                "Éxito", 
+                f"Se extrajeron datos de {len(extracted_data)} archivos.\n"
+                "Revise los datos en la vista previa."
+            )
+    
+    def _open_journal(self):
+        """Abre el diario del lote actual y pregunta si se reanuda"""
+        journal = BatchJournal.for_batch('estudiantes', self.model.get_pdf_files())
+        if journal.exists():
+            completados = len(journal.load())
+            reanudar = messagebox.askyesno(
+                "Reanudar lote",
+                f"Se encontró un lote interrumpido con {completados} archivos ya procesados.\n"
+                "¿Desea reanudarlo? (No: se procesan todos nuevamente)"
+            )
+            if not reanudar:
+                journal.remove()
+        return journal
+    
     def generate_excel(self):
         """Genera archivo Excel"""
         if not self.model.has_data():
@@ -110,6 +273,9 @@ class PDFExtractorController:
             # PRIMERO ocultar loading
             self.view.hide_loading()
             
+            # Los resultados ya están exportados: el diario ya no es necesario
+            self._discard_journal()
+            
             # LUEGO mostrar mensajes
             self.view.update_status(f"Excel generado: {Path(final_file_path).name}")
             messagebox.showinfo(
@@ -142,58 +308,41 @@ class PDFExtractorController:
     
     def _create_excel_file(self, file_path):
         """Crea el archivo Excel con los datos - Versión robusta"""
+        # Si el lote se midió o se trazó, el guardado se suma a sus resultados
+        job_metrics = self.job.metrics if self.job is not None else None
+        job_tracer = self.job.tracer if self.job is not None else None
         try:
-            file_path = Path(file_path)
-            parent_dir = file_path.parent
-            
-            # Verificar que el directorio existe y tiene permisos de escritura
-            if not parent_dir.exists():
-                parent_dir.mkdir(parents=True, exist_ok=True)
-            
-            # Crear libro de Excel
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "Datos Estudiantes"
-            
-            # Estilos
-            header_fill = PatternFill(
-                start_color="366092",
-                end_color="366092",
-                fill_type="solid"
-            )
-            header_font = Font(bold=True, color="FFFFFF", size=12)
-            
-            # Encabezados
-            headers = ["N°", "Nombres y Apellidos", "DNI", "Nivel de Riesgo Social"]
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
-                cell.fill = header_fill
-                cell.font = header_font
-                cell.alignment = Alignment(horizontal="center", vertical="center")
-            
-            # Datos
-            extracted_data = self.model.get_extracted_data()
-            for i, data in enumerate(extracted_data, 2):
-                ws.cell(row=i, column=1, value=i-1)
-                ws.cell(row=i, column=2, value=data['nombres'])
-                ws.cell(row=i, column=3, value=data['dni'])
-                ws.cell(row=i, column=4, value=data['nivel_riesgo'])
-            
-            # Ajustar anchos
-            ws.column_dimensions['A'].width = 8
-            ws.column_dimensions['B'].width = 40
-            ws.column_dimensions['C'].width = 15
-            ws.column_dimensions['D'].width = 25
-            
-            # Guardar
-            wb.save(str(file_path))
-            return str(file_path)
-            
+            with metrics.collecting(job_metrics), metrics.tracing_into(job_tracer):
+                path = write_excel(
+                    self.model.get_extracted_data(),
+                    file_path,
+                    get_modulo('estudiantes')
+                )
         except Exception as e:
             raise Exception(f"Error al guardar Excel: {str(e)}")
+        if job_metrics is not None:
+            metrics.report(job_metrics, self._metrics_name(self.job), show=False)
+        if job_tracer is not None:
+            tracing.report(job_tracer, self._metrics_name(self.job))
+        return path
+    
+    def _metrics_name(self, job):
+        """Nombre de los archivos de métricas y traza de un lote"""
+        return f"estudiantes-lote{job.job_id}-{int(job.creado)}"
+    
+    def _discard_journal(self):
+        """Elimina el diario del lote una vez exportados los resultados"""
+        if self.journal is not None:
+            self.journal.remove()
+            self.journal = None
     
     def clear_data(self):
         """Limpia todos los datos"""
+        if self.scanner is not None:
+            self.scanner.cancel()
+            self.scanner = None
+        if self.job is not None and not self.job.is_done():
+            self.job.cancel()
         self.model.clear_files()
         self.view.update_file_list([])
         self.view.clear_data_tree()
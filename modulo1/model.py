@@ -1,43 +1,94 @@
 import fitz  # PyMuPDF
 import re
-from pathlib import Path
+import sys
+
+from comun import metrics
+from comun.archives import display_name, expand, is_member, read_member
+from comun.dedup import DedupIndex
+from comun.prefetch import Prefetcher
+from comun.records import RecordStore
 
 
 class PDFDataModel:
     """Modelo que maneja la lógica de negocio y datos"""
     
+    MODULO = 'estudiantes'
+    
     def __init__(self):
         self.pdf_files = []
-        self.extracted_data = []
+        self.pdf_names = []
+        self.extracted_data = RecordStore.for_modulo(self.MODULO)
+        
+        # Índice para omitir archivos repetidos (por ruta y, opcionalmente,
+        # por contenido) y cantidad omitida en la última carga
+        self.dedup_index = DedupIndex()
+        self.skipped_duplicates = 0
+        
+        # Archivo opcional donde se guarda el texto crudo (ver comun.text_archive)
+        self.text_archive = None
+        
+        # Bytes que se pueden leer por adelantado en process_all_pdfs (ver
+        # comun.prefetch); None lee cada PDF al abrirlo
+        self.prefetch_budget = None
+        self.prefetch_stats = None
     
     def add_pdf_files(self, files):
-        """Agrega archivos PDF a la lista"""
+        """Agrega archivos PDF a la lista (omitiendo los ya cargados)"""
+        # Los ZIP/TAR se reemplazan por sus PDFs ('lote.zip!doc.pdf')
+        files = list(expand(files))
+        new_files = [pdf for pdf in files if self.dedup_index.add(pdf)]
+        self.skipped_duplicates = len(files) - len(new_files)
+        files = new_files
         self.pdf_files.extend(files)
+        # Los nombres se calculan una sola vez por archivo
+        self.pdf_names.extend(sys.intern(display_name(pdf)) for pdf in files)
         return len(self.pdf_files)
     
     def get_pdf_files(self):
         """Retorna la lista de archivos PDF"""
         return self.pdf_files
     
-    def get_pdf_names(self):
-        """Retorna solo los nombres de los archivos"""
-        return [Path(pdf).name for pdf in self.pdf_files]
+    def get_pdf_names(self, start=0):
+        """Retorna solo los nombres de los archivos (desde la posición `start`)"""
+        return self.pdf_names[start:]
     
     def clear_files(self):
         """Limpia todos los datos"""
         self.pdf_files = []
-        self.extracted_data = []
+        self.pdf_names = []
+        self.extracted_data = RecordStore.for_modulo(self.MODULO)
+        self.dedup_index.clear()
+        self.skipped_duplicates = 0
     
-    def extract_text_from_pdf(self, pdf_path):
-        """Extrae texto de las primeras páginas y últimas 3 páginas del PDF"""
+    def warm_up(self):
+        """Inicializa PyMuPDF para que el primer documento no pague ese costo"""
+        fitz.open().close()
+    
+    def extract_text_from_pdf(self, pdf_path, data=None):
+        """Extrae texto de las primeras páginas y últimas 3 páginas del PDF
+        
+        Si se pasa `data` (bytes del PDF), se abre desde memoria y `pdf_path`
+        solo identifica al documento.
+        """
         try:
-            doc = fitz.open(pdf_path)
+            with metrics.stage('fitz.open') as st:
+                if data is None and is_member(pdf_path):
+                    # Miembro de un ZIP/TAR: se lee a memoria sin extraerlo
+                    data = read_member(pdf_path)
+                if data is not None:
+                    doc = fitz.open(stream=data, filetype="pdf")
+                    st.bytes = len(data)
+                else:
+                    doc = fitz.open(pdf_path)
+                st.pages = len(doc)
             text = ""
             
             # Extraer texto de las primeras 2 páginas para datos personales
             for page_num in range(min(len(doc), 2)):
                 page = doc[page_num]
-                text += page.get_text() + "\n\n"
+                with metrics.stage('get_text') as st:
+                    text += page.get_text() + "\n\n"
+                    st.pages = 1
             
             # Extraer texto de las ÚLTIMAS 3 PÁGINAS para el nivel de riesgo
             if len(doc) > 0:
@@ -48,12 +99,14 @@ class PDFDataModel:
                 for page_num in range(start_page, len(doc)):
                     page = doc[page_num]
                     text += f"\n--- Página {page_num + 1} ---\n"
-                    text += page.get_text() + "\n"
+                    with metrics.stage('get_text') as st:
+                        text += page.get_text() + "\n"
+                        st.pages = 1
             
             doc.close()
             return text
         except Exception as e:
-            raise Exception(f"Error al leer {Path(pdf_path).name}: {str(e)}")
+            raise Exception(f"Error al leer {display_name(pdf_path)}: {str(e)}")
     
     def extract_data_from_text(self, text, pdf_name):
         """Extrae los datos específicos del texto del PDF"""
@@ -139,25 +192,68 @@ class PDFDataModel:
         
         return data
     
-    def process_all_pdfs(self):
-        """Procesa todos los PDFs cargados y extrae sus datos"""
-        self.extracted_data = []
-        
-        for pdf_path in self.pdf_files:
+    def error_record(self, pdf_name, error):
+        """Retorna un registro vacío con el error"""
+        return {
+            'archivo': pdf_name,
+            'nombres': '',
+            'dni': '',
+            'nivel_riesgo': '',
+            'error': str(error)
+        }
+    
+    def process_pdf(self, pdf_path, data=None):
+        """Procesa un PDF y retorna su registro (None si no tiene texto)"""
+        with metrics.stage('documento', display_name(pdf_path)):
             try:
-                text = self.extract_text_from_pdf(pdf_path)
+                text = self.extract_text_from_pdf(pdf_path, data=data)
+                if self.text_archive is not None:
+                    self.text_archive.store(self.MODULO, pdf_path, text)
                 if text:
-                    data = self.extract_data_from_text(text, Path(pdf_path).name)
-                    self.extracted_data.append(data)
+                    with metrics.stage('regex'):
+                        return self.extract_data_from_text(text, display_name(pdf_path))
             except Exception as e:
                 # Agregar datos vacíos con el error
-                self.extracted_data.append({
-                    'archivo': Path(pdf_path).name,
-                    'nombres': '',
-                    'dni': '',
-                    'nivel_riesgo': '',
-                    'error': str(e)
-                })
+                return self.error_record(display_name(pdf_path), e)
+        return None
+    
+    def process_all_pdfs(self, journal=None):
+        """Procesa todos los PDFs cargados y extrae sus datos
+        
+        Con un diario (comun.journal.BatchJournal) cada resultado se registra
+        al terminar y los archivos ya completados en una ejecución anterior
+        se omiten. Con `prefetch_budget` los próximos PDFs se leen a memoria
+        en otros hilos mientras se procesa el actual.
+        """
+        self.extracted_data = RecordStore.for_modulo(self.MODULO)
+        done = journal.load() if journal is not None else {}
+        
+        prefetcher = prefetched = None
+        if self.prefetch_budget:
+            prefetcher = Prefetcher(
+                [p for p in self.pdf_files if str(p) not in done], self.prefetch_budget
+            )
+            prefetched = iter(prefetcher)
+        
+        try:
+            for pdf_path in self.pdf_files:
+                if str(pdf_path) in done:
+                    data = done[str(pdf_path)]
+                else:
+                    contenido = next(prefetched)[1] if prefetched is not None else None
+                    data = self.process_pdf(pdf_path, data=contenido)
+                    if journal is not None:
+                        journal.record(pdf_path, data)
+                if data is not None:
+                    self.extracted_data.append(data, pdf_path)
+        finally:
+            if prefetcher is not None:
+                prefetcher.close()
+                self.prefetch_stats = prefetcher.stats()
+            if journal is not None:
+                journal.close()
+            if self.text_archive is not None:
+                self.text_archive.flush()
         
         return self.extracted_data
     
@@ -165,6 +261,10 @@ class PDFDataModel:
         """Retorna los datos extraídos"""
         return self.extracted_data
     
+    def set_extracted_data(self, extracted_data, sources=None):
+        """Reemplaza los datos extraídos (p. ej. con los de un lote del planificador)"""
+        self.extracted_data = RecordStore.for_modulo(self.MODULO, extracted_data, sources)
+    
     def has_data(self):
         """Verifica si hay datos extraídos"""
         return len(self.extracted_data) > 0
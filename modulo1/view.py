@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
 
+from comun.virtual_tree import VirtualTreeview
+
 
 class PDFExtractorView:
     """Vista para el módulo de datos de estudiantes - Mismo diseño que módulo 2"""
@@ -76,6 +78,14 @@ class PDFExtractorView:
         )
         self.btn_load.pack(side=tk.LEFT, padx=5, ipadx=10, ipady=5)
         
+        # Botón 1b: Cargar carpeta (se recorre en segundo plano)
+        self.btn_load_folder = ttk.Button(
+            button_frame, 
+            text="📂 Cargar Carpeta",
+            width=20
+        )
+        self.btn_load_folder.pack(side=tk.LEFT, padx=5, ipadx=10, ipady=5)
+        
         # Botón 2: Extraer Datos
         self.btn_extract = ttk.Button(
             button_frame, 
@@ -155,7 +165,7 @@ class PDFExtractorView:
             height=12
         )
         
-        v_scrollbar.config(command=self.data_tree.yview)
+        # La barra vertical la controla la vista virtualizada (ver más abajo)
         h_scrollbar.config(command=self.data_tree.xview)
         
         # Configurar columnas para datos de estudiantes
@@ -179,6 +189,9 @@ class PDFExtractorView:
         # Configurar expansión
         tree_container.columnconfigure(0, weight=1)
         tree_container.rowconfigure(0, weight=1)
+        
+        # Solo se materializan las filas visibles (miles de filas sin demora)
+        self.data_rows = VirtualTreeview(self.data_tree, v_scrollbar)
     
     def show_loading(self, message="Procesando..."):
         """Muestra un mensaje de carga"""
@@ -232,22 +245,28 @@ class PDFExtractorView:
     def update_file_list(self, file_names):
         """Actualiza la lista de archivos"""
         self.file_listbox.delete(0, tk.END)
-        for name in file_names:
-            self.file_listbox.insert(tk.END, name)
+        self.append_file_list(file_names)
+    
+    def append_file_list(self, file_names):
+        """Agrega nombres al final de la lista (una sola llamada a Tk)"""
+        if file_names:
+            self.file_listbox.insert(tk.END, *file_names)
     
     def clear_data_tree(self):
         """Limpia la vista previa"""
-        for item in self.data_tree.get_children():
-            self.data_tree.delete(item)
+        self.data_rows.clear()
     
     def add_data_to_tree(self, index, nombres, dni, nivel_riesgo):
         """Agrega una fila de datos"""
-        self.data_tree.insert(
-            '', 
-            tk.END, 
-            text=str(index),
-            values=(nombres, dni, nivel_riesgo)
-        )
+        self.data_rows.append([(str(index), (nombres, dni, nivel_riesgo))])
+    
+    def add_rows_to_tree(self, rows):
+        """Agrega varias filas (índice, valores) de una sola vez"""
+        self.data_rows.append([(str(index), values) for index, values in rows])
+    
+    def replace_rows_in_tree(self, rows):
+        """Reemplaza las filas de la vista previa sin mover el desplazamiento"""
+        self.data_rows.set_rows([(str(index), values) for index, values in rows], keep_position=True)
     
     def update_status(self, message):
         """Actualiza el mensaje de estado"""
@@ -291,9 +310,12 @@ class PDFExtractorView:
         text_widget.insert('1.0', text_content)
         text_widget.config(state=tk.DISABLED)
     
-    def set_button_commands(self, load_cmd, extract_cmd, generate_cmd, debug_cmd, clear_cmd):
+    def set_button_commands(self, load_cmd, extract_cmd, generate_cmd, debug_cmd, clear_cmd,
+                            folder_cmd=None):
         """Configura los comandos de los botones"""
         self.btn_load.config(command=load_cmd)
+        if folder_cmd is not None:
+            self.btn_load_folder.config(command=folder_cmd)
         self.btn_extract.config(command=extract_cmd)
         self.btn_generate.config(command=generate_cmd)
         self.btn_debug.config(command=debug_cmd)
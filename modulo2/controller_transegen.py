@@ -1,37 +1,152 @@
-from tkinter import filedialog, messagebox
-import openpyxl
-from openpyxl.styles import Font, Alignment, PatternFill
+from tkinter import filedialog, messagebox, TclError
 from pathlib import Path
 import os
 
+from comun import metrics, tracing
+from comun.archives import display_name
+from comun.export import write_excel
+from comun.inputs import FolderScanner
+from comun.journal import BatchJournal
+from comun.modulos import get_modulo
+from comun.ocr_profiles import PROFILES
+from comun.preflight import (
+    PreflightScan, format_duration, load_profile_rates, record_ocr_rate, record_profile_rate
+)
+from comun.scheduler import CANCELADO, COMPLETADO
+
+
+# Cada cuánto se revisa el avance de un lote del planificador
+JOB_POLL_MS = 200
+
+# Cada cuánto se agregan los PDFs encontrados al recorrer una carpeta
+SCAN_POLL_MS = 100
+
+# Cada cuánto se revisa el análisis previo de un lote
+PREFLIGHT_POLL_MS = 100
+
+# Archivos rechazados que se listan en la confirmación
+MAX_REJECTED_SHOWN = 5
+
 
 class TransSegenController:
     """Controlador para el módulo Trans-Segen"""
     
-    def __init__(self, model, view):
+    def __init__(self, model, view, scheduler=None):
         self.model = model
         self.view = view
         
+        # Planificador compartido (opcional) y lote en curso
+        self.scheduler = scheduler
+        self.job = None
+        # Archivos del lote ya mostrados en la vista previa
+        self.rows_shown = 0
+        
+        # Diario del último lote (permite reanudar si la app se cierra)
+        self.journal = None
+        
+        # Recorrido de carpeta en segundo plano
+        self.scanner = None
+        
+        # Análisis previo (páginas, archivos dañados, tiempo estimado)
+        self.preflight = None
+        self.preflight_report = None
+        self.resumed = False
+        
         # Conectar botones
         self.view.set_button_commands(
             load_cmd=self.load_pdfs,
             extract_cmd=self.extract_data,
             generate_cmd=self.generate_excel,
             debug_cmd=self.debug_pdf,
-            clear_cmd=self.clear_data
+            clear_cmd=self.clear_data,
+            folder_cmd=self.load_folder
         )
+        self._update_profile_choices()
     
     def load_pdfs(self):
         """Carga archivos PDF"""
         files = filedialog.askopenfilenames(
             title="Seleccionar archivos PDF (Trans-Segen)",
-            filetypes=[("Archivos PDF", "*.pdf"), ("Todos los archivos", "*.*")]
+            filetypes=[
+                ("Archivos PDF", "*.pdf"),
+                ("PDFs comprimidos (ZIP/TAR)", "*.zip *.tar *.tar.gz *.tgz *.tar.bz2 *.tar.xz"),
+                ("Todos los archivos", "*.*")
+            ]
         )
         
         if files:
-            total = self.model.add_pdf_files(files)
-            self.view.update_file_list(self.model.get_pdf_names())
-            self.view.update_status(f"Cargados {total} archivos PDF")
+            total = self._add_files(files)
+            self.view.update_status(self._loaded_message(total))
+    
+    def load_folder(self):
+        """Carga todos los PDFs de una carpeta (recorrida en segundo plano)"""
+        folder = filedialog.askdirectory(title="Seleccionar carpeta con PDFs (Trans-Segen)")
+        if not folder:
+            return
+        
+        if self.scanner is not None:
+            self.scanner.cancel()
+        self.scanner = FolderScanner(folder)
+        self.scanner.start()
+        self.view.update_status("Buscando archivos PDF...")
+        self.view.root.after(SCAN_POLL_MS, self._poll_scanner, self.scanner)
+    
+    def _poll_scanner(self, scanner):
+        """Agrega a la lista los PDFs encontrados hasta ahora"""
+        if not self._window_alive():
+            scanner.cancel()
+            return
+        if scanner is not self.scanner:
+            # Se limpió la lista o se eligió otra carpeta
+            return
+        
+        paths, finished = scanner.drain()
+        if paths:
+            total = self._add_files(paths)
+            scanner.skipped += self.model.skipped_duplicates
+        else:
+            total = len(self.model.get_pdf_files())
+        
+        if finished:
+            self.view.update_status(self._loaded_message(total, scanner.skipped))
+            self.scanner = None
+        else:
+            self.view.update_status(f"Buscando archivos PDF... {scanner.found} encontrados")
+            self.view.root.after(SCAN_POLL_MS, self._poll_scanner, scanner)
+    
+    def _add_files(self, files):
+        """Agrega archivos al modelo y solo los nuevos nombres a la lista"""
+        before = len(self.model.get_pdf_files())
+        total = self.model.add_pdf_files(files)
+        self.view.append_file_list(self.model.get_pdf_names(before))
+        return total
+    
+    def _loaded_message(self, total, skipped=None):
+        """Mensaje de estado tras cargar archivos (con los duplicados omitidos)"""
+        if skipped is None:
+            skipped = self.model.skipped_duplicates
+        message = f"Cargados {total} archivos PDF"
+        if skipped:
+            message += f" ({skipped} duplicados omitidos)"
+        return message
+    
+    def _window_alive(self):
+        """Verifica si la ventana del módulo sigue abierta"""
+        try:
+            return bool(self.view.root.winfo_exists())
+        except TclError:
+            return False
+    
+    def _update_profile_choices(self):
+        """Muestra los perfiles de OCR con las páginas por segundo ya medidas"""
+        rates = load_profile_rates()
+        choices = []
+        for nombre, profile in PROFILES.items():
+            etiqueta = f"{profile.titulo} ({profile.dpi} DPI)"
+            if nombre in rates:
+                etiqueta += f" - {rates[nombre]:.2f} págs/s por trabajador"
+            choices.append((nombre, etiqueta))
+        self.view.set_ocr_profiles(choices, self.model.ocr_profile.nombre)
     
     def extract_data(self):
         """Extrae datos usando OCR"""
@@ -39,15 +154,78 @@ class TransSegenController:
             messagebox.showwarning("Advertencia", "No hay archivos PDF cargados")
             return
         
-        # Advertir sobre el tiempo de procesamiento
-        response = messagebox.askyesno(
-            "Procesamiento OCR",
-            "El procesamiento con OCR puede tardar varios minutos.\n"
-            "¿Desea continuar?",
-            icon='question'
+        if self.job is not None and not self.job.is_done():
+            messagebox.showinfo("Lote en curso", "Ya hay un lote en proceso en esta ventana")
+            return
+        
+        if self.preflight is not None:
+            return
+        
+        self.model.set_ocr_profile(self.view.get_ocr_profile())
+        
+        # Análisis previo rápido antes de comprometer el OCR
+        self.preflight = PreflightScan(
+            self.model.get_pdf_files(),
+            self.model.PAGES_TO_READ,
+            self.model.MIN_TEXT_CHARS
         )
+        self.preflight.start()
+        self.view.update_status("Analizando archivos...")
+        self.view.root.after(PREFLIGHT_POLL_MS, self._poll_preflight, self.preflight)
+    
+    def _poll_preflight(self, scan):
+        """Espera el análisis previo y pide confirmación con el tiempo estimado"""
+        if not self._window_alive() or scan is not self.preflight:
+            return
+        if scan.is_alive():
+            self.view.update_status(f"Analizando archivos... {scan.checked}/{len(scan.pdf_files)}")
+            self.view.root.after(PREFLIGHT_POLL_MS, self._poll_preflight, scan)
+            return
         
-        if not response:
+        self.preflight = None
+        if scan.error is not None:
+            messagebox.showerror("Error", f"Error al analizar los archivos: {scan.error}")
+            self.view.update_status("Error en el análisis previo")
+            return
+        
+        if not messagebox.askyesno("Procesamiento OCR", self._estimate_message(scan.report), icon='question'):
+            self.view.update_status("Procesamiento cancelado")
+            return
+        self._run_batch(scan.report)
+    
+    def _estimate_message(self, report):
+        """Resumen del análisis previo para la confirmación"""
+        workers = self.scheduler.workers_for('transegen') if self.scheduler is not None else 1
+        profile = self.model.ocr_profile
+        seconds, measured = report.estimate_seconds('transegen', workers, perfil=profile.nombre)
+        
+        msg = f"Archivos: {len(report.probes)} ({report.total_pages} páginas)\n"
+        msg += f"Perfil de OCR: {profile.titulo}\n"
+        msg += f"Páginas que requieren OCR: {report.ocr_pages}\n"
+        msg += f"Tiempo estimado: {format_duration(seconds)} con {workers} trabajador(es)"
+        if not measured:
+            msg += "\n(estimación inicial: se ajusta con cada lote procesado)"
+        
+        rejected = report.rejected
+        if rejected:
+            msg += f"\n\n✗ Se omitirán {len(rejected)} archivos dañados o protegidos:\n"
+            for ruta, error in rejected[:MAX_REJECTED_SHOWN]:
+                msg += f"  • {display_name(ruta)}: {error}\n"
+            if len(rejected) > MAX_REJECTED_SHOWN:
+                msg += f"  ... y {len(rejected) - MAX_REJECTED_SHOWN} más\n"
+        
+        return msg.rstrip('\n') + "\n\n¿Desea continuar?"
+    
+    def _run_batch(self, report):
+        """Procesa el lote confirmado"""
+        # Reanudar un lote interrumpido con los mismos archivos
+        self.journal = self._open_journal()
+        self.resumed = bool(self.journal.load())
+        self.preflight_report = report
+        
+        # Con el planificador compartido el OCR corre sin bloquear la ventana
+        if self.scheduler is not None:
+            self._start_job(report)
             return
         
         # Mostrar loading
@@ -58,48 +236,141 @@ class TransSegenController:
             self.view.update_status("Procesando con OCR... Por favor espere...")
             self.view.root.update()
             
-            extracted_data = self.model.process_all_pdfs()
+            extracted_data = self.model.process_all_pdfs(journal=self.journal)
+            self._update_profile_choices()
             
             # **PRIMERO ocultar el loading**
             self.view.hide_loading()
             
             # **DESPUÉS mostrar los datos en el treeview**
-            for i, data in enumerate(extracted_data, 1):
-                if 'error' in data:
-                    self.view.add_data_to_tree(
-                        i,
-                        f"ERROR: {data['archivo']}",
-                        ""
-                    )
-                else:
-                    self.view.add_data_to_tree(
-                        i,
-                        data['nombres'],
-                        data['nro_transegen']
-                    )
-            
-            self.view.update_status(f"Datos extraídos de {len(extracted_data)} archivos")
-            
-            if extracted_data:
-                # Contar errores
-                errores = sum(1 for d in extracted_data if 'error' in d)
-                exitosos = len(extracted_data) - errores
-                
-                msg = f"Procesamiento completado:\n"
-                msg += f"✓ Exitosos: {exitosos}\n"
-                if errores > 0:
-                    msg += f"✗ Con errores: {errores}\n"
-                msg += "\nRevise los datos en la vista previa."
-                
-                # **AHORA SÍ mostrar el messagebox (sin loading bloqueando)**
-                messagebox.showinfo("Procesamiento Completado", msg)
+            self._show_extracted_data(extracted_data)
         
         except Exception as e:
             # **Ocultar loading ANTES de mostrar el error**
             self.view.hide_loading()
             messagebox.showerror("Error", f"Error durante la extracción: {str(e)}")
             self.view.update_status("Error en la extracción")
+    
+    def _start_job(self, report):
+        """Envía el lote al planificador y sigue su avance
+        
+        Los archivos rechazados por el análisis previo no se envían al pool:
+        quedan como registros de error en su posición original.
+        """
+        self.view.clear_data_tree()
+        modulo = get_modulo('transegen')
+        rejected = {
+            ruta: modulo.error_record(display_name(ruta), error)
+            for ruta, error in report.rejected
+        }
+        self.job = self.scheduler.submit_batch(
+            'transegen',
+            self.model.get_pdf_files(),
+            journal=self.journal,
+            prefilled=rejected,
+            costs=report.costs(),
+            options={'perfil_ocr': self.model.ocr_profile.nombre},
+            # Siempre se miden las etapas: el tiempo de tesseract da el
+            # rendimiento del perfil (ver _record_throughput)
+            collector=metrics.BatchMetrics()
+        )
+        self.rows_shown = 0
+        self.view.update_status(f"Lote #{self.job.job_id} en cola: 0/{self.job.total} archivos")
+        self.view.root.after(JOB_POLL_MS, self._poll_job)
+    
+    def _poll_job(self):
+        """Actualiza el avance del lote y muestra los datos al terminar"""
+        if not self._window_alive():
+            return
+        
+        job = self.job
+        if not job.is_done():
+            self._show_partial_results(job)
+            self.view.update_status(f"Procesando con OCR... {job.completed}/{job.total} archivos")
+            self.view.root.after(JOB_POLL_MS, self._poll_job)
+            return
         
+        self.model.set_extracted_data(job.records(), job.sources())
+        if job.estado == CANCELADO:
+            self.view.update_status(f"Lote cancelado ({job.completed}/{job.total} archivos)")
+            return
+        self._record_throughput(job)
+        if metrics.requested():
+            metrics.report(job.metrics, self._metrics_name(job))
+        if job.tracer is not None:
+            tracing.report(job.tracer, self._metrics_name(job))
+        self.view.clear_data_tree()
+        self._show_extracted_data(self.model.get_extracted_data())
+    
+    def _record_throughput(self, job):
+        """Guarda el rendimiento del lote para las próximas estimaciones"""
+        report = self.preflight_report
+        if report is None or self.resumed or job.estado != COMPLETADO:
+            return
+        workers = self.scheduler.workers_for('transegen')
+        record_ocr_rate('transegen', report.ocr_pages, job.finalizado - job.creado, workers)
+        # Perfil: solo el tiempo de las llamadas a tesseract (suma de todos los trabajadores)
+        record_profile_rate(
+            self.model.ocr_profile.nombre,
+            job.metrics.pages.get('tesseract', 0),
+            sum(job.metrics.stages.get('tesseract', []))
+        )
+        self._update_profile_choices()
+    
+    def _build_rows(self, items):
+        """Convierte pares (número, registro) en filas de la vista previa"""
+        rows = []
+        for i, data in items:
+            if 'error' in data:
+                rows.append((i, (f"ERROR: {data['archivo']}", "")))
+            else:
+                rows.append((i, (data['nombres'], data['nro_transegen'])))
+        return rows
+    
+    def _show_partial_results(self, job):
+        """Muestra los archivos ya terminados (los más livianos terminan primero)"""
+        completed = job.completed
+        if completed == self.rows_shown:
+            return
+        self.rows_shown = completed
+        self.view.replace_rows_in_tree(self._build_rows(
+            (index + 1, data) for index, data in job.partial_records()
+        ))
+    
+    def _show_extracted_data(self, extracted_data):
+        """Muestra los datos extraídos en la vista previa"""
+        self.view.add_rows_to_tree(self._build_rows(enumerate(extracted_data, 1)))
+        
+        self.view.update_status(f"Datos extraídos de {len(extracted_data)} archivos")
+        
+        if extracted_data:
+            # Contar errores
+            errores = sum(1 for d in extracted_data if 'error' in d)
+            exitosos = len(extracted_data) - errores
+            
+            msg = f"Procesamiento completado:\n"
+            msg += f"✓ Exitosos: {exitosos}\n"
+            if errores > 0:
+                msg += f"✗ Con errores: {errores}\n"
+            msg += "\nRevise los datos en la vista previa."
+            
+            # **AHORA SÍ mostrar el messagebox (sin loading bloqueando)**
+            messagebox.showinfo("Procesamiento Completado", msg)
+    
+    def _open_journal(self):
+        """Abre el diario del lote actual y pregunta si se reanuda"""
+        journal = BatchJournal.for_batch('transegen', self.model.get_pdf_files())
+        if journal.exists():
+            completados = len(journal.load())
+            reanudar = messagebox.askyesno(
+                "Reanudar lote",
+                f"Se encontró un lote interrumpido con {completados} archivos ya procesados.\n"
+                "¿Desea reanudarlo? (No: se procesan todos nuevamente)"
+            )
+            if not reanudar:
+                journal.remove()
+        return journal
+    
     def generate_excel(self):
         """Genera archivo Excel"""
         if not self.model.has_data():
@@ -122,6 +393,9 @@ class TransSegenController:
         try:
             self._create_excel_file(file_path)
             
+            # Los resultados ya están exportados: el diario ya no es necesario
+            self._discard_journal()
+            
             self.view.update_status(f"Excel generado: {Path(file_path).name}")
             messagebox.showinfo(
                 "Éxito",
@@ -137,43 +411,39 @@ class TransSegenController:
     
     def _create_excel_file(self, file_path):
         """Crea el archivo Excel"""
-        wb = openpyxl.Workbook()
-        ws = wb.active
-        ws.title = "Datos Trans-Segen"
-        
-        # Estilos
-        header_fill = PatternFill(
-            start_color="2E7D32",
-            end_color="2E7D32",
-            fill_type="solid"
-        )
-        header_font = Font(bold=True, color="FFFFFF", size=12)
-        
-        # Encabezados
-        headers = ["N°", "Nombres y Apellidos", "Nro Trans-Segen"]
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col, value=header)
-            cell.fill = header_fill
-            cell.font = header_font
-            cell.alignment = Alignment(horizontal="center", vertical="center")
-        
-        # Datos
-        extracted_data = self.model.get_extracted_data()
-        for i, data in enumerate(extracted_data, 2):
-            ws.cell(row=i, column=1, value=i-1)
-            ws.cell(row=i, column=2, value=data['nombres'])
-            ws.cell(row=i, column=3, value=data['nro_transegen'])
-        
-        # Ajustar anchos
-        ws.column_dimensions['A'].width = 8
-        ws.column_dimensions['B'].width = 40
-        ws.column_dimensions['C'].width = 35
-        
-        # Guardar
-        wb.save(file_path)
+        # Si el lote se midió o se trazó, el guardado se suma a sus resultados
+        job_metrics = self.job.metrics if self.job is not None else None
+        job_tracer = self.job.tracer if self.job is not None else None
+        with metrics.collecting(job_metrics), metrics.tracing_into(job_tracer):
+            write_excel(
+                self.model.get_extracted_data(),
+                file_path,
+                get_modulo('transegen')
+            )
+        if job_metrics is not None and metrics.requested():
+            metrics.report(job_metrics, self._metrics_name(self.job), show=False)
+        if job_tracer is not None:
+            tracing.report(job_tracer, self._metrics_name(self.job))
+    
+    def _metrics_name(self, job):
+        """Nombre de los archivos de métricas y traza de un lote"""
+        return f"transegen-lote{job.job_id}-{int(job.creado)}"
+    
+    def _discard_journal(self):
+        """Elimina el diario del lote una vez exportados los resultados"""
+        if self.journal is not None:
+            self.journal.remove()
+            self.journal = None
     
     def clear_data(self):
         """Limpia todos los datos"""
+        if self.scanner is not None:
+            self.scanner.cancel()
+            self.scanner = None
+        # Un análisis previo en curso se ignora al terminar
+        self.preflight = None
+        if self.job is not None and not self.job.is_done():
+            self.job.cancel()
         self.model.clear_files()
         self.view.update_file_list([])
         self.view.clear_data_tree()
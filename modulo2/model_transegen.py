@@ -2,64 +2,184 @@ import fitz  # PyMuPDF
 from PIL import Image
 import pytesseract
 import io
+import os
 import re
-from pathlib import Path
+import sys
+import time
+
+from comun import metrics
+from comun.archives import display_name, expand, is_member, read_member, split_pages
+from comun.dedup import DedupIndex
+from comun.ocr_profiles import DEFAULT_PROFILE, get_profile
+from comun.prefetch import Prefetcher
+from comun.preflight import record_profile_rate
+from comun.records import RecordStore
+from comun.render_pipeline import RenderPipeline
+from comun.split import DocumentSplitter
 
 
 class TransSegenModel:
     """Modelo para extracción de datos Trans-Segen usando OCR"""
     
+    MODULO = 'transegen'
+    
+    # Tiempo máximo de una llamada a tesseract (segundos por página)
+    OCR_TIMEOUT = 120
+    
+    # Páginas que se leen de cada PDF y mínimo de caracteres para no usar OCR
+    PAGES_TO_READ = 2
+    MIN_TEXT_CHARS = 50
+    
+    # Opciones que acepta configure() (las demás se rechazan al evaluar)
+    CONFIG_OPTIONS = ('perfil_ocr', 'hilos_ocr')
+    
     def __init__(self):
         self.pdf_files = []
-        self.extracted_data = []
+        self.pdf_names = []
+        self.extracted_data = RecordStore.for_modulo(self.MODULO)
+        
+        # Índice para omitir archivos repetidos (por ruta y, opcionalmente,
+        # por contenido) y cantidad omitida en la última carga
+        self.dedup_index = DedupIndex()
+        self.skipped_duplicates = 0
+        
+        # Archivo opcional donde se guarda el texto OCR (ver comun.text_archive)
+        self.text_archive = None
+        
+        # Render y OCR en paralelo en process_all_pdfs (ver comun.render_pipeline)
+        self.pipelined = False
+        
+        # Dividir los PDFs con varias resoluciones escaneadas juntas (ver
+        # comun.split) y procesar las partes en `split_workers` procesos
+        self.split_documents = False
+        self.split_workers = None
+        
+        # Bytes que se pueden leer por adelantado en process_all_pdfs (ver
+        # comun.prefetch); None lee cada PDF al abrirlo
+        self.prefetch_budget = None
+        self.prefetch_stats = None
+        
+        # Límite de hilos de tesseract del entorno (configure lo restaura)
+        self._omp_thread_limit = os.environ.get('OMP_THREAD_LIMIT')
+        
+        # Resolución, modelo y preprocesamiento del OCR (ver comun.ocr_profiles)
+        self.ocr_profile = get_profile(DEFAULT_PROFILE)
+        # Páginas con OCR y segundos de tesseract del último lote (rendimiento del perfil)
+        self.ocr_pages = 0
+        self.ocr_seconds = 0.0
         
         # Configurar Tesseract (ajusta la ruta según tu instalación)
         pytesseract.pytesseract.tesseract_cmd = r'C:\Users\70995003\AppData\Local\Programs\Tesseract-OCR\tesseract.exe'
     
     def add_pdf_files(self, files):
-        """Agrega archivos PDF a la lista"""
+        """Agrega archivos PDF a la lista (omitiendo los ya cargados)"""
+        # Los ZIP/TAR se reemplazan por sus PDFs ('lote.zip!doc.pdf')
+        files = list(expand(files))
+        new_files = [pdf for pdf in files if self.dedup_index.add(pdf)]
+        self.skipped_duplicates = len(files) - len(new_files)
+        files = new_files
         self.pdf_files.extend(files)
+        # Los nombres se calculan una sola vez por archivo
+        self.pdf_names.extend(sys.intern(display_name(pdf)) for pdf in files)
         return len(self.pdf_files)
     
     def get_pdf_files(self):
         """Retorna la lista de archivos PDF"""
         return self.pdf_files
     
-    def get_pdf_names(self):
-        """Retorna solo los nombres de los archivos"""
-        return [Path(pdf).name for pdf in self.pdf_files]
+    def get_pdf_names(self, start=0):
+        """Retorna solo los nombres de los archivos (desde la posición `start`)"""
+        return self.pdf_names[start:]
     
     def clear_files(self):
         """Limpia todos los datos"""
         self.pdf_files = []
-        self.extracted_data = []
+        self.pdf_names = []
+        self.extracted_data = RecordStore.for_modulo(self.MODULO)
+        self.dedup_index.clear()
+        self.skipped_duplicates = 0
+    
+    def set_ocr_profile(self, nombre):
+        """Cambia el perfil de OCR ('rapido', 'equilibrado' o 'mejor')"""
+        self.ocr_profile = get_profile(nombre)
+    
+    def configure(self, options):
+        """Aplica las opciones de un lote (las envía el pool a sus trabajadores)"""
+        self.set_ocr_profile(options.get('perfil_ocr', DEFAULT_PROFILE))
+        # Hilos de OpenMP de cada tesseract (ver comun.autotune)
+        hilos = options.get('hilos_ocr')
+        if hilos:
+            os.environ['OMP_THREAD_LIMIT'] = str(hilos)
+        elif self._omp_thread_limit is None:
+            os.environ.pop('OMP_THREAD_LIMIT', None)
+        else:
+            os.environ['OMP_THREAD_LIMIT'] = self._omp_thread_limit
+    
+    def warm_up(self):
+        """Precarga el motor OCR y los datos del idioma con una imagen mínima
+        
+        Deja tesseract y 'spa.traineddata' en la caché del sistema operativo;
+        si tesseract no está disponible el error aparecerá al procesar.
+        """
+        fitz.open().close()
+        try:
+            pytesseract.image_to_string(
+                Image.new('L', (32, 32), 255),
+                lang=self.ocr_profile.lang,
+                config=self.ocr_profile.config()
+            )
+        except Exception:
+            pass
     
-    def extract_text_from_pdf_ocr(self, pdf_path):
-        """Extrae texto de un PDF escaneado usando OCR"""
+    def extract_text_from_pdf_ocr(self, pdf_path, data=None):
+        """Extrae texto de un PDF escaneado usando OCR
+        
+        Si se pasa `data` (bytes del PDF), se abre desde memoria y `pdf_path`
+        solo identifica al documento. Una ruta con rango de páginas
+        ('lote.pdf#p3-4', ver comun.split) lee desde la primera de ese rango.
+        """
         try:
-            doc = fitz.open(pdf_path)
+            ruta, first, stop = split_pages(pdf_path)
+            with metrics.stage('fitz.open') as st:
+                if data is None and is_member(ruta):
+                    # Miembro de un ZIP/TAR: se lee a memoria sin extraerlo
+                    data = read_member(ruta)
+                if data is not None:
+                    doc = fitz.open(stream=data, filetype="pdf")
+                    st.bytes = len(data)
+                else:
+                    doc = fitz.open(ruta)
+                st.pages = len(doc)
             full_text = ""
             
-            # Procesar solo las primeras 2 páginas
-            for page_num in range(min(len(doc), 2)):
+            # Procesar solo las primeras 2 páginas (del documento o de su rango)
+            last = min(len(doc), stop if stop is not None else len(doc), first + self.PAGES_TO_READ)
+            for page_num in range(first, last):
                 page = doc[page_num]
                 
                 # Primero intentar extraer texto normal
-                page_text = page.get_text()
+                with metrics.stage('get_text') as st:
+                    page_text = page.get_text()
+                    st.pages = 1
                 
                 # Si no hay texto o es muy poco, usar OCR
-                if len(page_text.strip()) < 50:
+                if len(page_text.strip()) < self.MIN_TEXT_CHARS:
                     # Convertir página a imagen
-                    pix = page.get_pixmap(matrix=fitz.Matrix(300/72, 300/72))  # 300 DPI
-                    img_data = pix.tobytes("png")
-                    img = Image.open(io.BytesIO(img_data))
+                    profile = self.ocr_profile
+                    with metrics.stage('get_pixmap') as st:
+                        pix = page.get_pixmap(
+                            matrix=fitz.Matrix(profile.dpi/72, profile.dpi/72),
+                            colorspace=profile.colorspace()
+                        )
+                        st.bytes = pix.stride * pix.height
+                        st.pages = 1
+                    with metrics.stage('png') as st:
+                        img_data = pix.tobytes("png")
+                        img = Image.open(io.BytesIO(img_data))
+                        st.bytes = len(img_data)
                     
                     # Aplicar OCR con configuración en español
-                    page_text = pytesseract.image_to_string(
-                        img, 
-                        lang='spa',
-                        config='--psm 6'
-                    )
+                    page_text = self.ocr_image(img)
                 
                 full_text += page_text + "\n\n"
             
@@ -67,7 +187,23 @@ class TransSegenModel:
             return full_text
         
         except Exception as e:
-            raise Exception(f"Error al procesar {Path(pdf_path).name}: {str(e)}")
+            raise Exception(f"Error al procesar {display_name(pdf_path)}: {str(e)}")
+    
+    def ocr_image(self, img):
+        """Aplica OCR a la imagen de una página con el perfil actual"""
+        profile = self.ocr_profile
+        inicio = time.perf_counter()
+        with metrics.stage('tesseract') as st:
+            page_text = pytesseract.image_to_string(
+                profile.preprocess(img), 
+                lang=profile.lang,
+                config=profile.config(),
+                timeout=self.OCR_TIMEOUT
+            )
+            st.pages = 1
+        self.ocr_pages += 1
+        self.ocr_seconds += time.perf_counter() - inicio
+        return page_text
     
     def extract_data_from_text(self, text, pdf_name):
         """Extrae datos específicos del texto (Trans-Segen)"""
@@ -113,30 +249,148 @@ class TransSegenModel:
         
         return data
     
-    def process_all_pdfs(self):
-        """Procesa todos los PDFs cargados y extrae sus datos"""
-        self.extracted_data = []
-        
-        for pdf_path in self.pdf_files:
+    def error_record(self, pdf_name, error):
+        """Retorna un registro vacío con el error"""
+        return {
+            'archivo': pdf_name,
+            'nombres': '',
+            'nro_transegen': '',
+            'error': str(error)
+        }
+    
+    def process_pdf(self, pdf_path, data=None):
+        """Procesa un PDF y retorna su registro (None si no tiene texto)"""
+        with metrics.stage('documento', display_name(pdf_path)):
             try:
-                text = self.extract_text_from_pdf_ocr(pdf_path)
-                if text:
-                    data = self.extract_data_from_text(text, Path(pdf_path).name)
-                    self.extracted_data.append(data)
+                text = self.extract_text_from_pdf_ocr(pdf_path, data=data)
+                return self.record_from_text(pdf_path, text)
             except Exception as e:
-                self.extracted_data.append({
-                    'archivo': Path(pdf_path).name,
-                    'nombres': '',
-                    'nro_transegen': '',
-                    'error': str(e)
-                })
+                return self.error_record(display_name(pdf_path), e)
+    
+    def record_from_text(self, pdf_path, text):
+        """Archiva el texto de un PDF y extrae sus campos (None si no tiene texto)"""
+        if self.text_archive is not None:
+            self.text_archive.store(self.MODULO, pdf_path, text)
+        if text:
+            with metrics.stage('regex'):
+                return self.extract_data_from_text(text, display_name(pdf_path))
+        return None
+    
+    def process_all_pdfs(self, journal=None):
+        """Procesa todos los PDFs cargados y extrae sus datos
+        
+        Con un diario (comun.journal.BatchJournal) cada resultado se registra
+        al terminar y los archivos ya completados en una ejecución anterior
+        se omiten. Con `pipelined` el render del siguiente documento corre en
+        otro proceso mientras se hace el OCR del actual; con `prefetch_budget`
+        los próximos PDFs se leen a memoria en otros hilos. Con
+        `split_documents` se obtiene una fila por resolución.
+        """
+        if self.split_documents:
+            return self._process_split(journal)
+        self.extracted_data = RecordStore.for_modulo(self.MODULO)
+        done = journal.load() if journal is not None else {}
+        self.ocr_pages = 0
+        self.ocr_seconds = 0.0
+        
+        texts = None
+        if self.pipelined:
+            pipeline = RenderPipeline(
+                self.PAGES_TO_READ, self.MIN_TEXT_CHARS,
+                self.ocr_profile.dpi, gray=self.ocr_profile.gris
+            )
+            texts = pipeline.texts(
+                [p for p in self.pdf_files if str(p) not in done],
+                self.ocr_image
+            )
+        
+        prefetcher = prefetched = None
+        if self.prefetch_budget and texts is None:
+            prefetcher = Prefetcher(
+                [p for p in self.pdf_files if str(p) not in done], self.prefetch_budget
+            )
+            prefetched = iter(prefetcher)
+        
+        try:
+            for pdf_path in self.pdf_files:
+                if str(pdf_path) in done:
+                    data = done[str(pdf_path)]
+                else:
+                    if texts is not None:
+                        data = self._record_from_pipeline(*next(texts))
+                    else:
+                        contenido = next(prefetched)[1] if prefetched is not None else None
+                        data = self.process_pdf(pdf_path, data=contenido)
+                    if journal is not None:
+                        journal.record(pdf_path, data)
+                if data is not None:
+                    self.extracted_data.append(data, pdf_path)
+        finally:
+            if texts is not None:
+                texts.close()
+            if prefetcher is not None:
+                prefetcher.close()
+                self.prefetch_stats = prefetcher.stats()
+            if journal is not None:
+                journal.close()
+            if self.text_archive is not None:
+                self.text_archive.flush()
         
+        # Solo el tiempo de las llamadas a tesseract, como el controlador con el planificador
+        record_profile_rate(self.ocr_profile.nombre, self.ocr_pages, self.ocr_seconds)
+        return self.extracted_data
+    
+    def _record_from_pipeline(self, pdf_path, text, error):
+        """Registro de un documento procesado por el pipeline de render/OCR"""
+        if error is not None:
+            return self.error_record(display_name(pdf_path), error)
+        try:
+            return self.record_from_text(pdf_path, text)
+        except Exception as e:
+            return self.error_record(display_name(pdf_path), e)
+    
+    def _process_split(self, journal):
+        """Divide los PDFs con varias resoluciones y procesa las partes en paralelo
+        
+        Cada resolución queda con su rango de páginas en 'archivo'
+        ('lote.pdf#p3-4'); el diario registra cada parte por separado.
+        """
+        self.extracted_data = RecordStore.for_modulo(self.MODULO)
+        done = journal.load() if journal is not None else {}
+        options = {'perfil_ocr': self.ocr_profile.nombre}
+        
+        try:
+            with DocumentSplitter(self.split_workers, self.ocr_profile.nombre) as splitter:
+                pdf_paths = splitter.split(self.pdf_files)
+                results = splitter.process(
+                    self.MODULO, [p for p in pdf_paths if p not in done], options
+                )
+                for pdf_path in pdf_paths:
+                    if pdf_path in done:
+                        data = done[pdf_path]
+                    else:
+                        data = next(results)[1]
+                        if journal is not None:
+                            journal.record(pdf_path, data)
+                    if data is not None:
+                        self.extracted_data.append(data, pdf_path)
+        finally:
+            if journal is not None:
+                journal.close()
+        
+        # Las resoluciones se procesan en otros procesos: el splitter suma su OCR
+        self.ocr_pages, self.ocr_seconds = splitter.ocr_pages, splitter.ocr_seconds
+        record_profile_rate(self.ocr_profile.nombre, self.ocr_pages, self.ocr_seconds)
         return self.extracted_data
     
     def get_extracted_data(self):
         """Retorna los datos extraídos"""
         return self.extracted_data
     
+    def set_extracted_data(self, extracted_data, sources=None):
+        """Reemplaza los datos extraídos (p. ej. con los de un lote del planificador)"""
+        self.extracted_data = RecordStore.for_modulo(self.MODULO, extracted_data, sources)
+    
     def has_data(self):
         """Verifica si hay datos extraídos"""
         return len(self.extracted_data) > 0
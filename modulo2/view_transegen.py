@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
 
+from comun.virtual_tree import VirtualTreeview
+
 class TransSegenView:
     """Vista para el módulo Trans-Segen"""
     
@@ -75,6 +77,14 @@ class TransSegenView:
         )
         self.btn_load.pack(side=tk.LEFT, padx=5, ipadx=10, ipady=5)
         
+        # Botón 1b: Cargar carpeta (se recorre en segundo plano)
+        self.btn_load_folder = ttk.Button(
+            button_frame, 
+            text="📂 Cargar Carpeta",
+            width=25
+        )
+        self.btn_load_folder.pack(side=tk.LEFT, padx=5, ipadx=10, ipady=5)
+        
         # Botón 2: Extraer con OCR
         self.btn_extract = ttk.Button(
             button_frame, 
@@ -106,6 +116,20 @@ class TransSegenView:
             width=25
         )
         self.btn_clear.pack(side=tk.LEFT, padx=5, ipadx=10, ipady=5)
+        
+        # Perfil de OCR del próximo lote (lo completa el controlador)
+        profile_frame = ttk.Frame(button_container)
+        profile_frame.pack(fill=tk.X, pady=(8, 0))
+        ttk.Label(profile_frame, text="Perfil de OCR:").pack(side=tk.LEFT, padx=5)
+        self.profile_var = tk.StringVar()
+        self.profile_combo = ttk.Combobox(
+            profile_frame,
+            textvariable=self.profile_var,
+            state='readonly',
+            width=45
+        )
+        self.profile_combo.pack(side=tk.LEFT, padx=5)
+        self._profile_names = []
     
     def _create_file_list_frame(self, parent):
         """Crea el frame con la lista de archivos"""
@@ -154,7 +178,7 @@ class TransSegenView:
             height=12
         )
         
-        v_scrollbar.config(command=self.data_tree.yview)
+        # La barra vertical la controla la vista virtualizada (ver más abajo)
         h_scrollbar.config(command=self.data_tree.xview)
         
         # Configurar columnas
@@ -176,26 +200,35 @@ class TransSegenView:
         # Configurar expansión
         tree_container.columnconfigure(0, weight=1)
         tree_container.rowconfigure(0, weight=1)
+        
+        # Solo se materializan las filas visibles (miles de filas sin demora)
+        self.data_rows = VirtualTreeview(self.data_tree, v_scrollbar)
     
     def update_file_list(self, file_names):
         """Actualiza la lista de archivos"""
         self.file_listbox.delete(0, tk.END)
-        for name in file_names:
-            self.file_listbox.insert(tk.END, name)
+        self.append_file_list(file_names)
+    
+    def append_file_list(self, file_names):
+        """Agrega nombres al final de la lista (una sola llamada a Tk)"""
+        if file_names:
+            self.file_listbox.insert(tk.END, *file_names)
     
     def clear_data_tree(self):
         """Limpia la vista previa"""
-        for item in self.data_tree.get_children():
-            self.data_tree.delete(item)
+        self.data_rows.clear()
     
     def add_data_to_tree(self, index, nombres, nro_transegen):
         """Agrega una fila de datos"""
-        self.data_tree.insert(
-            '', 
-            tk.END, 
-            text=str(index),
-            values=(nombres, nro_transegen)
-        )
+        self.data_rows.append([(str(index), (nombres, nro_transegen))])
+    
+    def add_rows_to_tree(self, rows):
+        """Agrega varias filas (índice, valores) de una sola vez"""
+        self.data_rows.append([(str(index), values) for index, values in rows])
+    
+    def replace_rows_in_tree(self, rows):
+        """Reemplaza las filas de la vista previa sin mover el desplazamiento"""
+        self.data_rows.set_rows([(str(index), values) for index, values in rows], keep_position=True)
     
     def update_status(self, message):
         """Actualiza el mensaje de estado"""
@@ -239,9 +272,22 @@ class TransSegenView:
         text_widget.insert('1.0', text_content)
         text_widget.config(state=tk.DISABLED)
     
-    def set_button_commands(self, load_cmd, extract_cmd, generate_cmd, debug_cmd, clear_cmd):
+    def set_ocr_profiles(self, profiles, selected):
+        """Carga los perfiles de OCR: lista de (nombre, etiqueta) y el elegido"""
+        self._profile_names = [nombre for nombre, _ in profiles]
+        self.profile_combo['values'] = [etiqueta for _, etiqueta in profiles]
+        self.profile_combo.current(self._profile_names.index(selected))
+    
+    def get_ocr_profile(self):
+        """Retorna el nombre del perfil de OCR elegido"""
+        return self._profile_names[self.profile_combo.current()]
+    
+    def set_button_commands(self, load_cmd, extract_cmd, generate_cmd, debug_cmd, clear_cmd,
+                            folder_cmd=None):
         """Configura los comandos de los botones"""
         self.btn_load.config(command=load_cmd)
+        if folder_cmd is not None:
+            self.btn_load_folder.config(command=folder_cmd)
         self.btn_extract.config(command=extract_cmd)
         self.btn_generate.config(command=generate_cmd)
         self.btn_debug.config(command=debug_cmd)